@@ -13,15 +13,15 @@ def print_messages(client : Client):
     columns, _ = os.get_terminal_size(0)
     while True:
         data = channel.consume()
-        msg = Message.initFromJSON(data)
+        msg = Message.initFromEnvelope(data)
         msg.decode()
 
         if msg.header == "Write: Initial":
-            msg = InitMessage.initFromJSON(data)
+            msg = InitMessage.initFromEnvelope(data)
             msg.decode()
             print("{} joined the chat".format(msg.identifier).center(columns, " "))
         elif msg.header == "Write: TextMessage":
-            msg = TextMessage.initFromJSON(data)
+            msg = TextMessage.initFromEnvelope(data)
             msg.decode()
 
             sender_id = msg.get_signature()[0]
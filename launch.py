@@ -1,4 +1,3 @@
-import threading
 import time
 import enquiries
 import os
@@ -129,13 +128,21 @@ def spawn_processes_menu():
         options = [
             "1. Launch Server",
             "2. Launch Client",
-            "3. Return to Main Menu",
+            "3. Restart Server",
+            "4. Return to Main Menu",
         ]
         choice = enquiries.choose("Choose one of these options: ", options)
 
         if choice == options[-1]:
             return False
 
+        if choice == options[2]:
+            print("Identifier of the crashed server: ", end="")
+            p = multiprocessing.Process(target=launch_server, args=(False, 0, input().strip()))
+            p.start()
+            processes["server"].append(p)
+            continue
+
         print("Number of Instances: ", end="")
         instances = int(input())
 
@@ -151,10 +158,10 @@ def spawn_processes_menu():
                 processes["client"].append(p)
 
 
-def launch_server(initial=False, i=0):
+def launch_server(initial=False, i=0, restart=None):
     sys.stdout = open("logs/server-" + str(os.getpid()) + ".out", "a", buffering=1)
     sys.stderr = open("logs/server-" + str(os.getpid()) + ".out", "a", buffering=1)
-    server = Server(initial, i, verbose=True)
+    server = Server(initial, i, verbose=True, restart=restart)
     server.start()
 
 
@@ -193,9 +200,6 @@ def launch_client():
     last_seen_text = ""
     text = "a"
 
-    def timeout_handler():
-        channel.produce(None)
-
     while True:
         ts = time.time_ns() / 10**9
         if ts - old_ts > 5:
@@ -203,20 +207,18 @@ def launch_client():
             client.send("(Reply to {}) {}".format(last_seen_text, text) if last_seen_text != "" else text)
             text = inc_string(text)
 
-        timer = threading.Timer(5, timeout_handler)
-        timer.start()
-        data = channel.consume()
-        timer.cancel()
+        messages = channel.consume_many(1, timeout=5)
+        data = messages[0] if messages else None
         if data is not None:
-            msg = Message.initFromJSON(data)
+            msg = Message.initFromEnvelope(data)
             msg.decode()
 
             if msg.header == "Write: Initial":
-                msg = InitMessage.initFromJSON(data)
+                msg = InitMessage.initFromEnvelope(data)
                 msg.decode()
                 print("{} joined the chat".format(msg.identifier))
             if msg.header == "Write: TextMessage":
-                msg = TextMessage.initFromJSON(data)
+                msg = TextMessage.initFromEnvelope(data)
                 msg.decode()
 
                 sender_id = msg.get_signature()[0]
@@ -1,4 +1,5 @@
 import random
+import base64
 import string
 import threading
 import sys
@@ -11,12 +12,15 @@ from src.core.signatures.signatures import Signatures
 from src.core.multicast.reliable_multicast import ReliableMulticast
 from src.core.unicast.udp_listener import UDPUnicastListener
 from src.core.utils.channel import Channel
+from src.core.utils.timer_wheel import call_later
 from src.core.utils.configuration import Configuration
 from src.components.client.client_co_reliable_multicast import ClientCausalOrderedReliableMulticast
 from src.protocol.client.read.heartbeat import HearbeatQueryResponse, HeartbeatQuery
 from src.protocol.client.read.messages import MessageQuery
 from src.protocol.client.write.text_message import TextMessage
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
+from src.protocol.codec import set_codec
 from nacl.signing import SigningKey, VerifyKey
 from src.protocol.client.write.initial import *
 
@@ -28,6 +32,7 @@ class Client:
         self._trash_channel = Channel()
         self._trash_channel.set_trash_flag(True)
         self._configuration = Configuration()
+        set_codec(self._configuration.get_codec())
         self._identifier = "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(10))
         self._signing_key = SigningKey.generate()
         self._signature = Signatures(self._signing_key, self._identifier)
@@ -56,11 +61,11 @@ class Client:
         )
 
         self._unicast_receiver = UDPUnicastListener(
-            self._server_channel, listener=self._read_multicast._udp_sock
+            self._server_channel, self._configuration, listener=self._read_multicast._udp_sock
         )
         self._unicast_receiver.start()
         self._ack_receiver = UDPUnicastListener(
-            self._server_channel, listener=self._write_multicast._udp_sock
+            self._server_channel, self._configuration, listener=self._write_multicast._udp_sock
         )
         self._ack_receiver.start()
         self._unicast_sender = UnicastSender(self._configuration, self._read_multicast._udp_sock)
@@ -92,8 +97,7 @@ class Client:
 
             self._write_multicast.send(initial_msg, sign=False)
 
-            timer = threading.Timer(self._configuration.get_discovery_total_timeout(), timeout_handler)
-            timer.start()
+            timer = call_later(self._configuration.get_discovery_total_timeout(), timeout_handler)
             responses = []
             nonces = []
             response = -1
@@ -102,9 +106,8 @@ class Client:
                 if response is not None:
                     if nonces == []:  # first message
                         timer.cancel()
-                        timer = threading.Timer(self._configuration.get_timeout(), timeout_handler)
-                        timer.start()
-                    msg = InitResponse.initFromJSON(response)
+                        timer = call_later(self._configuration.get_timeout(), timeout_handler)
+                    msg = InitResponse.initFromEnvelope(response)
                     msg.decode()
 
                     if msg.get_nonce() not in nonces:
@@ -116,8 +119,8 @@ class Client:
                 f = math.ceil(N / 4) - 1
 
                 success_count = 0
-                for data in responses:
-                    msg = InitResponse.initFromJSON(data)
+                for envelope in responses:
+                    msg = InitResponse.initFromEnvelope(envelope)
                     msg.decode()
 
                     if msg.response == "success: user already exists with same pk":
@@ -151,22 +154,19 @@ class Client:
 
     def _consumer(self):
         while True:
-            data = self._server_channel.consume()
-            self._process_message(data)
-
-    def _process_message(self, data):
-        msg = Message.initFromJSON(data)
-        msg.decode()
-
-        if msg.header == "Query Response: HeartBeat":
-            self._process_heartbeat(data)
-        elif msg.header == "Write: Initial":
-            self._process_init_message(data)
-        elif msg.header == "Write: TextMessage":
-            self._process_text_message(data)
-
-    def _process_heartbeat(self, data):
-        heartbeat = HearbeatQueryResponse.initFromJSON(data)
+            envelope = self._server_channel.consume()
+            self._process_message(envelope)
+
+    def _process_message(self, envelope: Envelope):
+        if envelope.header == "Query Response: HeartBeat":
+            self._process_heartbeat(envelope)
+        elif envelope.header == "Write: Initial":
+            self._process_init_message(envelope)
+        elif envelope.header == "Write: TextMessage":
+            self._process_text_message(envelope)
+
+    def _process_heartbeat(self, envelope: Envelope):
+        heartbeat = HearbeatQueryResponse.initFromEnvelope(envelope)
         heartbeat.decode()
 
         nacks = self._write_multicast._handle_acks_open(heartbeat.acks, {})
@@ -174,9 +174,13 @@ class Client:
         if nacks is not None:
             init_nacks = {}
             for identifier in nacks:
-                if len(nacks[identifier]) > 0 and nacks[identifier][0] == 0:
-                    init_nacks[identifier] = [0]
-                    nacks[identifier].pop(0)
+                if len(nacks[identifier]) > 0 and nacks[identifier][0][0] == 0:
+                    # the initial message of a user is queried from all servers
+                    init_nacks[identifier] = [[0, 0]]
+                    if nacks[identifier][0][1] == 0:
+                        nacks[identifier].pop(0)
+                    else:
+                        nacks[identifier][0][0] = 1
 
             msg_query = MessageQuery.initFromData(init_nacks)
             msg_query.encode()
@@ -186,24 +190,29 @@ class Client:
             msg_query.encode()
             self._unicast_sender.send_udp_without_ack(msg_query, addr)
 
-    def _process_text_message(self, data):
+    def _process_text_message(self, envelope: Envelope):
         self._check_init_messages()
 
-        msg = Message.initFromJSON(data)
+        # every server responds to message queries, hence most copies are already delivered
+        if self._write_multicast._check_if_duplicate(envelope.raw_data):
+            return
+
+        msg = Message.initFromEnvelope(envelope)
         msg.decode()
 
         if msg.verify_signature(self._signature, self._users):
-            self._write_multicast._receive_pb_message_open(data)
+            self._write_multicast._receive_pb_message_open(envelope)
 
-    def _process_init_message(self, data):
-        msg = InitMessage.initFromJSON(data)
+    def _process_init_message(self, envelope: Envelope):
+        msg = InitMessage.initFromEnvelope(envelope)
         msg.decode()
 
         if msg.identifier not in self._users:
             if msg.identifier not in self._init_messages:
                 self._init_messages[msg.identifier] = [time.time_ns() / 10**9, []]
 
-            self._init_messages[msg.identifier][1].append(data)
+            # envelopes are compared by their raw data
+            self._init_messages[msg.identifier][1].append(envelope)
             self._check_init_messages()
 
     def _check_init_messages(self):
@@ -214,7 +223,7 @@ class Client:
                 c = Counter(self._init_messages[identifier][1])
                 (majority_value, majority_count) = c.most_common()[0]
                 if majority_count > len(self._init_messages[identifier][1]) / 2:
-                    msg = InitMessage.initFromJSON(majority_value)
+                    msg = InitMessage.initFromEnvelope(majority_value)
                     msg.decode()
                     self._users[identifier] = msg.pk
                     self._write_multicast._receive_pb_message_open(majority_value)
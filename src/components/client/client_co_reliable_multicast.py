@@ -3,6 +3,7 @@ import time
 from src.core.multicast.co_reliable_multicast import CausalOrderedReliableMulticast
 from src.protocol.multicast.piggyback import PiggybackMessage
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 
 
 class ClientCausalOrderedReliableMulticast(CausalOrderedReliableMulticast):
@@ -21,33 +22,18 @@ class ClientCausalOrderedReliableMulticast(CausalOrderedReliableMulticast):
                 ):
                     self._requested_messages[ack][1] = self._R_g[ack]
 
-                missing_messages = list(
-                    set(range(self._requested_messages[ack][1] + 1, acks[ack] + 1))
-                    - set(self._holdback_queue[ack].keys())
-                )
+                missing_messages = self._missing_messages(ack, acks[ack])
                 if len(missing_messages) != 0:
                     nack_messages[ack] = missing_messages
 
         if len(nack_messages) > 0:
-            nack_count = sum([len(nack_messages[identifier]) for identifier in nack_messages])
-            if nack_count > 100:
-                for identifier in nack_messages:
-                    l = len(nack_messages[identifier])
-                    nack_messages[identifier] = nack_messages[identifier][: int(100 * l / nack_count)]
-
-            for identifier in nack_messages:
-                l = len(nack_messages[identifier])
-                if l > 0:
-                    self._requested_messages[identifier][0] = time.time_ns() / 10**9
-                    self._requested_messages[identifier][1] = max(
-                        self._requested_messages[identifier][1],
-                        nack_messages[identifier][-1],
-                    )
+            self._request_nacks(nack_messages)
             return nack_messages
 
-    def _receive_pb_message_open(self, data):
-        pb_message = PiggybackMessage.initFromJSON(data)
+    def _receive_pb_message_open(self, envelope: Envelope):
+        pb_message = PiggybackMessage.initFromEnvelope(envelope)
         pb_message.decode()
+        self._add_to_verified_cache(envelope.raw_data, pb_message.identifier, pb_message.seqno)
 
         if pb_message.identifier == self._identifier:
             return
@@ -61,13 +47,13 @@ class ClientCausalOrderedReliableMulticast(CausalOrderedReliableMulticast):
 
         if pb_message.seqno == self._R_g[pb_message.identifier] + 1:
             # message can be delivered instantly
-            self._deliver(data, pb_message.identifier, pb_message.seqno)
-            self._check_holdback_queue()
+            self._deliver(envelope, pb_message.identifier, pb_message.seqno)
+            self._check_holdback_queue(pb_message.identifier)
 
         elif pb_message.seqno > self._R_g[pb_message.identifier] + 1:
             # there are missing messages => store message in holdback queue
             with self._holdback_queue_lock:
-                self._holdback_queue[pb_message.identifier][pb_message.seqno] = data
+                self._hold_back(pb_message.identifier, pb_message.seqno, envelope)
 
                 if (
                     self._requested_messages[pb_message.identifier][0]
@@ -77,20 +63,11 @@ class ClientCausalOrderedReliableMulticast(CausalOrderedReliableMulticast):
                     self._requested_messages[pb_message.identifier][1] = self._R_g[pb_message.identifier]
 
                 # send nacks
-                missing_messages = list(
-                    set(
-                        range(
-                            self._requested_messages[pb_message.identifier][1] + 1,
-                            pb_message.seqno,
-                        )
-                    )
-                    - set(self._holdback_queue[pb_message.identifier].keys())
-                )
-
+                missing_messages = self._missing_messages(pb_message.identifier, pb_message.seqno - 1)
                 if len(missing_messages) != 0:
                     nack_messages[pb_message.identifier] = missing_messages
 
-    def _update_storage(self, data, identifier, seqno):
+    def _update_storage(self, envelope: Envelope, identifier, seqno):
         # update storage and acks
         self._R_g[identifier] = seqno
         if identifier != self._identifier:
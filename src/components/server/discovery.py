@@ -1,22 +1,29 @@
 import socket
-import threading
+import time
 
 from src.core.utils.channel import Channel
+from src.core.utils.timer_wheel import call_later
 from src.core.signatures.signatures import Signatures
 from src.protocol.base import Message
 from src.core.group_view.group_view import GroupView
 from src.core.utils.configuration import Configuration
-from src.protocol.group_view.join import JoinRequest, JoinResponse
+from src.protocol.group_view.join import JoinRequest, JoinResponse, JoinSnapshot
+from src.components.server.state_transfer import StateTransfer
+from src.core.fragmentation.fragmentation import Fragmenter, Reassembler
 
 
 class ServerDiscovery:
     def __init__(self, configuration: Configuration):
         self._configuration = configuration
+        self._mtu = configuration.get_mtu()
+        self._fragmenter = Fragmenter(self._mtu)
+        self._reassembler = Reassembler.initFromConfiguration(configuration)
 
         self._broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         self._broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
     def discover(self, group_view: GroupView, signature: Signatures, unicast_channel: Channel):
+        """Returns the state transferred by the servers (see state_transfer.py), or None"""
         def timeout_handler():
             unicast_channel.produce(None)
 
@@ -34,21 +41,27 @@ class ServerDiscovery:
             discovered_manager = False
             self._broadcast_socket.settimeout(self._configuration.get_discovery_manager_timeout())
             while not discovered_manager:
-                self._broadcast_socket.sendto(
-                    join_request.json_data.encode(), ("<broadcast>", self._configuration.get_broadcast_port())
+                self._fragmenter.sendto(
+                    self._broadcast_socket,
+                    join_request.raw_data,
+                    ("<broadcast>", self._configuration.get_broadcast_port()),
                 )
 
                 try:
-                    data, addr = self._broadcast_socket.recvfrom(1024)
+                    data, addr = self._broadcast_socket.recvfrom(self._mtu)
                     print(data)
+                    data = self._reassembler.add(data, addr)
                 except:
                     pass
                 else:
-                    response = Message.initFromJSON(data)
+                    if data is None:
+                        continue
+
+                    response = Message.initFromBytes(data)
                     response.decode()
 
                     if response.header == "View: Join Response":
-                        response = JoinResponse.initFromJSON(data)
+                        response = JoinResponse.initFromBytes(data)
                         response.decode()
 
                         if response.response == "processing":
@@ -57,21 +70,40 @@ class ServerDiscovery:
                             raise RuntimeError("server id is already assigned.")
 
             # wait till receiving at least one waiting message
-            timer = threading.Timer(self._configuration.get_discovery_total_timeout(), timeout_handler)
-            timer.start()
+            timer = call_later(self._configuration.get_discovery_total_timeout(), timeout_handler)
 
+            snapshots = []
             while True:
-                data = unicast_channel.consume()
-                if data == None:
+                envelope = unicast_channel.consume()
+                if envelope == None:
                     break 
 
-                msg = Message.initFromJSON(data)
-                msg.decode()
-
-                if msg.header == "View: Join Response":
-                    msg = JoinResponse.initFromJSON(data)
+                if envelope.header == "View: Join Snapshot":
+                    snapshots.append(self._decode_snapshot(envelope))
+                elif envelope.header == "View: Join Response":
+                    msg = JoinResponse.initFromEnvelope(envelope)
                     msg.decode()
 
                     if msg.response == "waiting":
                         timer.cancel()
-                        return
+                        if not self._configuration.get_state_transfer_enabled():
+                            return None
+                        return self._wait_for_snapshots(group_view, signature, unicast_channel, snapshots)
+
+    def _decode_snapshot(self, envelope):
+        snapshot = JoinSnapshot.initFromEnvelope(envelope)
+        snapshot.decode()
+        return snapshot
+
+    def _wait_for_snapshots(self, group_view, signature, unicast_channel, snapshots):
+        # the snapshots of all servers are awaited, but f+1 matching snapshots suffice after the timeout
+        deadline = time.monotonic() + self._configuration.get_state_transfer_timeout()
+        while True:
+            state, complete = StateTransfer.select(snapshots, group_view, signature)
+            remaining = deadline - time.monotonic()
+            if complete or remaining <= 0:
+                return state
+
+            for envelope in unicast_channel.consume_many(64, timeout=remaining):
+                if envelope is not None and envelope.header == "View: Join Snapshot":
+                    snapshots.append(self._decode_snapshot(envelope))
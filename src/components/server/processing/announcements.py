@@ -3,6 +3,7 @@ import base64
 from nacl.signing import VerifyKey
 
 from src.components.server.processing.client_requests import ClientRequestsProcessing
+from src.components.server.state_transfer import StateTransfer
 from src.core.election.election import Election
 from src.protocol.consensus.suspect import GroupViewSuspect
 from src.core.signatures.signatures import Signatures
@@ -14,6 +15,7 @@ from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
 from src.core.broadcast.broadcast_listener import BroadcastListener
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.core.unicast.sender import UnicastSender
 from src.core.consensus.phase_king import PhaseKing
 from src.protocol.election.announcement import ElectionAnnouncement
@@ -30,6 +32,7 @@ class AnnouncementProcessing:
         phase_king: PhaseKing,
         group_view: GroupView,
         configuration: Configuration,
+        state_transfer: StateTransfer = None,
     ):
         self._channel = announcement_channel
         self._consensus_channel = consensus_channel
@@ -38,6 +41,7 @@ class AnnouncementProcessing:
         self._phase_king = phase_king
         self._group_view = group_view
         self._configuration = configuration
+        self._state_transfer = state_transfer
         self._signature = Signatures(group_view.sk, group_view.identifier)
 
         self._udp_sender = UnicastSender(self._configuration)
@@ -49,27 +53,24 @@ class AnnouncementProcessing:
 
     def consumer(self):
         while True:
-            data = self._channel.consume()
+            envelope = self._channel.consume()
 
-            self._process_request(data)
+            self._process_request(envelope)
 
-    def _process_request(self, data):
-        msg = Message.initFromJSON(data)
-        msg.decode()
-
-        if "View: Join Message" == msg.header:
-            self._process_join(data)
-        elif "Election: Announcement" == msg.header:
+    def _process_request(self, envelope: Envelope):
+        if "View: Join Message" == envelope.header:
+            self._process_join(envelope)
+        elif "Election: Announcement" == envelope.header:
             self._process_election()
-        elif "Client: Join Message" == msg.header:
-            self._process_client_init(data)
+        elif "Client: Join Message" == envelope.header:
+            self._process_client_init(envelope)
         
 
-    def _process_join(self, data):
-        join_msg = JoinMsg.initFromJSON(data)
+    def _process_join(self, envelope: Envelope):
+        join_msg = JoinMsg.initFromEnvelope(envelope)
         join_msg.decode()
 
-        join_request = JoinRequest.initFromJSON(join_msg.request)
+        join_request = JoinRequest.initFromBytes(join_msg.request)
         join_request.decode()
 
         # run phaseking algorithm on shortened data
@@ -93,6 +94,9 @@ class AnnouncementProcessing:
             self._group_view.suspend_server(join_request.identifier)
             return
 
+        if self._state_transfer is not None:
+            self._state_transfer.send_snapshot(join_request.identifier, (data[2], int(data[3])))
+
         # notify the new server that we halted further delivery and sending
         response = JoinResponse.initFromData("waiting")
         success = self._udp_sender.send_udp_sync(response, (data[2], int(data[3])))
@@ -112,11 +116,11 @@ class AnnouncementProcessing:
         if consented_value == "election":
             self._election.election()
 
-    def _process_client_init(self, data):
-        init_msg = TOInitMsg.initFromJSON(data)
+    def _process_client_init(self, envelope: Envelope):
+        init_msg = TOInitMsg.initFromEnvelope(envelope)
         init_msg.decode()
 
-        msg = InitMessage.initFromJSON(init_msg.request)
+        msg = InitMessage.initFromBytes(init_msg.request)
         msg.decode()
 
         pk_string = base64.b64encode(msg.pk.encode()).decode("ascii")
@@ -1,4 +1,5 @@
 import threading
+import base64
 import random
 import string
 
@@ -9,9 +10,12 @@ from src.core.multicast.co_reliable_multicast import CausalOrderedReliableMultic
 from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.protocol.client.read.heartbeat import *
 from src.protocol.client.read.messages import *
 from src.core.unicast.sender import UnicastSender
+from src.core.engine.engine import TransportEngine
+from src.core.multicast.gaps import requested_seqnos
 from src.protocol.multicast.piggyback import PiggybackMessage
 from src.core.consensus.phase_king import PhaseKing
 from src.protocol.client.write.initial import *
@@ -25,6 +29,7 @@ class ClientRequestsProcessing:
         to_multicast : TotalOrderedReliableMulticast,
         group_view: GroupView,
         configuration: Configuration,
+        engine: TransportEngine = None,
     ):
         self._channel = client_channel
         self._client_write_multicast = client_write_multicast
@@ -33,30 +38,28 @@ class ClientRequestsProcessing:
         self._configuration = configuration
 
         self._responder = UnicastSender(self._configuration)
+        self._engine = engine
 
     def start(self):
         consumer_thread = threading.Thread(target=self.consumer)
         consumer_thread.start()
-        self._responder.start()
+        self._responder.start(self._engine)
 
     def consumer(self):
         while True:
-            data = self._channel.consume()
-            self._process_request(data)
-
-    def _process_request(self, data):
-        msg = Message.initFromJSON(data)
-        msg.decode()
-
-        if msg.header == "Query: Heartbeat":
-            self._handle_query_heartbeat(data)
-        elif msg.header == "Query: Messages":
-            self._handle_query_messages(data)
-        elif msg.header == "Write: Initial":
-            self._handle_init_message(data)
-
-    def _handle_query_heartbeat(self, data):
-        msg = HeartbeatQuery.initFromJSON(data)
+            for envelope in self._channel.consume_many(self._configuration.get_receive_batch_limit()):
+                self._process_request(envelope)
+
+    def _process_request(self, envelope: Envelope):
+        if envelope.header == "Query: Heartbeat":
+            self._handle_query_heartbeat(envelope)
+        elif envelope.header == "Query: Messages":
+            self._handle_query_messages(envelope)
+        elif envelope.header == "Write: Initial":
+            self._handle_init_message(envelope)
+
+    def _handle_query_heartbeat(self, envelope: Envelope):
+        msg = HeartbeatQuery.initFromEnvelope(envelope)
         msg.decode()
 
         seqno_vector = {}
@@ -69,22 +72,21 @@ class ClientRequestsProcessing:
         )
         self._responder.send_udp_without_ack(response_msg, msg.get_sender())
 
-    def _handle_query_messages(self, data):
-        msg = MessageQuery.initFromJSON(data)
+    def _handle_query_messages(self, envelope: Envelope):
+        msg = MessageQuery.initFromEnvelope(envelope)
         msg.decode()
 
         for identifier in msg.nacks:
             if identifier in self._client_write_multicast._storage:
-                for seqno in msg.nacks[identifier]:
-                    if seqno >= len(self._client_write_multicast._storage[identifier]):
-                        break
-
-                    response = Message.initFromJSON(self._client_write_multicast._storage[identifier][seqno])
-                    response.decode()
-                    self._responder.send_udp_without_ack(response, msg.get_sender())
-
-    def _handle_init_message(self, data):
-        msg = InitMessage.initFromJSON(data)
+                store = self._client_write_multicast._storage[identifier]
+                for seqno in requested_seqnos(msg.nacks[identifier], len(store)):
+                    # stored messages are already encoded and signed, evicted messages are skipped
+                    data = store.get(seqno)
+                    if data is not None:
+                        self._responder.send_udp_raw(data, msg.get_sender())
+
+    def _handle_init_message(self, envelope: Envelope):
+        msg = InitMessage.initFromEnvelope(envelope)
         msg.decode()
 
         if msg.identifier in self._group_view.users and self._group_view.users[msg.identifier] == msg.pk:
@@ -94,7 +96,10 @@ class ClientRequestsProcessing:
             response_msg = InitResponse.initFromData("fail: user already exists with different pk")
             self._responder.send_udp(response_msg, msg.get_sender())
         else:
-            init_msg = TOInitMsg.initFromData(data)
+            # the sender address is required by _posthook_client_init to respond to the client
+            msg.set_sender(envelope.sender)
+            msg.encode()
+            init_msg = TOInitMsg.initFromData(msg.raw_data)
             init_msg.encode()
 
             to_init_msg = TotalOrderMessage.initFromMessage(init_msg, "INIT#{}".format(msg.identifier))
@@ -102,21 +107,26 @@ class ClientRequestsProcessing:
             self._to_multicast.send(to_init_msg)
 
     def _posthook_client_init(self, data, consistent_pk, quite=False):
-        msg = InitMessage.initFromJSON(data)
+        msg = InitMessage.initFromBytes(data)
         msg.decode()
 
         if msg.identifier not in self._group_view.users:
             # update message in storage
-            self._group_view.users[msg.identifier] = VerifyKey(base64.b64decode(consistent_pk))
+            self._group_view.add_user(msg.identifier, VerifyKey(base64.b64decode(consistent_pk)))
             msg.pk = self._group_view.users[msg.identifier]
             msg.encode()
             if msg.identifier not in self._client_write_multicast._storage:
-                self._client_write_multicast._storage[msg.identifier] = [msg.json_data]
+                self._client_write_multicast._storage[msg.identifier] = self._client_write_multicast.create_store(
+                    msg.identifier
+                )
+                self._client_write_multicast._storage[msg.identifier].append(msg.raw_data)
+                self._client_write_multicast._log_message(msg.identifier, 0, msg.raw_data)
                 self._client_write_multicast._R_g[msg.identifier] = -1
                 self._client_write_multicast._holdback_queue[msg.identifier] = {}
                 self._client_write_multicast._requested_messages[msg.identifier] = [0, -1]
             else:    
-                self._client_write_multicast._storage[msg.identifier][0] = msg.json_data
+                self._client_write_multicast._storage[msg.identifier].replace(0, msg.raw_data)
+                self._client_write_multicast._log_message(msg.identifier, 0, msg.raw_data, replace=True)
 
             print("\n", "Client: Join", msg.identifier, "\n")
 
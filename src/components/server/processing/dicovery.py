@@ -10,7 +10,9 @@ from src.core.group_view.group_view import GroupView
 from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.core.unicast.sender import UnicastSender
+from src.core.engine.engine import TransportEngine
 from src.protocol.multicast.to_message import TotalOrderMessage
 from src.protocol.election.announcement import ElectionAnnouncement
 
@@ -24,6 +26,7 @@ class DiscoveryProcessing:
         announcement_multicast: TotalOrderedReliableMulticast,
         db_multicast: CausalOrderedReliableMulticast,
         configuration: Configuration,
+        engine: TransportEngine = None,
     ):
         self._channel = discovery_channel
         self._discovery_listener = discovery_listener
@@ -31,6 +34,7 @@ class DiscoveryProcessing:
         self._announcement_multicast = announcement_multicast
         self._db_multicast = db_multicast
         self._configuration = configuration
+        self._engine = engine
 
         self._pending = {}
 
@@ -53,29 +57,26 @@ class DiscoveryProcessing:
 
         self._discovery_listener.start()
         responder = UnicastSender(self._configuration)
-        responder.start()
+        responder.start(self._engine)
         while True:
-            data, addr = self._channel.consume()
+            envelope = self._channel.consume()
 
-            response_msg = self._process_request(data)
+            response_msg = self._process_request(envelope)
 
             if response_msg is not None:
                 nonce = "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(10))
-                responder.send_udp(response_msg, addr, nonce)
-
-    def _process_request(self, data):
-        msg = Message.initFromJSON(data)
-        msg.decode()
+                responder.send_udp(response_msg, envelope.sender, nonce)
 
+    def _process_request(self, envelope: Envelope):
         response_msg = None
 
-        if msg.header == "View: Join Request":
-            response_msg = self._process_join_request(data)
+        if envelope.header == "View: Join Request":
+            response_msg = self._process_join_request(envelope)
 
         return response_msg
 
-    def _process_join_request(self, data):
-        join_msg = JoinRequest.initFromJSON(data)
+    def _process_join_request(self, envelope: Envelope):
+        join_msg = JoinRequest.initFromEnvelope(envelope)
         join_msg.decode()
 
         if join_msg.identifier not in self._group_view.servers:
@@ -84,7 +85,7 @@ class DiscoveryProcessing:
 
                 self._pending[join_msg.identifier] = join_msg.pk
 
-                forwarded_join_msg = JoinMsg.initFromData(data)
+                forwarded_join_msg = JoinMsg.initFromData(envelope.raw_data)
                 forwarded_join_msg.encode()
                 to_join_msg = TotalOrderMessage.initFromMessage(forwarded_join_msg, join_msg.identifier)
                 to_join_msg.encode()
@@ -11,6 +11,7 @@ from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
 from src.core.broadcast.broadcast_listener import BroadcastListener
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.core.unicast.sender import UnicastSender
 from src.core.consensus.phase_king import PhaseKing
 from src.core.election.election import Election
@@ -46,29 +47,26 @@ class JoinProcessing:
     def consumer(self):
         finished = False 
         while not finished:
-            data = self._channel.consume()
-            finished = self._process_request(data)
+            envelope = self._channel.consume()
+            finished = self._process_request(envelope)
 
         self._group_view.flag_ready_to_join()
 
-    def _process_request(self, data):
-        msg = Message.initFromJSON(data)
-        msg.decode()
-
-        if "View: Join Message" == msg.header:
-            return self._process_join(data)
-        elif "Election: Announcement" == msg.header:
+    def _process_request(self, envelope: Envelope):
+        if "View: Join Message" == envelope.header:
+            return self._process_join(envelope)
+        elif "Election: Announcement" == envelope.header:
             self._process_election()
-        elif "Client: Join Message" == msg.header:
-            self._process_client_init(data)
+        elif "Client: Join Message" == envelope.header:
+            self._process_client_init(envelope)
 
         return False
 
-    def _process_join(self, data):
-        join_msg = JoinMsg.initFromJSON(data)
+    def _process_join(self, envelope: Envelope):
+        join_msg = JoinMsg.initFromEnvelope(envelope)
         join_msg.decode()
 
-        join_request = JoinRequest.initFromJSON(join_msg.request)
+        join_request = JoinRequest.initFromBytes(join_msg.request)
         join_request.decode()
 
         # run phaseking algorithm on shortened data
@@ -107,11 +105,11 @@ class JoinProcessing:
         if consented_value == "election":
             self._election.election()
 
-    def _process_client_init(self, data):
-        init_msg = TOInitMsg.initFromJSON(data)
+    def _process_client_init(self, envelope: Envelope):
+        init_msg = TOInitMsg.initFromEnvelope(envelope)
         init_msg.decode()
 
-        msg = InitMessage.initFromJSON(init_msg.request)
+        msg = InitMessage.initFromBytes(init_msg.request)
         msg.decode()
 
         pk_string = base64.b64encode(msg.pk.encode()).decode("ascii")
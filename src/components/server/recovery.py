@@ -0,0 +1,79 @@
+import os
+import shutil
+import threading
+import time
+
+from src.core.group_view.group_view import GroupView
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.storage.wal import WriteAheadLog
+from src.core.utils.configuration import Configuration
+
+
+class Recovery:
+    """
+    Write-ahead log of a server (see wal.py). The messages stored by all multicast groups and the changes of the
+    group view are logged, and a checkpoint is taken every checkpoint_interval seconds. A restarted server restores
+    its group view and stored messages from the log, and only requests the messages it missed while it was down.
+    """
+
+    def __init__(self, identifier: str, configuration: Configuration, restart: bool = False):
+        directory = os.path.join(configuration.get_recovery_path(), identifier)
+        if not restart:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self._wal = WriteAheadLog(
+            directory, configuration.get_recovery_segment_size(), configuration.get_recovery_sync_interval()
+        )
+        self._checkpoint_interval = configuration.get_checkpoint_interval()
+
+        self._group_view: GroupView = None
+        self._multicasts: dict[int, ReliableMulticast] = {}
+
+        self._checkpoint = {}
+        self._messages: dict[int, list[tuple[str, int, bytes]]] = {}
+
+    def load(self):
+        """Reads the log of the crashed server, returns its last group view (as dict) or None without a log"""
+        checkpoint, messages, views = self._wal.recover()
+        self._checkpoint = checkpoint if checkpoint is not None else {}
+        for port, sender, seqno, data in messages:
+            self._messages.setdefault(port, []).append((sender, seqno, data))
+
+        if len(views) > 0:
+            return views[-1]
+        return self._checkpoint.get("view")
+
+    def attach(self, port: int, multicast: ReliableMulticast):
+        # called before the multicast is started
+        if len(self._messages) > 0 or len(self._checkpoint) > 0:
+            multicast.restore(self._messages.pop(port, []), self._checkpoint.get("groups", {}).get(str(port), {}))
+        multicast.attach_log(self._wal)
+        self._multicasts[port] = multicast
+
+    def start(self, group_view: GroupView):
+        self._group_view = group_view
+        self._group_view.set_change_handler(self._log_view)
+        self._log_view(self._group_view)
+
+        checkpoint_thread = threading.Thread(target=self._checkpointing)
+        checkpoint_thread.start()
+
+    def _log_view(self, group_view: GroupView):
+        self._wal.append_view(group_view.to_dict())
+
+    def _checkpointing(self):
+        while True:
+            time.sleep(self._checkpoint_interval)
+            self._wal.checkpoint(self._get_state)
+
+    def _get_state(self):
+        state = {
+            "view": self._group_view.to_dict(),
+            "groups": {str(port): multicast.get_checkpoint() for port, multicast in self._multicasts.items()},
+        }
+        first_seqnos = {
+            (port, identifier): seqno
+            for port, multicast in self._multicasts.items()
+            for identifier, seqno in multicast.get_first_seqnos().items()
+        }
+        return state, first_seqnos
@@ -14,32 +14,68 @@ from src.core.group_view.group_view import GroupView
 from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
 from src.core.broadcast.broadcast_listener import BroadcastListener
+from src.core.engine.engine import TransportEngine
+from src.core.utils.timer_wheel import call_later
 from src.components.server.processing.client_requests import ClientRequestsProcessing
 from src.components.server.processing.announcements import AnnouncementProcessing
 from src.components.server.processing.joining import JoinProcessing
+from src.components.server.recovery import Recovery
+from src.components.server.state_transfer import StateTransfer
 from src.protocol.ping.ping import PingMessage
+from src.protocol.codec import set_codec
 
 
 class Server:
-    def __init__(self, initial=False, i=0, verbose=False):
+    def __init__(self, initial=False, i=0, verbose=False, restart=None):
+        # restart: identifier of a crashed server, which is restored from its write-ahead log
         self.__verbose = verbose
         self._client_channel = Channel()
         self._announcement_channel = Channel()
         self._consensus_channel = Channel()
         self._discovery_channel = Channel()
         self._configuration = Configuration()
+        set_codec(self._configuration.get_codec())
 
-        if initial:
+        # sockets and periodic tasks of all transports are handled by one event loop
+        self._engine = TransportEngine()
+        self._engine.start()
+
+        self._recovery = None
+        # state transferred to this server while joining (see state_transfer.py)
+        self._join_state = None
+        if restart is not None:
+            self._recovery = Recovery(restart, self._configuration, restart=True)
+            view = self._recovery.load()
+            if view is None:
+                raise RuntimeError("no write-ahead log of server {}".format(restart))
+            self._group_view = GroupView.initFromDict(view, verbose=self.__verbose)
+            if self._group_view.check_if_server_is_suspended(self._group_view.identifier):
+                raise RuntimeError("server {} was suspended and has to join again".format(restart))
+
+            # the server resumes as a member of its view
+            initial = True
+            self._signature = Signatures(self._group_view.sk, self._group_view.identifier)
+            self._udp_listener = UDPUnicastListener(
+                self._client_channel,
+                self._configuration,
+                listening_port=self._group_view.get_my_port(),
+                engine=self._engine,
+            )
+            self._udp_listener.start()
+        elif initial:
             self._group_view = GroupView.initFromFile(
                 self._configuration.get_group_view_file(i), verbose=self.__verbose
             )
             self._signature = Signatures(self._group_view.sk, self._group_view.identifier)
             self._udp_listener = UDPUnicastListener(
-                self._client_channel, listening_port=self._group_view.get_my_port()
+                self._client_channel,
+                self._configuration,
+                listening_port=self._group_view.get_my_port(),
+                engine=self._engine,
             )
             self._udp_listener.start()
         else:
-            self._udp_listener = UDPUnicastListener(self._client_channel)
+            self._udp_listener = UDPUnicastListener(self._client_channel, self._configuration, engine=self._engine)
             self._udp_listener.start()
             self._group_view = GroupView.generateOwnData(
                 self._configuration.get_global_group_view_file(),
@@ -48,7 +84,12 @@ class Server:
             )
             self._signature = Signatures(self._group_view.sk, self._group_view.identifier)
             discovery = ServerDiscovery(self._configuration)
-            discovery.discover(self._group_view, self._signature, self._client_channel)
+            self._join_state = discovery.discover(self._group_view, self._signature, self._client_channel)
+            if self._join_state is not None:
+                self._group_view.load_snapshot(self._join_state[0])
+
+        if self._recovery is None and self._configuration.get_recovery_enabled():
+            self._recovery = Recovery(self._group_view.identifier, self._configuration)
 
         # multicast handler for group messages (reliable causal ordered multicast)
         self._client_write_multicast = CausalOrderedReliableMulticast(
@@ -59,7 +100,9 @@ class Server:
             self._group_view,
             self._configuration,
             open=True,
+            engine=self._engine,
         )
+        self._prepare_multicast(self._configuration.get_client_write_multicast_port(), self._client_write_multicast)
         self._client_write_multicast.start()
 
         # open reliable multicast for clients to make queries
@@ -71,7 +114,9 @@ class Server:
             self._group_view,
             self._configuration,
             open=True,
+            engine=self._engine,
         )
+        self._prepare_multicast(self._configuration.get_client_read_multicast_port(), self._client_read_multicast)
         self._client_read_multicast.start()
 
         # multicast handler for consensus (reliable causal ordered multicast)
@@ -82,7 +127,9 @@ class Server:
             self._consensus_channel,
             self._group_view,
             self._configuration,
+            engine=self._engine,
         )
+        self._prepare_multicast(self._configuration.get_consensus_multicast_port(), self._consensus_multicast)
         self._consensus_multicast.start()
         self._phase_king = PhaseKing(
             self._consensus_channel,
@@ -101,7 +148,9 @@ class Server:
             self._group_view,
             self._configuration,
             verbose=self.__verbose,
+            engine=self._engine,
         )
+        self._prepare_multicast(self._configuration.get_announcement_multicast_port(), self._announcement_multicast)
         self._announcement_multicast.start(trash=not initial)
 
         self._client_processing = ClientRequestsProcessing(
@@ -110,8 +159,23 @@ class Server:
             self._announcement_multicast,
             self._group_view,
             self._configuration,
+            engine=self._engine,
         )
 
+        self._state_transfer = None
+        if self._configuration.get_state_transfer_enabled():
+            self._state_transfer = StateTransfer(
+                self._group_view,
+                {
+                    self._configuration.get_client_write_multicast_port(): self._client_write_multicast,
+                    self._configuration.get_client_read_multicast_port(): self._client_read_multicast,
+                    self._configuration.get_consensus_multicast_port(): self._consensus_multicast,
+                    self._configuration.get_announcement_multicast_port(): self._announcement_multicast,
+                },
+                self._announcement_multicast,
+                self._configuration,
+            )
+
         self._announcement_processing = AnnouncementProcessing(
             self._announcement_channel,
             self._consensus_channel,
@@ -120,11 +184,12 @@ class Server:
             self._phase_king,
             self._group_view,
             self._configuration,
+            state_transfer=self._state_transfer,
         )
 
         # broadcast handler for service discovery
         self._discovery_listener = BroadcastListener(
-            self._discovery_channel, self._configuration.get_broadcast_port()
+            self._discovery_channel, self._configuration.get_broadcast_port(), self._configuration, engine=self._engine
         )
 
         self._discovery_processing = DiscoveryProcessing(
@@ -134,9 +199,14 @@ class Server:
             self._announcement_multicast,
             self._client_write_multicast,
             self._configuration,
+            engine=self._engine,
         )
 
-        if not initial:
+        if not initial and self._join_state is not None:
+            self.__debug("Server: Continue with the transferred state as", self._group_view.identifier)
+            self._group_view.flag_ready_to_join()
+            self._group_view.wait_till_I_am_added()
+        elif not initial:
             self.__debug("Server: Start consuming as", self._group_view.identifier)
             join_processing = JoinProcessing(
                 self._announcement_channel,
@@ -149,6 +219,15 @@ class Server:
             join_processing.start()
             self._group_view.wait_till_I_am_added()
 
+        if self._recovery is not None:
+            self._recovery.start(self._group_view)
+
+    def _prepare_multicast(self, port, multicast):
+        if self._join_state is not None:
+            StateTransfer.apply(self._join_state, port, multicast)
+        if self._recovery is not None:
+            self._recovery.attach(port, multicast)
+
     def start(self):
         self._client_processing.start()
         self._announcement_processing.start()
@@ -164,12 +243,6 @@ class Server:
             ts = time.time_ns() / 10**9
             ping_msg = PingMessage.initFromData()
             for server in self._group_view.servers:
-                if (
-                    server in suspected_servers
-                    and ts - suspected_servers[server] > self._configuration.get_timeout()
-                ):
-                    del suspected_servers[server]
-
                 if (
                     not self._group_view.check_if_server_is_inactive(server)
                     and server not in suspected_servers
@@ -183,6 +256,8 @@ class Server:
 
                         self._announcement_multicast.send(suspect_msg)
                         suspected_servers[server] = ts
+                        # the server may be suspected again after the timeout
+                        call_later(self._configuration.get_timeout(), suspected_servers.pop, server, None)
 
                 # self._group_view.wait_for_manager_to_be_elected()
 
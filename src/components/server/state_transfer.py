@@ -0,0 +1,140 @@
+import math
+
+from nacl.signing import VerifyKey
+
+from src.core.group_view.group_view import GroupView
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.multicast.to_reliable_multicast import TotalOrderedReliableMulticast
+from src.core.signatures.signatures import Signatures
+from src.core.unicast.sender import UnicastSender
+from src.core.utils.configuration import Configuration
+from src.protocol.group_view.join import JoinSnapshot
+
+
+class StateTransfer:
+    """
+    State transfer to joining servers. When a join is processed, each server sends a signed snapshot of its group
+    view, its users and the delivered sequence numbers of each multicast group to the joining server. The joining
+    server continues with the state that at least f+1 servers agree on, such that it only receives the messages after
+    the snapshot instead of replaying the history of the announcement group. If no state is vouched for, the joining
+    server replays the history as before (see joining.py).
+    """
+
+    def __init__(
+        self,
+        group_view: GroupView,
+        multicasts: dict[int, ReliableMulticast],
+        announcement_multicast: TotalOrderedReliableMulticast,
+        configuration: Configuration,
+    ):
+        self._group_view = group_view
+        self._multicasts = multicasts
+        self._to_multicast = announcement_multicast
+        self._configuration = configuration
+        self._signature = Signatures(group_view.sk, group_view.identifier)
+
+        self._udp_sender = UnicastSender(self._configuration)
+
+    def send_snapshot(self, identifier: str, addr: tuple[str, int]):
+        cut = self._to_multicast.get_join_cut(identifier)
+        if cut is None:
+            return
+        to_watermark, complete, agreed_seqno = cut
+
+        # the watermark of the announcement group is taken when the join is delivered, since the joining server
+        # receives all subsequent announcements. The other groups are continued from their current state
+        watermarks = {
+            str(port): multicast.get_watermark()
+            for port, multicast in self._multicasts.items()
+            if multicast is not self._to_multicast
+        }
+        for port, multicast in self._multicasts.items():
+            if multicast is self._to_multicast:
+                watermarks[str(port)] = to_watermark
+
+        snapshot = JoinSnapshot.initFromData(
+            identifier, self._group_view.get_snapshot(), watermarks, complete, agreed_seqno
+        )
+        snapshot.encode()
+        snapshot.sign(self._signature)
+
+        # the joining server falls back to replaying the history if snapshots are missing
+        if len(snapshot.raw_data) <= self._configuration.get_max_message_size():
+            self._udp_sender.send_udp_raw(snapshot.raw_data, addr)
+
+    @staticmethod
+    def select(snapshots: list[JoinSnapshot], group_view: GroupView, signature: Signatures):
+        """
+        Returns the state (view, watermarks, agreed seqno) of the snapshots which at least f+1 servers of the view
+        agree on, or None, and whether all servers of the view sent a matching snapshot
+        """
+        matching_snapshots: dict[str, dict[str, JoinSnapshot]] = {}
+        for snapshot in snapshots:
+            if snapshot.identifier != group_view.identifier or not snapshot.complete:
+                continue
+
+            view = snapshot.view
+            signer = snapshot.get_signature()[0]
+            if (
+                signer not in view["servers"]
+                or signer in view["suspended_servers"]
+                or signer in view["joining_servers"]
+            ):
+                continue
+
+            # the keys of the servers known to the joining server must not be replaced
+            pks = {identifier: VerifyKey(bytes(pk)) for identifier, pk in view["pks"].items()}
+            if any(identifier in pks and pks[identifier] != pk for identifier, pk in group_view.pks.items()):
+                continue
+            if not snapshot.verify_signature(signature, pks):
+                continue
+
+            matching_snapshots.setdefault(snapshot.get_digest(), {})[signer] = snapshot
+
+        for matching in matching_snapshots.values():
+            view = next(iter(matching.values())).view
+            active_servers = [
+                server
+                for server in view["servers"]
+                if server not in view["suspended_servers"] and server not in view["joining_servers"]
+            ]
+            f = math.ceil(len(active_servers) / 4) - 1
+            if len(matching) >= f + 1:
+                state = (
+                    view,
+                    StateTransfer._combine_watermarks(matching, view["servers"], group_view.identifier),
+                    max(snapshot.agreed_seqno for snapshot in matching.values()),
+                )
+                return state, len(matching) == len(active_servers)
+
+        return None, False
+
+    @staticmethod
+    def _combine_watermarks(matching: dict[str, JoinSnapshot], servers: list[str], identifier: str):
+        # a server reports its own messages, which are delivered by all servers eventually. Messages of clients are
+        # only skipped if all servers delivered them, since the joining server has to deliver the remaining ones
+        watermarks = {}
+        ports = set(port for snapshot in matching.values() for port in snapshot.watermarks)
+        for port in ports:
+            reported = [snapshot.watermarks.get(port, {}) for snapshot in matching.values()]
+            senders = set(sender for watermark in reported for sender in watermark if sender != identifier)
+
+            watermark = {}
+            for sender in senders:
+                if sender in matching:
+                    watermark[sender] = matching[sender].watermarks.get(port, {}).get(sender, -1)
+                elif sender in servers:
+                    watermark[sender] = max(seqnos.get(sender, -1) for seqnos in reported)
+                else:
+                    watermark[sender] = min(seqnos.get(sender, -1) for seqnos in reported)
+            watermarks[port] = watermark
+
+        return watermarks
+
+    @staticmethod
+    def apply(state, port: int, multicast: ReliableMulticast):
+        # called before the multicast is started
+        _, watermarks, agreed_seqno = state
+        multicast.set_watermark(watermarks.get(str(port), {}))
+        if isinstance(multicast, TotalOrderedReliableMulticast):
+            multicast.set_agreed_seqno(agreed_seqno)
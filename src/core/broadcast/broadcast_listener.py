@@ -1,9 +1,17 @@
 import socket
 import threading 
 
+from src.core.utils.configuration import Configuration
+from src.core.fragmentation.fragmentation import Reassembler
+from src.protocol.envelope import Envelope
+from src.core.engine.engine import TransportEngine
+
 class BroadcastListener:
-    def __init__(self, channel, port):
+    def __init__(self, channel, port, configuration: Configuration, engine: TransportEngine = None):
         self._request_channel = channel
+        self._engine = engine
+        self._mtu = configuration.get_mtu()
+        self._reassembler = Reassembler.initFromConfiguration(configuration)
 
         self.listener = socket.socket(
             socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
@@ -18,12 +26,34 @@ class BroadcastListener:
     def listen(self):
         while True:
             # wait for incoming data
-            data, addr = self.listener.recvfrom(1024)
-            data = data.decode()
+            data, addr = self.listener.recvfrom(self._mtu)
+            self._receive(data, addr)
+
+    def _receive_available(self):
+        # called by the engine if the socket is readable
+        while True:
+            try:
+                data, addr = self.listener.recvfrom(self._mtu, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+            self._receive(data, addr)
+
+    def _receive(self, data, addr):
+        data = self._reassembler.add(data, addr)
+        if data is None:
+            return
+
+        try:
+            envelope = Envelope.initFromBytes(data, addr)
+        except Exception:
+            return
 
-            # write data to channel to be consumed by server
-            self._request_channel.produce((data, addr))
+        # write data to channel to be consumed by server
+        self._request_channel.produce(envelope)
 
     def start(self):
-        listening_thread = threading.Thread(target=self.listen)
-        listening_thread.start()
+        if self._engine is not None:
+            self._engine.add_reader(self.listener, self._receive_available)
+        else:
+            listening_thread = threading.Thread(target=self.listen)
+            listening_thread.start()
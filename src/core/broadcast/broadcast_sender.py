@@ -16,4 +16,4 @@ class BroadcastSender:
         return self.sender.getsockname()[1]
 
     def send(self, message: Message):
-        self.sender.sendto(str(message.json_data).encode(), self.broadcast_group)
+        self.sender.sendto(message.raw_data, self.broadcast_group)
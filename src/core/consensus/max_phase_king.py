@@ -6,6 +6,7 @@ from src.core.utils.configuration import Configuration
 from src.core.group_view.group_view import GroupView
 from src.core.utils.channel import Channel
 from src.protocol.consensus.pk_message import PhaseKingMessage, Message
+from src.protocol.envelope import Envelope
 from src.protocol.consensus.suspect import GroupViewSuspect
 from collections import Counter
 from src.core.consensus.phase_king import PhaseKing
@@ -19,8 +20,10 @@ class MaxPhaseKing:
         group_view: GroupView,
         configuration: Configuration,
         verbose=False,
+        watch=None,
     ):
         self._response_channel = response_channel
+        self._watch = watch  # watch(topic, delay) schedules check_timeout for topic
         self._to_holdback_queue = to_holdback_queue
         self._group_view = group_view
         self._configuration = configuration
@@ -46,19 +49,20 @@ class MaxPhaseKing:
             self._list_of_kings[msg_id] = []
         else:
             return
+        self.__watch(msg_id, self._configuration.get_timeout())
 
         pk_message = PhaseKingMessage.initFromData(initial_value, 0, 1, msg_id)
         pk_message.encode()
 
         self.__debug("MaxPhaseKing: Starting {} with initial value {}".format(msg_id, initial_value))
-        self._response_channel.produce((pk_message.json_data, False), trash=True)
+        self._response_channel.produce((pk_message, False), trash=True)
 
     def reset(self):
         self._pk_storage = {}
         self._list_of_kings = {}
 
-    def process_pk_message(self, data):
-        pk_message = PhaseKingMessage.initFromJSON(data)
+    def process_pk_message(self, envelope: Envelope):
+        pk_message = PhaseKingMessage.initFromEnvelope(envelope)
         pk_message.decode()
 
         sender_id, _ = pk_message.get_signature()
@@ -73,32 +77,42 @@ class MaxPhaseKing:
             self.__send_suspect_message(sender_id, pk_message.topic, 0)
         return False
 
-    def check_timeouts(self, halting_servers, send):
+    def check_timeout(self, topic: str, halting_servers, send):
+        # returns the delay until the execution has to be checked again, None if it is finished
         timeout = self._configuration.get_timeout()
         ts = time.time_ns() / 10 ** 9
-        for topic in self._pk_storage:
-            if len(self._pk_storage[topic]) == 6:
-                if ts - self._pk_storage[topic][4] > timeout:
-                    if self._pk_storage[topic][0][1] == 1:
-                        # round 1, suspect all servers that did not answer yet
-                        for server in self._group_view.servers:
-                            if (
-                                not self._group_view.check_if_server_is_inactive(server)
-                                and server not in self._pk_storage[topic][1]
-                                and server not in halting_servers
-                            ):
-                                self.__debug("MaxPhaseKing: Suspecting {} in Round 1".format(server))
-                                suspect_msg = GroupViewSuspect.initFromData(server, "PK-1: {}".format(topic))
-                                suspect_msg.encode()
-                                send(suspect_msg)
-                    else:
-                        # round 2, suspect phase king
-                        phase_king = self._pk_storage[topic][5]
-                        if phase_king != "" and phase_king not in halting_servers:
-                            self.__debug("MaxPhaseKing: Suspecting {} in Round 2".format(phase_king))
-                            suspect_msg = GroupViewSuspect.initFromData(phase_king, "PK-2: {}".format(topic))
-                            suspect_msg.encode()
-                            send(suspect_msg)
+        entry = self._pk_storage.get(topic)
+        if entry is None:
+            return None
+
+        if ts - entry[4] <= timeout:
+            return entry[4] + timeout - ts
+
+        if entry[0][1] == 1:
+            # round 1, suspect all servers that did not answer yet
+            for server in self._group_view.servers:
+                if (
+                    not self._group_view.check_if_server_is_inactive(server)
+                    and server not in entry[1]
+                    and server not in halting_servers
+                ):
+                    self.__debug("MaxPhaseKing: Suspecting {} in Round 1".format(server))
+                    suspect_msg = GroupViewSuspect.initFromData(server, "PK-1: {}".format(topic))
+                    suspect_msg.encode()
+                    send(suspect_msg)
+        else:
+            # round 2, suspect phase king
+            phase_king = entry[5]
+            if phase_king != "" and phase_king not in halting_servers:
+                self.__debug("MaxPhaseKing: Suspecting {} in Round 2".format(phase_king))
+                suspect_msg = GroupViewSuspect.initFromData(phase_king, "PK-2: {}".format(topic))
+                suspect_msg.encode()
+                send(suspect_msg)
+        return 5 * self._configuration.get_heartbeat_interval()
+
+    def __watch(self, topic: str, delay: float):
+        if self._watch is not None:
+            self._watch(topic, delay)
 
     def handle_round1_suspension(self, identifier : str):
         for topic in self._pk_storage:
@@ -121,12 +135,14 @@ class MaxPhaseKing:
 
                     pk_message = PhaseKingMessage.initFromData(tiebreaker, self._pk_storage[topic][0][0], 2, topic)
                     pk_message.encode()
-                    self._response_channel.produce((pk_message.json_data, False), trash=True)
+                    self._response_channel.produce((pk_message, False), trash=True)
 
     def _process_round1_message(self, value: int, phase: int, topic: str, sender_id: str):
         if topic not in self._pk_storage:
             if phase == 0:
                 self._pk_storage[topic] = [(0, 1), {sender_id: value}, -1, -1, -1, ""]
+                # the execution has not been started locally yet, hence it is already overdue
+                self.__watch(topic, 5 * self._configuration.get_heartbeat_interval())
         else:
             if (phase, 1) == self._pk_storage[topic][0]:
                 self._pk_storage[topic][1][sender_id] = value
@@ -156,7 +172,7 @@ class MaxPhaseKing:
                 tiebreaker = math.ceil(np.median(list(self._pk_storage[topic][1].values())))
                 pk_message = PhaseKingMessage.initFromData(tiebreaker, phase, 2, topic)
                 pk_message.encode()
-                self._response_channel.produce((pk_message.json_data, False), trash=True)
+                self._response_channel.produce((pk_message, False), trash=True)
 
     def _process_round2_message(self, tiebreaker: int, phase: int, topic: str, sender_id: str):
         if (
@@ -189,7 +205,7 @@ class MaxPhaseKing:
             self._pk_storage[topic] = [(phase + 1, 1), {}, -1, -1, ts, self._pk_storage[topic][5]]
             pk_message = PhaseKingMessage.initFromData(value, phase + 1, 1, topic)
             pk_message.encode()
-            self._response_channel.produce((pk_message.json_data, False), trash=True)
+            self._response_channel.produce((pk_message, False), trash=True)
         else:
             self.__debug("MaxPhaseKing [{}]: Result {}".format(topic, value))
             del self._list_of_kings[topic]
@@ -210,7 +226,7 @@ class MaxPhaseKing:
         suspect_msg = GroupViewSuspect.initFromData(identifier, "PK-{}: {}".format(round, topic))
         suspect_msg.encode()
 
-        self._response_channel.produce((suspect_msg.json_data, False), trash=True)
+        self._response_channel.produce((suspect_msg, False), trash=True)
 
     def __debug(self, *msgs):
         if self.__verbose:
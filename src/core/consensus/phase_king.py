@@ -1,15 +1,23 @@
-import threading
 import math
 
 from src.core.utils.configuration import Configuration
 from src.core.group_view.group_view import GroupView
 from src.core.utils.channel import Channel
+from src.core.utils.timer_wheel import call_later
 from src.core.multicast.co_reliable_multicast import CausalOrderedReliableMulticast
 from src.protocol.consensus.pk_message import PhaseKingMessage, Message
 from src.protocol.consensus.suspect import GroupViewSuspect
+from src.protocol.envelope import Envelope
 from collections import Counter
 
 
+class _Timeout:
+    """
+    Produced to the consensus channel by the timer of a round. Sending may block while a server joins, hence the
+    suspect messages are sent by the consensus thread instead of the timer wheel
+    """
+
+
 class PhaseKing:
     def __init__(
         self,
@@ -53,6 +61,10 @@ class PhaseKing:
             N = self._group_view.get_number_of_unsuspended_servers()
             f = math.ceil(N / 4) - 1
 
+        # a topic is used for a single consensus
+        if self._topic != "":
+            self._channel.remove_topic(self._topic)
+
         return value
 
     """
@@ -65,7 +77,6 @@ class PhaseKing:
     def _round1(self, value: str, phase: int):
         # on timeout, send suspect message for all servers that did not respond
         def timeout_handler(sender_ids):
-            self._channel.produce(None, topic=self._topic)
             for server_id in self._group_view.servers:
                 if server_id not in sender_ids and not self._group_view.check_if_server_is_inactive(
                     server_id
@@ -77,8 +88,6 @@ class PhaseKing:
 
                     self._multicast.send(suspect_msg)
 
-
-
         self.__debug(
             'PhaseKing ({}Phase {} - Round 1): Initial value "{}"'.format(
                 (self._topic + "; ") if self._topic != "" else "", phase, value
@@ -100,26 +109,25 @@ class PhaseKing:
         suspected_servers = {}
 
         # start timer for crash fault detection
+        timeout = _Timeout()
         if self._multicast is not None:
-            timer = threading.Timer(self._configuration.get_timeout(), timeout_handler, args=(sender_ids,))
-            timer.start()
+            timer = call_later(self._configuration.get_timeout(), self._channel.produce, timeout, self._topic)
 
         i = 0
         while i < N:
-            data = self._channel.consume(self._topic)
-
-            if data is not None:
-                message = Message.initFromJSON(data)
-                message.decode()
+            envelope = self._channel.consume(self._topic)
 
-                sender_id, _ = message.get_signature()
+            if envelope is timeout:
+                timeout_handler(sender_ids)
+            elif envelope is not None and not isinstance(envelope, _Timeout):
+                sender_id, _ = envelope.get_signature()
                 if not self._group_view.check_if_server_is_inactive(sender_id):
-                    if message.header == "Phase King: Message":
-                        i = self._handle_round1_phaseking_msg(data, sender_ids, values, phase, i)
+                    if envelope.header == "Phase King: Message":
+                        i = self._handle_round1_phaseking_msg(envelope, sender_ids, values, phase, i)
 
-                    elif message.header == "View: Suspect":
+                    elif envelope.header == "View: Suspect":
                         self._handle_round1_suspect_msg(
-                            data,
+                            envelope,
                             suspected_servers,
                             sender_ids,
                             values,
@@ -155,8 +163,8 @@ class PhaseKing:
 
         return majority_value, majority_count
 
-    def _handle_round1_phaseking_msg(self, data, sender_ids, values, phase, i):
-        pk_message = PhaseKingMessage.initFromJSON(data)
+    def _handle_round1_phaseking_msg(self, envelope: Envelope, sender_ids, values, phase, i):
+        pk_message = PhaseKingMessage.initFromEnvelope(envelope)
         pk_message.decode()
 
         sender_id, _ = pk_message.get_signature()
@@ -168,8 +176,8 @@ class PhaseKing:
 
         return i
 
-    def _handle_round1_suspect_msg(self, data, suspected_servers, sender_ids, values, phase, N):
-        suspect_msg = GroupViewSuspect.initFromJSON(data)
+    def _handle_round1_suspect_msg(self, envelope: Envelope, suspected_servers, sender_ids, values, phase, N):
+        suspect_msg = GroupViewSuspect.initFromEnvelope(envelope)
         suspect_msg.decode()
 
         sender_id, _ = suspect_msg.get_signature()
@@ -239,6 +247,7 @@ class PhaseKing:
             )
 
             timer = None
+            timeout = _Timeout()
             # check if this process is the phase king
             if phase_king == self._group_view.identifier:
                 pk_message = PhaseKingMessage.initFromData(majority_value, phase, 2, self._topic)
@@ -249,24 +258,22 @@ class PhaseKing:
 
             elif self._multicast is not None:
                 # start timer for crash fault detection of phase king
-                timer = threading.Timer(
-                    self._configuration.get_timeout(),
-                    timeout_handler,
-                    args=(phase_king,),
-                )
-                timer.start()
+                timer = call_later(self._configuration.get_timeout(), self._channel.produce, timeout, self._topic)
 
             # wait for phase king message
             while True:
-                data = self._channel.consume(self._topic)
-
-                message = Message.initFromJSON(data)
-                message.decode()
-
-                sender_id, _ = message.get_signature()
+                envelope = self._channel.consume(self._topic)
+                if envelope is timeout:
+                    timeout_handler(phase_king)
+                    continue
+                elif envelope is None or isinstance(envelope, _Timeout):
+                    # timeout of a previous round
+                    continue
+
+                sender_id, _ = envelope.get_signature()
                 if not self._group_view.check_if_server_is_inactive(sender_id):
-                    if message.header == "Phase King: Message":
-                        pk_message = PhaseKingMessage.initFromJSON(data)
+                    if envelope.header == "Phase King: Message":
+                        pk_message = PhaseKingMessage.initFromEnvelope(envelope)
                         pk_message.decode()
                         sender_id, _ = pk_message.get_signature()
 
@@ -274,8 +281,8 @@ class PhaseKing:
                             tiebreaker = pk_message.value
                             break
 
-                    elif message.header == "View: Suspect":
-                        suspect_msg = GroupViewSuspect.initFromJSON(data)
+                    elif envelope.header == "View: Suspect":
+                        suspect_msg = GroupViewSuspect.initFromEnvelope(envelope)
                         suspect_msg.decode()
                         sender_id, _ = suspect_msg.get_signature()
 
@@ -0,0 +1,83 @@
+import asyncio
+import socket
+import threading
+
+
+class ScheduledTask:
+    """Handle of a callback scheduled on the engine, which can be cancelled from any thread"""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TransportEngine:
+    """
+    Event loop shared by the transports of a server. The sockets of all multicast groups and unicast listeners are
+    multiplexed on a single thread, and periodic tasks (heartbeats, retransmissions, timeouts) run as scheduled
+    callbacks instead of one thread each. Received messages are still delivered through channels, hence the
+    processing components are not affected.
+
+    Callbacks run on the loop thread and must not block. Sockets are registered with loop.add_reader instead of a
+    DatagramProtocol, since the readers drain the sockets into preallocated buffers (see BufferPool) and the sockets
+    stay blocking for the threads sending on them.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def in_loop_thread(self):
+        return threading.current_thread() is self._thread
+
+    def _call_soon(self, callback, *args):
+        if self.in_loop_thread():
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def add_reader(self, sock: socket.socket, callback, *args):
+        """callback(*args) is called whenever sock is readable"""
+        self._call_soon(self._loop.add_reader, sock, callback, *args)
+
+    def remove_reader(self, sock: socket.socket):
+        self._call_soon(self._loop.remove_reader, sock)
+
+    def call_later(self, delay: float, callback, *args) -> ScheduledTask:
+        task = ScheduledTask()
+
+        def run():
+            if not task.cancelled:
+                callback(*args)
+
+        self._call_soon(self._loop.call_later, delay, run)
+        return task
+
+    def call_every(self, interval: float, callback, *args) -> ScheduledTask:
+        """callback(*args) is called every interval seconds, starting after the first interval"""
+        task = ScheduledTask()
+
+        def run():
+            if task.cancelled:
+                return
+            try:
+                callback(*args)
+            finally:
+                self._loop.call_later(interval, run)
+
+        self._call_soon(self._loop.call_later, interval, run)
+        return task
@@ -0,0 +1,133 @@
+import random
+import socket
+import struct
+import threading
+import time
+
+from src.core.utils.metrics import Metrics
+
+# Datagrams larger than the MTU are split into fragments:
+#     0x03 | message id (4 bytes) | offset (4 bytes) | total length (4 bytes) | data
+# Smaller datagrams are sent unchanged, their first byte is never 0x03 (see codec.py).
+FORMAT_FRAGMENT = 0x03
+
+_header = struct.Struct(">BIII")
+
+
+class Fragmenter:
+    def __init__(self, mtu: int):
+        self._chunk_size = mtu - _header.size
+        self._mtu = mtu
+        self._message_id = random.getrandbits(32)
+        self._lock = threading.Lock()
+
+    def fragment(self, data: bytes) -> list[bytes]:
+        if len(data) <= self._mtu:
+            return [data]
+
+        with self._lock:
+            message_id = self._message_id
+            self._message_id = (self._message_id + 1) & 0xFFFFFFFF
+
+        view = memoryview(data)
+        fragments = []
+        for offset in range(0, len(data), self._chunk_size):
+            fragment = bytearray(_header.pack(FORMAT_FRAGMENT, message_id, offset, len(data)))
+            fragment += view[offset : offset + self._chunk_size]
+            fragments.append(fragment)
+        return fragments
+
+    def sendto(self, sock: socket.socket, data: bytes, addr: tuple[str, int]):
+        for fragment in self.fragment(data):
+            sock.sendto(fragment, addr)
+
+
+class Reassembler:
+    """
+    Reassembles fragmented datagrams. The buffer of a message is allocated with its total length on arrival of its
+    first fragment, and every fragment is copied to its offset. Partial messages are discarded after the timeout
+    or if the buffered bytes would exceed max_buffer_size.
+    """
+
+    def __init__(self, timeout: float, max_message_size: int, max_buffer_size: int, metrics: Metrics = None):
+        self._timeout = timeout
+        self._max_message_size = max_message_size
+        self._max_buffer_size = max_buffer_size
+        self._metrics = metrics if metrics is not None else Metrics()
+
+        # (addr, message id) -> [buffer, received offsets, received bytes, timestamp of first fragment]
+        self._partial_messages: dict[tuple, list] = {}
+        self._buffer_size = 0
+        self._last_cleanup = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, data: bytes, addr: tuple[str, int]):
+        """Returns the complete message, or None if data is a fragment of an incomplete message"""
+        if len(data) == 0 or data[0] != FORMAT_FRAGMENT:
+            return data
+        if len(data) <= _header.size:
+            return None
+
+        _, message_id, offset, total_length = _header.unpack_from(data)
+        chunk = memoryview(data)[_header.size :]
+        if total_length > self._max_message_size or offset + len(chunk) > total_length:
+            self._metrics.increment("fragments_invalid")
+            return None
+
+        ts = time.time()
+        with self._lock:
+            if ts - self._last_cleanup > self._timeout / 2:
+                self._remove_expired(ts)
+
+            key = (addr, message_id)
+            if key not in self._partial_messages:
+                if self._buffer_size + total_length > self._max_buffer_size:
+                    self._metrics.increment("fragments_dropped")
+                    return None
+
+                self._partial_messages[key] = [bytearray(total_length), set(), 0, ts]
+                self._buffer_size += total_length
+                self._metrics.set_gauge("reassembly_bytes", self._buffer_size)
+
+            partial_message = self._partial_messages[key]
+            buffer, offsets = partial_message[0], partial_message[1]
+            if len(buffer) != total_length or offset in offsets:
+                return None
+
+            buffer[offset : offset + len(chunk)] = chunk
+            offsets.add(offset)
+            partial_message[2] += len(chunk)
+
+            if partial_message[2] < total_length:
+                return None
+
+            del self._partial_messages[key]
+            self._buffer_size -= total_length
+            self._metrics.set_gauge("reassembly_bytes", self._buffer_size)
+            self._metrics.increment("messages_reassembled")
+
+        return bytes(buffer)
+
+    def _remove_expired(self, ts: float):
+        self._last_cleanup = ts
+        expired = [key for key in self._partial_messages if ts - self._partial_messages[key][3] > self._timeout]
+        for key in expired:
+            self._buffer_size -= len(self._partial_messages[key][0])
+            del self._partial_messages[key]
+            self._metrics.increment("reassembly_timeouts")
+
+        if len(expired) > 0:
+            self._metrics.set_gauge("reassembly_bytes", self._buffer_size)
+
+    @classmethod
+    def initFromConfiguration(cls, configuration, metrics: Metrics = None):
+        return cls(
+            configuration.get_fragment_timeout(),
+            configuration.get_max_message_size(),
+            configuration.get_reassembly_buffer_size(),
+            metrics,
+        )
+
+    def get_memory_usage(self):
+        with self._lock:
+            return {"partial_messages": len(self._partial_messages), "buffered_bytes": self._buffer_size}
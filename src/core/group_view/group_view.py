@@ -31,6 +31,16 @@ class GroupView:
         self._manager_election_semaphore = threading.Semaphore(0)
         self._added_semaphore = threading.Semaphore(0)
 
+        # called after each change of the view, e.g. to log it (see recovery.py)
+        self._change_handler = None
+
+    def set_change_handler(self, handler):
+        self._change_handler = handler
+
+    def _changed(self):
+        if self._change_handler is not None:
+            self._change_handler(self)
+
     def check_if_participant(self, id: str):
         return id in self.servers
 
@@ -74,6 +84,7 @@ class GroupView:
         self.__debug("GroupView: Suspend", identifier)
         if identifier in self.servers and identifier not in self.suspended_servers:
             self.suspended_servers.append(identifier)
+            self._changed()
             if identifier == self.identifier:
                 os.system("kill %d" % os.getpid())
             elif identifier == self.manager:
@@ -89,6 +100,7 @@ class GroupView:
     def set_manager(self, manager):
         self.__debug("Update MGR to", manager)
         self.manager = manager
+        self._changed()
         if self.identifier not in self.joining_servers:
             self._manager_election_semaphore.release()
             if manager in self.suspended_servers:
@@ -105,6 +117,7 @@ class GroupView:
         self.servers.remove(identifier)
         del self.ports[identifier]
         del self.pks[identifier]
+        self._changed()
 
     def get_my_pk(self):
         return self.pks[self.identifier]
@@ -127,12 +140,18 @@ class GroupView:
             self.users[identifier] = pk
             self.ip_addrs[identifier] = ip_addr
             self.ports[identifier] = port
+            self._changed()
+
+    def add_user(self, identifier, pk):
+        self.users[identifier] = pk
+        self._changed()
 
     def mark_server_as_joined(self, identifier):
         self.__debug("GroupView: Finished Joining", identifier)
         if identifier in self.joining_servers:
             self.joining_servers.remove(identifier)
             self.servers.sort()
+            self._changed()
 
     def wait_till_ready_to_join(self):
         self._ready_to_join_semaphore.acquire()
@@ -146,6 +165,65 @@ class GroupView:
     def flag_I_am_added(self):
         self._added_semaphore.release()
 
+    def get_snapshot(self):
+        # view and users table transferred to joining servers (see state_transfer.py)
+        return {
+            "manager": self.manager,
+            "servers": list(self.servers),
+            "suspended_servers": list(self.suspended_servers),
+            "joining_servers": list(self.joining_servers),
+            "pks": {identifier: pk.encode() for identifier, pk in list(self.pks.items())},
+            "users": {identifier: pk.encode() for identifier, pk in list(self.users.items())},
+            "ip_addrs": dict(self.ip_addrs),
+            "ports": dict(self.ports),
+        }
+
+    def load_snapshot(self, view):
+        self.manager = view["manager"]
+        self.servers = list(view["servers"])
+        self.suspended_servers = list(view["suspended_servers"])
+        self.joining_servers = list(view["joining_servers"])
+        self.pks = {identifier: VerifyKey(bytes(pk)) for identifier, pk in view["pks"].items()}
+        self.users = {identifier: VerifyKey(bytes(pk)) for identifier, pk in view["users"].items()}
+        self.ip_addrs = dict(view["ip_addrs"])
+        self.ports = dict(view["ports"])
+        self._changed()
+
+    def to_dict(self):
+        return {
+            "id": self.identifier,
+            "sk": base64.b64encode(self.sk.encode()).decode("ascii"),
+            "manager": self.manager,
+            "servers": list(self.servers),
+            "suspended_servers": list(self.suspended_servers),
+            "joining_servers": list(self.joining_servers),
+            "pks": {
+                identifier: base64.b64encode(pk.encode()).decode("ascii") for identifier, pk in list(self.pks.items())
+            },
+            "users": {
+                identifier: base64.b64encode(pk.encode()).decode("ascii") for identifier, pk in list(self.users.items())
+            },
+            "ip_addrs": dict(self.ip_addrs),
+            "ports": dict(self.ports),
+        }
+
+    @classmethod
+    def initFromDict(cls, data, verbose=False):
+        group_view = cls(verbose)
+
+        group_view.identifier = data["id"]
+        group_view.sk = SigningKey(base64.b64decode(data["sk"]))
+        group_view.manager = data["manager"]
+        group_view.servers = list(data["servers"])
+        group_view.suspended_servers = list(data["suspended_servers"])
+        group_view.joining_servers = list(data["joining_servers"])
+        group_view.pks = {identifier: VerifyKey(base64.b64decode(pk)) for identifier, pk in data["pks"].items()}
+        group_view.users = {identifier: VerifyKey(base64.b64decode(pk)) for identifier, pk in data["users"].items()}
+        group_view.ip_addrs = dict(data["ip_addrs"])
+        group_view.ports = dict(data["ports"])
+
+        return group_view
+
     @classmethod
     def initFromFile(cls, file, verbose=False):
         group_view = cls(verbose)
@@ -0,0 +1,32 @@
+class AckVectorEncoder:
+    """
+    Encodes the ack vectors published by one sender as deltas, which only contain the entries that changed. Every
+    full_interval-th vector is published in full.
+
+    If chained, a delta is relative to the previously published vector (piggyback messages, which are delivered in
+    FIFO order). Otherwise it is relative to the last full vector, such that any received delta can be interpreted
+    on its own (heartbeats, which may be lost). Receivers handle full vectors and deltas alike, since delivered
+    sequence numbers only grow, hence the kind of a vector is not sent.
+    """
+
+    def __init__(self, full_interval: int, chained: bool = True):
+        self._full_interval = full_interval
+        self._chained = chained
+
+        self._published: dict[str, int] = {}
+        self._count = 0
+
+    def encode(self, acks: dict[str, int]) -> dict[str, int]:
+        """Returns the vector to be sent"""
+        full = self._count % self._full_interval == 0
+        self._count += 1
+
+        if full:
+            self._published = dict(acks)
+            return self._published
+
+        published = self._published
+        delta = {identifier: seqno for identifier, seqno in acks.items() if published.get(identifier) != seqno}
+        if self._chained:
+            published.update(delta)
+        return delta
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from src.protocol.multicast.piggyback import PiggybackMessage
+
+
+class MessageBatcher:
+    """
+    Collects encoded piggyback messages, which are sent as one signed batch. A batch is flushed if the window has
+    passed since its first message was added, or if it reached max_size bytes or max_messages messages.
+    """
+
+    def __init__(self, window: float, max_size: int, max_messages: int):
+        self._window = window
+        self._max_size = max_size
+        self._max_messages = max_messages
+
+        self._messages: list[PiggybackMessage] = []
+        self._size = 0
+        self._first_ts = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        with self._condition:
+            self._stopped = False
+
+    def stop(self):
+        """Wakes up wait_for_window, which returns immediately until the batcher is started again"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def add(self, pb_message: PiggybackMessage):
+        """Returns True if the batch is full and has to be flushed"""
+        with self._condition:
+            if len(self._messages) == 0:
+                self._first_ts = time.time()
+                self._condition.notify()
+
+            self._messages.append(pb_message)
+            self._size += len(pb_message.raw_data)
+
+            return self._size >= self._max_size or len(self._messages) >= self._max_messages
+
+    def take(self) -> list[PiggybackMessage]:
+        with self._condition:
+            messages = self._messages
+            self._messages = []
+            self._size = 0
+            return messages
+
+    def wait_for_window(self):
+        """Blocks until the window of the current batch has passed, or the batcher is stopped"""
+        with self._condition:
+            while len(self._messages) == 0 and not self._stopped:
+                self._condition.wait()
+
+            remaining = self._first_ts + self._window - time.time()
+            while len(self._messages) > 0 and remaining > 0 and not self._stopped:
+                self._condition.wait(remaining)
+                remaining = self._first_ts + self._window - time.time()
@@ -4,7 +4,9 @@ from src.core.group_view.group_view import GroupView
 from src.core.utils.channel import Channel
 from src.protocol.multicast.piggyback import PiggybackMessage
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.engine.engine import TransportEngine
 
 
 class CausalOrderedReliableMulticast(ReliableMulticast):
@@ -16,63 +18,111 @@ class CausalOrderedReliableMulticast(ReliableMulticast):
         channel: Channel,
         group_view: GroupView,
         configuration: Configuration,
-        open: bool = False
+        open: bool = False,
+        engine: TransportEngine = None,
     ):
-        super().__init__(multicast_addr, multicast_port, identifier, channel, group_view, configuration, open)
-
-        self._co_holdback_queue: list[tuple[dict[str, int], str]] = []
+        super().__init__(
+            multicast_addr, multicast_port, identifier, channel, group_view, configuration, open, engine
+        )
+
+        # held back messages, indexed by the (sender, seqno) they wait for. A message is only checked again when this
+        # dependency is delivered, and then waits for its next missing dependency, if any
+        self._co_holdback_queue: dict[tuple[str, int], list[tuple[dict[str, int], Envelope, str, int]]] = {}
+        self._co_held_back = 0
         self._co_lock = threading.Lock()
         self._CO_R_g: dict[str, int] = {}
 
-    def _deliver(self, data, identifier, seqno):
-        self._update_storage(data, identifier, seqno)
-        self._co_consume(data, identifier, seqno)
+        # with direct dependencies, a message only carries the delivered messages which are not implied by another
+        # delivered message, instead of _CO_R_g. The receivers handle both kinds of vectors alike
+        self._direct_dependencies = self._configuration.get_direct_dependencies(multicast_port)
+        self._CO_dependencies: dict[str, int] = {}
+
+    def restore(self, messages: list[tuple[str, int, bytes]], checkpoint: dict):
+        # the restored messages were delivered before the crash
+        super().restore(messages, checkpoint)
+        self._CO_R_g = dict(self._R_g)
+        if self._direct_dependencies:
+            self._CO_dependencies = dict(self._CO_R_g)
 
-    def _co_deliver(self, data, identifier, seqno):
-        message = Message.initFromJSON(data)
-        message.decode()
-        self._channel.produce(data, message.get_topic())
+    def get_watermark(self) -> dict[str, int]:
+        with self._co_lock:
+            return dict(self._CO_R_g)
 
-    def _co_consume(self, data, identifier, seqno):
-        pb_message = PiggybackMessage.initFromJSON(data)
+    def set_watermark(self, watermark: dict[str, int]):
+        super().set_watermark(watermark)
+        with self._co_lock:
+            for identifier, seqno in watermark.items():
+                if identifier != self._identifier:
+                    self._CO_R_g[identifier] = seqno
+                    if self._direct_dependencies:
+                        self._CO_dependencies[identifier] = max(seqno, self._CO_dependencies.get(identifier, -1))
+
+            # messages waiting for a dependency below the watermark are not woken by its delivery
+            for dependency in list(self._co_holdback_queue.keys()):
+                if dependency[1] <= self._CO_R_g.get(dependency[0], -1):
+                    for entry in self._co_holdback_queue.pop(dependency):
+                        self._co_held_back -= 1
+                        self._co_try_deliver(entry)
+
+    def _deliver(self, envelope: Envelope, identifier, seqno):
+        self._update_storage(envelope, identifier, seqno)
+        self._co_consume(envelope, identifier, seqno)
+
+    def _co_deliver(self, envelope: Envelope, identifier, seqno):
+        self._channel.produce(envelope, envelope.get_topic())
+
+    def _co_consume(self, envelope: Envelope, identifier, seqno):
+        pb_message = PiggybackMessage.initFromEnvelope(envelope)
         pb_message.decode()
 
+        # messages of a sender are consumed in FIFO order. A delta only contains the entries that changed since the
+        # previous message, whose dependencies were satisfied before the message itself was delivered. Hence, the
+        # rebuilt vector is ready to deliver iff the changed entries are (which requires the previous message). Direct
+        # dependencies omit the entries implied by the others, which are satisfied once the others are delivered
         seqno_dict = pb_message.acks.copy()
         seqno_dict[identifier] = seqno - 1
 
         with self._co_lock:
-            if self._check_if_ready_to_deliver(seqno_dict):
-                self._co_deliver(data, identifier, seqno)
-                self._CO_R_g[identifier] = seqno
-                self._check_co_holdback_queue()
-            else:
-                self._co_holdback_queue.append((seqno_dict, data))
-
-    def _check_if_ready_to_deliver(self, seqno_dict):
+            # the decoded vector, identifier and seqno are stored along with the envelope to avoid decoding it again
+            self._co_try_deliver((seqno_dict, envelope, identifier, seqno))
+            self.metrics.set_gauge("co_held_back", self._co_held_back)
+
+    def _get_missing_dependency(self, seqno_dict):
+        # returns the first (sender, seqno) the message depends on which is not delivered yet, None if it is ready
         for identifier in seqno_dict:
             if identifier not in self._CO_R_g:
                 self._CO_R_g[identifier] = -1
             if seqno_dict[identifier] > self._CO_R_g[identifier]:
-                    return False
-
-        return True
-
-    def _check_co_holdback_queue(self):
-        change = True
-        while change:
-            change = False
-            k = 0
-            while k < len(self._co_holdback_queue):
-                (seqno_dict, data) = self._co_holdback_queue[k]
-                if self._check_if_ready_to_deliver(seqno_dict):
-                    pb_message = PiggybackMessage.initFromJSON(data)
-                    pb_message.decode()
-                    self._co_deliver(data, pb_message.identifier, pb_message.seqno)
-                    self._CO_R_g[pb_message.identifier] = pb_message.seqno
-                    self._co_holdback_queue.pop(k)
-                    change = True
-                else:
-                    k += 1
+                return identifier, seqno_dict[identifier]
+
+        return None
+
+    def _co_try_deliver(self, entry: tuple[dict[str, int], Envelope, str, int]):
+        # requires _co_lock. Delivers the message and the held back messages which wait for it
+        ready = [entry]
+        while len(ready) > 0:
+            seqno_dict, envelope, identifier, seqno = ready.pop()
+            dependency = self._get_missing_dependency(seqno_dict)
+            if dependency is not None:
+                self._co_holdback_queue.setdefault(dependency, []).append((seqno_dict, envelope, identifier, seqno))
+                self._co_held_back += 1
+                continue
+
+            self._co_deliver(envelope, identifier, seqno)
+            self._CO_R_g[identifier] = seqno
+            if self._direct_dependencies:
+                self._add_dependency(seqno_dict, identifier, seqno)
+            waiting = self._co_holdback_queue.pop((identifier, seqno), [])
+            self._co_held_back -= len(waiting)
+            ready.extend(reversed(waiting))
+
+    def _add_dependency(self, seqno_dict, identifier, seqno):
+        # requires _co_lock. The delivered message implies its own dependencies (which include the previous message
+        # of its sender), hence they are replaced by the message itself
+        for dependency, dependency_seqno in seqno_dict.items():
+            if dependency in self._CO_dependencies and self._CO_dependencies[dependency] <= dependency_seqno:
+                del self._CO_dependencies[dependency]
+        self._CO_dependencies[identifier] = seqno
 
     def send(self, message: Message, config=False, sign=True):
         if not message.is_decoded:
@@ -81,25 +131,22 @@ class CausalOrderedReliableMulticast(ReliableMulticast):
         if not self._suspend_multicast or config:
             with self._R_g_lock:
                 with self._co_lock:
-                    pb_message = PiggybackMessage.initFromMessage(message, self._identifier, self._S_p, self._CO_R_g)
+                    if self._direct_dependencies:
+                        # the previous message of this sender is implied by FIFO order
+                        acks = {
+                            identifier: seqno
+                            for identifier, seqno in self._CO_dependencies.items()
+                            if identifier != self._identifier
+                        }
+                    else:
+                        acks = self._pb_ack_vector.encode(self._CO_R_g)
+                    pb_message = PiggybackMessage.initFromMessage(message, self._identifier, self._S_p, acks)
                     pb_message.encode()
 
-                if sign:
-                    pb_message.sign(self._signature)
-
-                self._udp_sock.sendto(
-                    pb_message.json_data.encode(), (self._multicast_addr, self._multicast_port)
-                )
-                response = self._deliver(pb_message.json_data, self._identifier, self._S_p)
-                self._check_holdback_queue()
-
-                self._S_p += 1
+                self._multicast_pb_message(pb_message, sign)
 
             if not self._response_channel.is_empty():
-                response, config = self._response_channel.consume()
-                response_msg = Message.initFromJSON(response)
+                response_msg, config = self._response_channel.consume()
                 self.send(response_msg, config)
         else:
-            if not message.is_encoded:
-                message.encode()
-            self._response_channel.produce((message.json_data, False))
+            self._response_channel.produce((message, False))
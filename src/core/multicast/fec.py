@@ -0,0 +1,54 @@
+import threading
+
+from src.core.utils.timer_wheel import call_later
+
+
+class ParityEncoder:
+    """
+    XOR parity of the datagrams sent by a server. Datagrams are grouped until a group has k datagrams or the window
+    since its first datagram has passed. The parity of a group is sent with the sequence numbers and lengths of its
+    datagrams, such that a receiver which lost a single datagram of the group rebuilds it from the others (see
+    recover). At low rates, groups consist of a single datagram, i.e. the parity is a copy of the datagram.
+    """
+
+    def __init__(self, k: int, window: float, send):
+        self._k = k
+        self._window = window
+        self._send = send  # called with the seqno ranges, lengths and parity of a group
+
+        self._seqnos: list[list[int]] = []
+        self._lengths: list[int] = []
+        self._parity = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, data: bytes, first_seqno: int, last_seqno: int):
+        with self._lock:
+            if len(self._seqnos) == 0:
+                self._timer = call_later(self._window, self.flush)
+            self._seqnos.append([first_seqno, last_seqno])
+            self._lengths.append(len(data))
+            self._parity ^= int.from_bytes(data, "little")
+            full = len(self._seqnos) >= self._k
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if len(self._seqnos) == 0:
+                return
+            self._timer.cancel()
+            seqnos, lengths = self._seqnos, self._lengths
+            parity = self._parity.to_bytes(max(lengths), "little")
+            self._seqnos, self._lengths, self._parity = [], [], 0
+
+        self._send(seqnos, lengths, parity)
+
+
+def recover(parity: bytes, datagrams: list[bytes], length: int) -> bytes:
+    """Rebuilds the missing datagram of a group from the parity and the other datagrams of the group"""
+    value = int.from_bytes(parity, "little")
+    for data in datagrams:
+        value ^= int.from_bytes(data, "little")
+    return value.to_bytes(len(parity), "little")[:length]
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+
+from src.core.utils.metrics import Metrics
+from src.core.utils.timer_wheel import call_later
+
+
+class FlowController:
+    """
+    Sender side flow and congestion control of a multicast group. Datagrams are queued and sent in order while the
+    messages which were not delivered by the slowest receiver fit into the window, at the rate of a token bucket.
+    Whenever the window is full, the rate drops to the rate at which the slowest receiver delivered messages since
+    its previous ack; it is doubled (up to max_rate) when acks advance while less than half of the window is in
+    flight. Queued datagrams are sent as soon as acks or tokens are available.
+    """
+
+    def __init__(self, window: int, max_rate: float, min_rate: float, burst: int, send, metrics: Metrics):
+        self._window = window  # in messages
+        self._max_rate = max_rate  # in datagrams per second
+        self._min_rate = min_rate
+        self._burst = burst
+        self._send = send  # called with the datagram and its first and last seqno
+        self.metrics = metrics
+
+        self._queue: deque[tuple[bytes, int, int]] = deque()
+        self._acked = -1  # seqno delivered by the slowest receiver
+        self._acked_ts = time.monotonic()
+        self._ack_rate = 0.0  # messages delivered by the slowest receiver per second
+        self._sent: int = None  # last sent seqno
+        self._rate = max_rate
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._stalled = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def get_sent_seqno(self, default: int):
+        # messages which are queued are not announced to the receivers, since they would request them by NACKs
+        sent = self._sent
+        return default if sent is None else sent
+
+    def submit(self, data: bytes, first_seqno: int, last_seqno: int):
+        with self._lock:
+            self._queue.append((data, first_seqno, last_seqno))
+            self._drain()
+
+    def update(self, acked: int):
+        with self._lock:
+            if acked <= self._acked:
+                return
+            now = time.monotonic()
+            self._ack_rate = (acked - self._acked) / max(now - self._acked_ts, 0.001)
+            self._acked, self._acked_ts = acked, now
+            self._stalled = False
+            if self._in_flight() < self._window // 2:
+                self._rate = min(self._max_rate, 2 * self._rate)
+            self._drain()
+
+    def _in_flight(self):
+        return (self._sent if self._sent is not None else self._acked) - self._acked
+
+    def _refill(self):
+        with self._lock:
+            self._timer = None
+            self._drain()
+
+    def _drain(self):
+        # requires _lock
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+        while len(self._queue) > 0:
+            data, first_seqno, last_seqno = self._queue[0]
+            if last_seqno - self._acked > self._window:
+                if not self._stalled:
+                    self._stalled = True
+                    self._rate = max(self._min_rate, min(self._rate / 2, self._ack_rate))
+                    self.metrics.increment("flow_control_stalls")
+                break
+            if self._tokens < 1:
+                if self._timer is None:
+                    self._timer = call_later((1 - self._tokens) / self._rate, self._refill)
+                    self.metrics.increment("pacing_delays")
+                break
+
+            self._tokens -= 1
+            self._queue.popleft()
+            self._sent = last_seqno
+            self._send(data, first_seqno, last_seqno)
+
+        self.metrics.set_gauge("send_window", self._in_flight())
+        self.metrics.set_gauge("send_queue", len(self._queue))
+        self.metrics.set_gauge("send_rate", self._rate)
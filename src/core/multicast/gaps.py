@@ -0,0 +1,132 @@
+import bisect
+
+# max. number of messages requested by one NACK (or message query), and answered per received NACK
+NACK_LIMIT = 100
+
+
+class IntervalSet:
+    """
+    Set of sequence numbers, stored as sorted and disjoint ranges [start, end]. The held back messages of a sender
+    are tracked as an interval set, such that its missing messages are found in O(number of gaps) instead of
+    O(number of sequence numbers).
+    """
+
+    def __init__(self):
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+
+    def __len__(self):
+        # number of ranges
+        return len(self._starts)
+
+    def __contains__(self, seqno: int):
+        i = bisect.bisect_right(self._starts, seqno) - 1
+        return i >= 0 and seqno <= self._ends[i]
+
+    def add(self, seqno: int):
+        i = bisect.bisect_right(self._starts, seqno) - 1
+        if i >= 0 and seqno <= self._ends[i]:
+            return
+
+        extends_left = i >= 0 and self._ends[i] == seqno - 1
+        extends_right = i + 1 < len(self._starts) and self._starts[i + 1] == seqno + 1
+        if extends_left and extends_right:
+            self._ends[i] = self._ends[i + 1]
+            del self._starts[i + 1]
+            del self._ends[i + 1]
+        elif extends_left:
+            self._ends[i] = seqno
+        elif extends_right:
+            self._starts[i + 1] = seqno
+        else:
+            self._starts.insert(i + 1, seqno)
+            self._ends.insert(i + 1, seqno)
+
+    def discard_up_to(self, seqno: int):
+        """Removes all sequence numbers <= seqno"""
+        i = bisect.bisect_right(self._ends, seqno)
+        del self._starts[:i]
+        del self._ends[:i]
+        if len(self._starts) > 0 and self._starts[0] <= seqno:
+            self._starts[0] = seqno + 1
+
+    def missing(self, start: int, end: int, limit: int = NACK_LIMIT) -> list[list[int]]:
+        """Returns the ranges of [start, end] which are not contained, up to the first limit sequence numbers"""
+        ranges = []
+        i = bisect.bisect_left(self._ends, start)
+        while start <= end and limit > 0:
+            if i == len(self._starts) or self._starts[i] > end:
+                ranges.append([start, min(end, start + limit - 1)])
+                break
+            if self._starts[i] > start:
+                ranges.append([start, min(self._starts[i] - 1, start + limit - 1)])
+                limit -= self._starts[i] - start
+            start = self._ends[i] + 1
+            i += 1
+        return ranges
+
+
+def count(ranges: list[list[int]]):
+    return sum(end - start + 1 for start, end in ranges)
+
+
+def truncate(ranges: list[list[int]], limit: int):
+    """Returns the ranges of the first limit sequence numbers"""
+    truncated = []
+    for start, end in ranges:
+        if limit <= 0:
+            break
+        truncated.append([start, min(end, start + limit - 1)])
+        limit -= end - start + 1
+    return truncated
+
+
+def limit_nacks(nack_messages: dict[str, list[list[int]]]):
+    # at most NACK_LIMIT messages are requested, shared among the senders in proportion to their missing messages
+    total = sum(count(ranges) for ranges in nack_messages.values())
+    if total > NACK_LIMIT:
+        for identifier in nack_messages:
+            nack_messages[identifier] = truncate(
+                nack_messages[identifier], int(NACK_LIMIT * count(nack_messages[identifier]) / total)
+            )
+
+
+def union(ranges: list[list[int]], other: list[list[int]]):
+    merged = []
+    for start, end in sorted(ranges + other):
+        if len(merged) > 0 and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def subtract(ranges: list[list[int]], removed: list[list[int]]):
+    """Returns the ranges without the sequence numbers of removed"""
+    removed = sorted(removed)
+    result = []
+    j = 0
+    for start, end in ranges:
+        while j < len(removed) and removed[j][1] < start:
+            j += 1
+        k = j
+        while start <= end:
+            if k == len(removed) or removed[k][0] > end:
+                result.append([start, end])
+                break
+            if removed[k][0] > start:
+                result.append([start, removed[k][0] - 1])
+            start = max(start, removed[k][1] + 1)
+            k += 1
+    return result
+
+
+def requested_seqnos(ranges: list[list[int]], end: int):
+    """Yields the requested sequence numbers below end, at most NACK_LIMIT"""
+    limit = NACK_LIMIT
+    for start, last in ranges:
+        for seqno in range(max(start, 0), min(last + 1, end)):
+            if limit == 0:
+                return
+            yield seqno
+            limit -= 1
@@ -0,0 +1,63 @@
+import time
+
+from src.core.utils.metrics import Metrics
+
+
+class HeartbeatScheduler:
+    """
+    Decides on every tick (min_interval) whether a multicast sends a heartbeat. Heartbeats are
+    - sent every min_interval within an interval after missing messages were detected, such that the other members
+      learn about the delivered messages of this member early,
+    - skipped while a message was sent within the last interval, since its acks are at most as old as the acks of
+      a heartbeat (and messages of a busy sender are more frequent),
+    - sent every interval while messages are sent or delivered, and otherwise at an interval which doubles with
+      every heartbeat up to max_interval.
+    """
+
+    def __init__(self, interval: float, min_interval: float, max_interval: float, metrics: Metrics):
+        self._interval = interval
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self.metrics = metrics
+
+        self._delay = interval  # of the next heartbeat while idle
+        self._last_heartbeat_ts = time.time()
+        self._last_message_ts = 0.0
+        self._last_gap_ts = 0.0
+
+        # number of delivered messages of other senders, i.e. changes of the acks
+        self._delivered = 0
+        self._delivered_at_heartbeat = 0
+
+    def message_sent(self):
+        self._last_message_ts = time.time()
+
+    def message_delivered(self):
+        self._delivered += 1
+
+    def gap_detected(self):
+        self._last_gap_ts = time.time()
+
+    def due(self) -> bool:
+        now = time.time()
+        gap = now - self._last_gap_ts < self._interval
+        active = self._delivered != self._delivered_at_heartbeat or self._last_message_ts > self._last_heartbeat_ts
+
+        if gap:
+            delay = self._min_interval
+        elif active:
+            delay = self._interval
+        else:
+            delay = self._delay
+        if now - self._last_heartbeat_ts < delay:
+            return False
+
+        self._last_heartbeat_ts = now
+        self._delivered_at_heartbeat = self._delivered
+        self._delay = self._interval if active or gap else min(self._max_interval, 2 * self._delay)
+
+        if not gap and now - self._last_message_ts < self._interval:
+            # the acks were piggybacked by a message
+            self.metrics.increment("heartbeats_suppressed")
+            return False
+        return True
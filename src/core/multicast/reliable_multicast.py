@@ -1,20 +1,55 @@
+import random
 import socket
 import struct
 import threading
 import time
-import select
+import selectors
+from collections import deque
 
 from src.core.utils.configuration import Configuration
 from src.core.signatures.signatures import Signatures
 from src.core.group_view.group_view import GroupView
 from src.core.utils.channel import Channel
+from src.core.utils.metrics import Metrics
+from src.core.utils.buffer_pool import BufferPool
+from src.core.signatures.verification_pool import VerificationPool
+from src.core.multicast.verified_cache import VerifiedMessageCache
+from src.core.fragmentation.fragmentation import Fragmenter, Reassembler
+from src.core.multicast.batching import MessageBatcher
+from src.core.multicast.ack_vector import AckVectorEncoder
+from src.core.multicast.fec import ParityEncoder, recover
+from src.core.multicast.flow_control import FlowController
+from src.core.multicast.heartbeat_scheduler import HeartbeatScheduler
+from src.core.multicast.gaps import (
+    NACK_LIMIT,
+    IntervalSet,
+    count,
+    limit_nacks,
+    requested_seqnos,
+    subtract,
+    truncate,
+    union,
+)
+from src.core.utils.timer_wheel import call_later
+from src.core.engine.engine import TransportEngine
+from src.core.storage.message_store import MessageStore
+from src.core.storage.retention import RetentionPolicy
+from src.core.storage.storage import Storage
+from src.core.storage.wal import WriteAheadLog
 from src.protocol.multicast.piggyback import PiggybackMessage
 from src.protocol.multicast.heartbeat import HeartBeat
 from src.protocol.multicast.nack import NegativeAcknowledgement
+from src.protocol.multicast.batch import BatchMessage
+from src.protocol.multicast.parity import ParityMessage
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 
 
 class ReliableMulticast:
+    # whether received messages may block while being processed. On an engine, they are then processed by the
+    # delivery thread of a verification pool instead of the loop thread
+    _blocking_delivery = False
+
     def __init__(
         self,
         multicast_addr: str,
@@ -24,15 +59,30 @@ class ReliableMulticast:
         group_view: GroupView,
         configuration: Configuration,
         open: bool = False,
+        engine: TransportEngine = None,
     ):
         self._S_p = 0  # local sender sequence number
         self._R_g: dict[str, int] = {identifier: -1}  # delivered sequence numbers
         self._max_R_g: dict[str, int] = {}  # max delivered sequence number registered by heartbeat
 
-        self._holdback_queue: dict[str, dict[int, str]] = {identifier: {}}
-        self._storage: dict[str, list[str]] = {}
+        self._holdback_queue: dict[str, dict[int, Envelope]] = {identifier: {}}
+        self._deliverable: set[str] = set()  # senders whose next message is in the holdback queue
+        self._held_back: dict[str, IntervalSet] = {}  # sequence numbers in the holdback queue
+        self._storage: dict[str, MessageStore] = {}
+        self._peer_acks: dict[str, dict[str, int]] = {}  # delivered sequence numbers of each server
         self._requested_messages: dict[str, tuple[int, int]] = {}
 
+        # NACKs to servers are multicast after a random delay, and suppressed by the NACKs of other servers for the
+        # same messages. The responder multicasts the repair, once per holdoff time
+        self._multicast_repair = configuration.get_repair_multicast()
+        self._nack_delay = configuration.get_nack_delay()
+        self._repair_holdoff = configuration.get_repair_holdoff()
+        self._pending_nacks: dict[tuple[str, tuple], dict[str, list[list[int]]]] = {}  # (responder, addr) -> ranges
+        self._nack_timer = None
+        self._nack_lock = threading.Lock()
+        self._recent_repairs: dict[tuple[str, int], float] = {}
+        self._recent_repairs_queue: deque[tuple[float, tuple[str, int]]] = deque()
+
         self._holdback_queue_lock = threading.Lock()
         self._R_g_lock = threading.Semaphore()
 
@@ -45,6 +95,7 @@ class ReliableMulticast:
         self._group_view = group_view
         self._configuration = configuration
         self._open = open
+        self._engine = engine
 
         if self._group_view is not None:
             self._signature = Signatures(group_view.sk, self._group_view.identifier)
@@ -52,7 +103,90 @@ class ReliableMulticast:
         self._setup_multicast_listener()
         self._setup_udp_sock()
 
-        self._storage = {identifier: []}
+        self.metrics = Metrics()
+
+        self._mtu = self._configuration.get_mtu()
+        self._fragmenter = Fragmenter(self._mtu)
+        self._reassembler = Reassembler.initFromConfiguration(self._configuration, self.metrics)
+        self._buffer_pool = BufferPool.initFromConfiguration(self._configuration, self.metrics)
+        self._receive_batch_limit = self._configuration.get_receive_batch_limit()
+
+        # optional verification stage, which verifies signatures in parallel to the listener
+        self._verification_pool = None
+        workers = self._configuration.get_verification_workers(multicast_port)
+        if workers > 0 or (self._engine is not None and self._blocking_delivery):
+            self._verification_pool = VerificationPool(
+                workers,
+                self._configuration.get_verification_queue_size(),
+                self._verify,
+                self._receive_datagram,
+                self.metrics,
+                drop=self._release_buffer,
+            )
+
+        # optional batching of messages sent within a short window into one signed datagram (only among servers)
+        self._batcher = None
+        if not self._open and self._configuration.get_batching(multicast_port):
+            self._batcher = MessageBatcher(
+                self._configuration.get_batch_window(),
+                self._configuration.get_batch_max_size(),
+                self._configuration.get_batch_max_messages(),
+            )
+
+        # optional forward error correction (only among servers): a parity datagram is sent for every group of
+        # datagrams, see fec.py. NACKs are delayed until the parity of a lost datagram has arrived
+        self._parity_encoder = None
+        self._fec_delay = 0
+        if not self._open and self._configuration.get_fec(multicast_port):
+            self._parity_encoder = ParityEncoder(
+                self._configuration.get_fec_k(), self._configuration.get_fec_window(), self._send_parity
+            )
+            self._fec_delay = 2 * self._configuration.get_fec_window()
+
+        # optional flow control: datagrams are paced and sent within a window of the acks of the slowest receiver
+        # (only among servers), see flow_control.py
+        self._flow_control = None
+        if not self._open and self._configuration.get_flow_control(multicast_port):
+            self._flow_control = FlowController(
+                self._configuration.get_flow_control_window(),
+                self._configuration.get_flow_control_max_rate(),
+                self._configuration.get_flow_control_min_rate(),
+                self._configuration.get_flow_control_burst(),
+                self._transmit,
+                self.metrics,
+            )
+
+        # heartbeats are skipped while messages carry the acks, and sent less often while idle, see
+        # heartbeat_scheduler.py
+        self._heartbeat_interval = self._configuration.get_heartbeat_interval()
+        self._heartbeat_tick_interval = self._heartbeat_interval
+        self._heartbeat_scheduler = None
+        if self._configuration.get_heartbeat_adaptive():
+            self._heartbeat_tick_interval = self._configuration.get_heartbeat_min_interval()
+            self._heartbeat_scheduler = HeartbeatScheduler(
+                self._heartbeat_interval,
+                self._heartbeat_tick_interval,
+                self._configuration.get_heartbeat_max_interval(),
+                self.metrics,
+            )
+        self._last_maintenance_ts = 0
+
+        # ack vectors are sent as deltas, see ack_vector.py
+        self._pb_ack_vector = AckVectorEncoder(self._configuration.get_ack_vector_full_interval())
+        self._heartbeat_ack_vector = AckVectorEncoder(self._configuration.get_heartbeat_full_interval(), chained=False)
+
+        self._verified_cache = None
+        cache_size = self._configuration.get_verified_cache_size()
+        if cache_size > 0:
+            self._verified_cache = VerifiedMessageCache(cache_size, self.metrics)
+
+        # clients keep their stores in memory
+        self._store_factory = Storage()
+        if group_view is not None:
+            self._store_factory = Storage.initFromConfiguration(self._configuration, identifier, self._multicast_port)
+        self._storage = {identifier: self.create_store(identifier)}
+        self._wal: WriteAheadLog = None
+        self._retention = RetentionPolicy.initFromConfiguration(self._configuration, self._multicast_port)
 
         self._timeoffset = time.time_ns() / 10**9
         self._last_msg_sent_ts = 0
@@ -63,6 +197,9 @@ class ReliableMulticast:
         self.terminate = False
         self.listening_thread = None
         self.heartbeat_thread = None
+        self.batching_thread = None
+        self._heartbeat_task = None
+        self._reading_socks = []
 
     def _setup_multicast_listener(self):
         # create listener socket
@@ -92,68 +229,259 @@ class ReliableMulticast:
 
         if not self._suspend_multicast or config:
             with self._R_g_lock:
-                pb_message = PiggybackMessage.initFromMessage(message, self._identifier, self._S_p, self._R_g)
+                acks = self._pb_ack_vector.encode(self._R_g)
+                pb_message = PiggybackMessage.initFromMessage(message, self._identifier, self._S_p, acks)
                 pb_message.encode()
+                self._multicast_pb_message(pb_message, sign)
 
-                if sign:
-                    pb_message.sign(self._signature)
+            if not self._response_channel.is_empty():
+                response_msg, config = self._response_channel.consume()
+                self.send(response_msg, config)
+        else:
+            self._response_channel.produce((message, False))
+
+    def _multicast_pb_message(self, pb_message: PiggybackMessage, sign: bool):
+        # requires _R_g_lock
+        if self._batcher is not None and sign:
+            # the message is sent and delivered with its batch
+            if self._batcher.add(pb_message):
+                self._flush_batch()
+        else:
+            if self._batcher is not None:
+                self._flush_batch()
 
-                self._last_msg_sent_ts = time.time_ns() / 10**9
-                self._udp_sock.sendto(
-                    pb_message.json_data.encode(), (self._multicast_addr, self._multicast_port)
-                )
-                response = self._deliver(pb_message.json_data, self._identifier, self._S_p)
-                self._check_holdback_queue()
+            if sign:
+                pb_message.sign(self._signature)
+            self._add_to_verified_cache(pb_message.raw_data, self._identifier, self._S_p)
+            self._log_message(self._identifier, self._S_p, pb_message.raw_data)
 
-                self._S_p += 1
+            self._last_msg_sent_ts = time.time_ns() / 10**9
+            self._send_datagram(pb_message.raw_data, self._S_p, self._S_p)
+            self._deliver(Envelope.initFromMessage(pb_message), self._identifier, self._S_p)
+            self._check_holdback_queue()
 
-            if not self._response_channel.is_empty():
-                response, config = self._response_channel.consume()
-                response_msg = Message.initFromJSON(response)
-                self.send(response_msg, config)
+        self._S_p += 1
+
+    def _flush_batch(self):
+        # requires _R_g_lock
+        pb_messages = self._batcher.take()
+        if len(pb_messages) == 0:
+            return
+
+        if len(pb_messages) == 1:
+            pb_messages[0].sign(self._signature)
+            batch = pb_messages[0]
         else:
-            if not message.is_encoded:
-                message.encode()
-            self._response_channel.produce((message.json_data, False))
+            batch = BatchMessage.initFromData([pb_message.raw_data for pb_message in pb_messages])
+            batch.sign(self._signature)
+            self.metrics.increment("batches_sent")
+            self.metrics.increment("batched_messages", len(pb_messages))
+        self._add_to_verified_cache(batch.raw_data, self._identifier, pb_messages[-1].seqno)
+        for pb_message in pb_messages:
+            self._log_message(self._identifier, pb_message.seqno, batch.raw_data)
+
+        self._last_msg_sent_ts = time.time_ns() / 10**9
+        self._send_datagram(batch.raw_data, pb_messages[0].seqno, pb_messages[-1].seqno)
+
+        for pb_message in pb_messages:
+            # each message is stored with the signed batch, which is used to answer nacks
+            envelope = Envelope(
+                batch.raw_data,
+                pb_message._payload,
+                None,
+                batch.signature,
+                pb_message.header,
+                pb_message.content,
+                pb_message.meta,
+                None,
+                pb_message._codec,
+            )
+            self._deliver(envelope, self._identifier, pb_message.seqno)
+        self._check_holdback_queue()
+
+    def _batching(self):
+        while not self.terminate:
+            self._batcher.wait_for_window()
+            with self._R_g_lock:
+                self._flush_batch()
+
+        # messages added before stop are still sent
+        with self._R_g_lock:
+            self._flush_batch()
+
+    def _send_datagram(self, data: bytes, first_seqno: int, last_seqno: int):
+        # requires _R_g_lock
+        if self._flow_control is not None:
+            self._flow_control.submit(data, first_seqno, last_seqno)
+        else:
+            self._transmit(data, first_seqno, last_seqno)
+
+    def _transmit(self, data: bytes, first_seqno: int, last_seqno: int):
+        self._fragmenter.sendto(self._udp_sock, data, (self._multicast_addr, self._multicast_port))
+        if self._heartbeat_scheduler is not None:
+            self._heartbeat_scheduler.message_sent()
+        if self._parity_encoder is not None:
+            self._parity_encoder.add(data, first_seqno, last_seqno)
+
+    def _send_parity(self, seqnos: list[list[int]], lengths: list[int], parity: bytes):
+        message = ParityMessage.initFromData(seqnos, lengths, parity)
+        message.encode()
+        message.sign(self._signature)
+        self._fragmenter.sendto(self._udp_sock, message.raw_data, (self._multicast_addr, self._multicast_port))
+        self.metrics.increment("parity_sent")
 
     def _send_unicast(self, message: Message, addr: tuple[str, int]):
         if not message.is_encoded:
             message.encode()
 
-        self._udp_sock.sendto(message.json_data.encode(), addr)
+        self._fragmenter.sendto(self._udp_sock, message.raw_data, addr)
 
-    def _send_nack(self, messages, addr):
-        nack = NegativeAcknowledgement.initFromData(messages)
+    def _send_nack(self, messages, addr, responder: str = None):
+        nack = NegativeAcknowledgement.initFromData(messages, responder)
         nack.encode()
         nack.sign(self._signature)
-        self._send_unicast(nack, addr)
+        if responder is None:
+            self._send_unicast(nack, addr)
+        else:
+            self._fragmenter.sendto(self._udp_sock, nack.raw_data, (self._multicast_addr, self._multicast_port))
+        self.metrics.increment("nacks_sent")
+
+    def _check_if_responder(self, responder: str):
+        # multicast NACKs are only answered by servers, which listen to the group
+        return (
+            self._multicast_repair
+            and responder is not None
+            and responder != self._identifier
+            and self._group_view is not None
+            and responder in self._group_view.servers
+            and not self._group_view.check_if_server_is_inactive(responder)
+        )
+
+    def _schedule_nack(self, nack_messages: dict[str, list[list[int]]], responder: str, addr):
+        # responder is None for unicast NACKs, which are only delayed for forward error correction
+        with self._nack_lock:
+            pending = self._pending_nacks.setdefault((responder, addr), {})
+            for identifier, ranges in nack_messages.items():
+                pending[identifier] = union(pending.get(identifier, []), ranges)
+
+            if self._nack_timer is None:
+                delay = self._fec_delay + (random.uniform(0, self._nack_delay) if responder is not None else 0)
+                self._nack_timer = call_later(delay, self._flush_nacks)
+
+    def _flush_nacks(self):
+        with self._nack_lock:
+            pending_nacks = self._pending_nacks
+            self._pending_nacks = {}
+            self._nack_timer = None
+
+        for (responder, addr), nack_messages in pending_nacks.items():
+            # messages received in the meantime, e.g. repairs requested by other servers or messages recovered from
+            # parity datagrams, are not requested
+            with self._holdback_queue_lock:
+                for identifier in list(nack_messages.keys()):
+                    ranges = subtract(nack_messages[identifier], [[-1, self._R_g[identifier]]])
+                    if identifier in self._held_back:
+                        ranges = [
+                            missing
+                            for start, end in ranges
+                            for missing in self._held_back[identifier].missing(start, end)
+                        ]
+                    nack_messages[identifier] = ranges
+
+            limit_nacks(nack_messages)
+            nack_messages = {identifier: ranges for identifier, ranges in nack_messages.items() if len(ranges) > 0}
+            if len(nack_messages) > 0:
+                self._send_nack(nack_messages, addr, responder)
+
+    def _suppress_nacks(self, nacks: dict[str, list[list[int]]]):
+        # the messages requested by another server are multicast by the responder
+        with self._nack_lock:
+            for (responder, _), pending in self._pending_nacks.items():
+                if responder is None:
+                    continue
+                for identifier in nacks:
+                    if identifier in pending:
+                        ranges = subtract(pending[identifier], nacks[identifier])
+                        self.metrics.increment("nacks_suppressed", count(pending[identifier]) - count(ranges))
+                        pending[identifier] = ranges
+
+    def _check_if_repaired(self, identifier: str, seqno: int):
+        # NACKs which were sent before a repair arrived are ignored
+        now = time.monotonic()
+        while len(self._recent_repairs_queue) > 0 and self._recent_repairs_queue[0][0] < now - self._repair_holdoff:
+            ts, key = self._recent_repairs_queue.popleft()
+            if self._recent_repairs.get(key) == ts:
+                del self._recent_repairs[key]
+
+        if (identifier, seqno) in self._recent_repairs:
+            return True
+        self._recent_repairs[(identifier, seqno)] = now
+        self._recent_repairs_queue.append((now, (identifier, seqno)))
+        return False
 
     def start(self, listen=True, trash=False):
         if trash:
             self._response_channel.set_trash_flag(True)
 
         self.terminate = False
-        if self.listening_thread is None or not self.listening_thread.is_alive():
-            if listen and not self._open:
-                self.listening_thread = threading.Thread(target=self._listen)
-            elif listen and self._open:
-                self.listening_thread = threading.Thread(target=self._listen_open)
+        if self._engine is not None:
+            self._start_on_engine(listen)
+        else:
+            if self.listening_thread is None or not self.listening_thread.is_alive():
+                if listen:
+                    if self._verification_pool is not None:
+                        self._verification_pool.start()
+                    self.listening_thread = threading.Thread(target=self._listen)
+                else:
+                    self.listening_thread = threading.Thread(target=self._listen_for_nacks)
+                self.listening_thread.start()
+
+            self.heartbeat_thread = threading.Thread(target=self._heartbeat)
+            self.heartbeat_thread.start()
+
+        if self._batcher is not None and (self.batching_thread is None or not self.batching_thread.is_alive()):
+            self._batcher.start()
+            self.batching_thread = threading.Thread(target=self._batching)
+            self.batching_thread.start()
+
+    def _start_on_engine(self, listen: bool):
+        # the sockets are read and heartbeats are sent by the loop thread of the engine
+        if len(self._reading_socks) == 0:
+            if listen:
+                if self._verification_pool is not None:
+                    self._verification_pool.start()
+                self._reading_socks = [self._udp_sock, self._multicast_listener]
+                for sock in self._reading_socks:
+                    self._engine.add_reader(sock, self._receive_from, sock)
             else:
-                self.listening_thread = threading.Thread(target=self._listen_for_nacks)
-            self.listening_thread.start()
+                self._reading_socks = [self._udp_sock]
+                self._engine.add_reader(self._udp_sock, self._receive_nacks_from, self._udp_sock)
 
-        self.heartbeat_thread = threading.Thread(target=self._heartbeat)
-        self.heartbeat_thread.start()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        self._heartbeat_task = self._engine.call_every(self._heartbeat_tick_interval, self._heartbeat_tick)
 
     def stop(self):
         self.terminate = True
 
+        if self._engine is not None:
+            for sock in self._reading_socks:
+                self._engine.remove_reader(sock)
+            self._reading_socks = []
+            if self._heartbeat_task is not None:
+                self._heartbeat_task.cancel()
+                self._heartbeat_task = None
+
         if self.heartbeat_thread is not None:
             self.heartbeat_thread.join()
             self.heartbeat_thread = None
         if self.listening_thread is not None:
             self.listening_thread.join()
             self.listening_thread = None
+        if self.batching_thread is not None:
+            self._batcher.stop()
+            self.batching_thread.join()
+            self.batching_thread = None
 
     def disable_responses(self):
         self._response_channel.set_trash_flag(True)
@@ -162,107 +490,374 @@ class ReliableMulticast:
         self._response_channel.set_trash_flag(False)
 
     def _heartbeat(self):
-        interval = self._configuration.get_heartbeat_interval()
         while not self.terminate:
-            time.sleep(interval)
-            ts = time.time_ns() / 10**9
-            # if ts - self._last_msg_sent_ts <= 5*interval:
-            heartbeat = HeartBeat.initFromData(self._R_g)
-            heartbeat.encode()
-            if not self._open:
-                heartbeat.sign(self._signature)
-
-            self._udp_sock.sendto(
-                heartbeat.json_data.encode(),
-                (self._multicast_addr, self._multicast_port),
-            )
-
-    def _listen(self):
-        while not self.terminate:
-            ready_socks, _, _ = select.select([self._udp_sock, self._multicast_listener], [], [])
-            for sock in ready_socks:
-                data, addr = sock.recvfrom(1024)
-                data = data.decode()
+            time.sleep(self._heartbeat_tick_interval)
+            self._heartbeat_tick()
+
+    def _heartbeat_tick(self):
+        if self._heartbeat_scheduler is None or self._heartbeat_scheduler.due():
+            self._send_heartbeat()
+
+        ts = time.time_ns() / 10**9
+        if ts - self._last_maintenance_ts >= self._heartbeat_interval - self._heartbeat_tick_interval / 2:
+            self._last_maintenance_ts = ts
+            if self._flow_control is not None:
+                # the window also advances if the slowest receiver was suspended
+                self._flow_control.update(self.get_stable_seqno(self._identifier))
+            if self._retention.bounded:
+                self._evict_stable_messages()
+
+    def _send_heartbeat(self):
+        acks = self._R_g
+        if self._flow_control is not None:
+            acks = dict(self._R_g)
+            acks[self._identifier] = self._flow_control.get_sent_seqno(acks[self._identifier])
+
+        acks = self._heartbeat_ack_vector.encode(acks)
+        heartbeat = HeartBeat.initFromData(acks)
+        heartbeat.encode()
+        if self._group_view is not None:
+            # heartbeats of servers are signed, such that their acks count for the stability of messages
+            heartbeat.sign(self._signature)
+
+        self._fragmenter.sendto(
+            self._udp_sock,
+            heartbeat.raw_data,
+            (self._multicast_addr, self._multicast_port),
+        )
+        self.metrics.increment("heartbeats_sent")
+
+    def _record_peer_acks(self, identifier: str, acks: dict[str, int]):
+        # acks may be deltas, but delivered sequence numbers only grow
+        if self._group_view is None or identifier not in self._group_view.servers:
+            return
 
-                msg = Message.initFromJSON(data)
-                msg.decode()
-                sender_id, _ = msg.get_signature()
+        peer_acks = self._peer_acks.setdefault(identifier, {})
+        for sender, seqno in acks.items():
+            if seqno > peer_acks.get(sender, -1):
+                peer_acks[sender] = seqno
+
+        if self._flow_control is not None and self._identifier in acks:
+            self._flow_control.update(self.get_stable_seqno(self._identifier))
+
+    def create_store(self, identifier: str) -> MessageStore:
+        return self._store_factory.create(identifier)
+
+    def attach_log(self, wal: WriteAheadLog):
+        self._wal = wal
+
+    def _log_message(self, identifier: str, seqno: int, data: bytes, replace: bool = False):
+        # own messages are logged before they are sent, such that a restarted server does not reuse their seqnos
+        if self._wal is not None:
+            self._wal.append_message(self._multicast_port, identifier, seqno, data, replace)
+
+    def get_watermark(self) -> dict[str, int]:
+        """Delivered sequence number of each sender, transferred to joining servers (see state_transfer.py)"""
+        with self._R_g_lock:
+            return dict(self._R_g)
+
+    def set_watermark(self, watermark: dict[str, int]):
+        """Continues after the given sequence numbers, the preceding messages are considered delivered"""
+        for identifier, seqno in watermark.items():
+            if identifier == self._identifier:
+                continue
+            if identifier not in self._storage:
+                self._storage[identifier] = self.create_store(identifier)
+                self._holdback_queue[identifier] = {}
+            self._storage[identifier].start_at(seqno + 1)
+            self._R_g[identifier] = seqno
+            self._max_R_g[identifier] = seqno
+            self._requested_messages[identifier] = [0, seqno]
+
+    def get_first_seqnos(self) -> dict[str, int]:
+        return {identifier: store.first_seqno for identifier, store in list(self._storage.items())}
+
+    def get_checkpoint(self) -> dict:
+        """State of the multicast which is not restored from the stored messages"""
+        return {}
+
+    def restore(self, messages: list[tuple[str, int, bytes]], checkpoint: dict):
+        """Restores the stored messages (sender, seqno, data) of a restarted server before it is started"""
+        for identifier, seqno, data in messages:
+            if identifier not in self._storage:
+                self._storage[identifier] = self.create_store(identifier)
+                self._holdback_queue[identifier] = {}
+            store = self._storage[identifier]
+            if len(store) == 0 and seqno > 0:
+                # the preceding messages were evicted
+                store.start_at(seqno)
+            if seqno == len(store):
+                store.append(data)
+
+        for identifier, store in self._storage.items():
+            self._R_g[identifier] = len(store) - 1
+            if identifier != self._identifier:
+                self._max_R_g[identifier] = len(store) - 1
+                self._requested_messages[identifier] = [0, len(store) - 1]
+        self._S_p = len(self._storage[self._identifier])
+
+    def get_stable_seqno(self, identifier: str):
+        # messages up to the returned sequence number were delivered by all servers which are not suspended
+        stable = self._R_g.get(identifier, -1)
+        for server in self._group_view.servers:
+            if server != self._identifier and not self._group_view.check_if_server_is_suspended(server):
+                stable = min(stable, self._peer_acks.get(server, {}).get(identifier, -1))
+        return stable
+
+    def _evict_stable_messages(self):
+        messages, nbytes, memory_bytes = 0, 0, 0
+        for identifier, store in list(self._storage.items()):
+            evicted = store.evict(self.get_stable_seqno(identifier), self._retention)
+            if evicted > 0:
+                self.metrics.increment("messages_evicted", evicted)
+            messages += len(store) - store.first_seqno
+            nbytes += store.nbytes
+            memory_bytes += store.memory_bytes
+
+        self.metrics.set_gauge("stored_messages", messages)
+        self.metrics.set_gauge("stored_bytes", nbytes)
+        self.metrics.set_gauge("stored_memory_bytes", memory_bytes)
 
-                if msg.header == "HeartBeat":
-                    self._receive_heartbeat(data, addr)
-                else:
-                    if msg.verify_signature(self._signature, self._group_view.pks):
-                        if msg.header == "NACK":
-                            if not self._group_view.check_if_server_is_suspended(sender_id):
-                                self._receive_nack(data, addr)
-                        else:
-                            if sock == self._udp_sock or not self._group_view.check_if_server_is_suspended(
-                                sender_id
-                            ):
-                                self._receive_pb_message(data, addr)
+    def _listen(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._udp_sock, selectors.EVENT_READ)
+        selector.register(self._multicast_listener, selectors.EVENT_READ)
 
-    def _listen_open(self):
         while not self.terminate:
-            ready_socks, _, _ = select.select([self._udp_sock, self._multicast_listener], [], [])
-            for sock in ready_socks:
-                data, addr = sock.recvfrom(1024)
-                data = data.decode()
-
-                msg = Message.initFromJSON(data)
-                msg.decode()
-
-                if msg.header == "HeartBeat":
-                    self._receive_heartbeat(data, addr)
-                elif msg.header == "NACK":
-                    if msg.verify_signature(self._signature, self._group_view.pks):
-                        sender_id, _ = msg.get_signature()
-                        if not self._group_view.check_if_server_is_inactive(sender_id):
-                            self._receive_nack(data, addr)
+            for key, _ in selector.select():
+                self._receive_from(key.fileobj)
+        selector.close()
+
+    def _receive_from(self, sock: socket.socket):
+        batch = []
+        for buffer, data, addr in self._drain(sock):
+            # the datagram is parsed and verified in place, see BufferPool
+            data = self._reassembler.add(data, addr)
+            if data is None:
+                self._buffer_pool.release(buffer)
+                continue
+
+            # retransmitted copies of known messages are dropped before parsing and verifying them
+            if self._check_if_duplicate(data):
+                self._buffer_pool.release(buffer)
+                continue
+
+            batch.append((Envelope.initFromBytes(data, addr), sock, buffer))
+
+        if self._verification_pool is not None:
+            self._verification_pool.submit_batch(batch)
+        else:
+            for envelope, sock, buffer in batch:
+                if self._verify(envelope):
+                    self._receive_datagram(envelope, sock, buffer)
                 else:
-                    msg = PiggybackMessage.initFromJSON(data)
-                    msg.decode()
-                    if msg.seqno == 0 or msg.verify_signature(self._signature, self._group_view.users):
-                        msg.set_sender(addr)
-                        msg.encode()
-                        data = msg.json_data
-
-                        self._receive_pb_message(data, addr)
+                    self._buffer_pool.release(buffer)
+
+    def _drain(self, sock: socket.socket):
+        # reads the datagrams available at the socket, up to the batch limit. The sockets are also used for sending
+        # by other threads, hence they are kept blocking and only read with MSG_DONTWAIT
+        datagrams = []
+        while len(datagrams) < self._receive_batch_limit:
+            try:
+                datagrams.append(self._buffer_pool.recvfrom(sock, socket.MSG_DONTWAIT))
+            except BlockingIOError:
+                break
+
+        self.metrics.increment("listener_wakeups")
+        self.metrics.increment("datagrams_received", len(datagrams))
+        return datagrams
+
+    def _receive_datagram(self, envelope: Envelope, sock: socket.socket, buffer: memoryview):
+        # envelopes which are kept are detached from the buffer by _receive_pb_message and _receive_batch
+        try:
+            self._receive_verified(envelope, sock)
+        finally:
+            self._buffer_pool.release(buffer)
+
+    def _release_buffer(self, envelope: Envelope, sock: socket.socket, buffer: memoryview):
+        self._buffer_pool.release(buffer)
+
+    def _verify(self, envelope: Envelope):
+        if envelope.header == "HeartBeat":
+            return True
+
+        if self._open and envelope.header == "Batch":
+            # only servers send batches
+            return False
+
+        if not self._open or envelope.header == "NACK":
+            # includes parity datagrams, which are only accepted in groups of servers
+            msg = Message.initFromEnvelope(envelope)
+            return msg.verify_signature(self._signature, self._group_view.pks)
+
+        # messages of open groups are signed by users, except for their initial message
+        msg = PiggybackMessage.initFromEnvelope(envelope)
+        msg.decode()
+        return msg.seqno == 0 or msg.verify_signature(self._signature, self._group_view.users)
+
+    def _receive_verified(self, envelope: Envelope, sock: socket.socket):
+        sender_id, _ = envelope.get_signature()
+
+        if envelope.header == "HeartBeat":
+            self._receive_heartbeat(envelope)
+        elif envelope.header == "NACK":
+            if self._open and not self._group_view.check_if_server_is_inactive(sender_id):
+                self._receive_nack(envelope)
+            elif not self._open and not self._group_view.check_if_server_is_suspended(sender_id):
+                self._receive_nack(envelope)
+        elif self._open:
+            self._receive_pb_message(envelope)
+        elif envelope.header == "Parity":
+            if not self._group_view.check_if_server_is_suspended(sender_id):
+                self._receive_parity(envelope, sock)
+        elif sock == self._udp_sock or not self._group_view.check_if_server_is_suspended(sender_id):
+            if envelope.header == "Batch":
+                self._receive_batch(envelope)
+            else:
+                self._receive_pb_message(envelope)
+
+    def _check_if_duplicate(self, data: bytes):
+        if self._verified_cache is None:
+            return False
+
+        entry = self._verified_cache.lookup(data)
+        if entry is not None:
+            identifier, seqno = entry
+            if identifier in self._R_g and (
+                seqno <= self._R_g[identifier] or seqno in self._holdback_queue[identifier]
+            ):
+                self.metrics.increment("duplicates_dropped")
+                return True
+        return False
+
+    def _add_to_verified_cache(self, data: bytes, identifier: str, seqno: int):
+        if self._verified_cache is not None:
+            self._verified_cache.add(data, identifier, seqno)
+
+    def get_metrics(self):
+        report = self.metrics.report()
+        report.update(self._reassembler.get_memory_usage())
+        return report
 
     def _listen_for_nacks(self):
-        while not self.terminate:
-            ready_socks, _, _ = select.select([self._udp_sock], [], [])
-            for sock in ready_socks:
-                data, addr = sock.recvfrom(1024)
-                data = data.decode()
+        selector = selectors.DefaultSelector()
+        selector.register(self._udp_sock, selectors.EVENT_READ)
 
-                msg = Message.initFromJSON(data)
-                msg.decode()
-
-                if msg.header == "NACK":
-                    self._receive_nack(data, addr)
-
-    def _receive_heartbeat(self, data, addr):
-        heartbeat = HeartBeat.initFromJSON(data)
+        while not self.terminate:
+            for key, _ in selector.select():
+                self._receive_nacks_from(key.fileobj)
+        selector.close()
+
+    def _receive_nacks_from(self, sock: socket.socket):
+        for buffer, data, addr in self._drain(sock):
+            data = self._reassembler.add(data, addr)
+            if data is not None:
+                envelope = Envelope.initFromBytes(data, addr)
+
+                if envelope.header == "NACK":
+                    self._receive_nack(envelope)
+            self._buffer_pool.release(buffer)
+
+    def _receive_heartbeat(self, envelope: Envelope):
+        heartbeat = HeartBeat.initFromEnvelope(envelope)
         heartbeat.decode()
 
-        self._handle_acks(heartbeat.acks, addr, {})
+        # heartbeats are not verified by _verify, hence their acks only count for stability and flow control if they
+        # are signed by a server
+        identifier, _ = heartbeat.get_signature()
+        if (
+            (self._retention.bounded or self._flow_control is not None)
+            and identifier is not None
+            and self._group_view is not None
+            and heartbeat.verify_signature(self._signature, self._group_view.pks)
+        ):
+            self._record_peer_acks(identifier, heartbeat.acks)
 
-    def _receive_nack(self, data, addr):
-        nack = NegativeAcknowledgement.initFromJSON(data)
+        self._handle_acks(heartbeat.acks, envelope.sender, {}, identifier)
+
+    def _receive_nack(self, envelope: Envelope):
+        nack = NegativeAcknowledgement.initFromEnvelope(envelope)
         nack.decode()
 
+        if nack.responder is not None and nack.responder != self._identifier:
+            if nack.get_signature()[0] != self._identifier:
+                self._suppress_nacks(nack.nacks)
+            return
+
         for identifier in nack.nacks:
             if identifier in self._storage:
-                for seqno in nack.nacks[identifier]:
-                    if seqno >= len(self._storage[identifier]):
-                        break
+                store = self._storage[identifier]
+                # repairs of multicast NACKs are multicast, except for messages of suspended servers, which are
+                # only accepted by unicast
+                multicast = nack.responder is not None and not self._group_view.check_if_server_is_suspended(
+                    identifier
+                )
+                last_sent = None
+                for seqno in requested_seqnos(nack.nacks[identifier], len(store)):
+                    # stored messages are sent as they are, without parsing them again.
+                    # Messages of the same batch share one datagram, which is sent only once
+                    data = store.get(seqno)
+                    if data is None:
+                        self.metrics.increment("nacks_for_evicted_messages")
+                    elif multicast and self._check_if_repaired(identifier, seqno):
+                        self.metrics.increment("repairs_suppressed")
+                    elif data is not last_sent:
+                        if multicast:
+                            self._fragmenter.sendto(self._udp_sock, data, (self._multicast_addr, self._multicast_port))
+                            self.metrics.increment("repairs_multicast")
+                        else:
+                            self._fragmenter.sendto(self._udp_sock, data, envelope.sender)
+                            self.metrics.increment("repairs_unicast")
+                        last_sent = data
+
+    def _receive_parity(self, envelope: Envelope, sock: socket.socket):
+        parity = ParityMessage.initFromEnvelope(envelope)
+        parity.decode()
+        identifier, _ = parity.get_signature()
+        if identifier == self._identifier:
+            return
+
+        # a single missing datagram of the group is rebuilt from the delivered and held back datagrams
+        missing = None
+        datagrams = []
+        with self._holdback_queue_lock:
+            delivered = self._R_g.get(identifier, -1)
+            holdback_queue = self._holdback_queue.get(identifier, {})
+            for (first, last), length in zip(parity.seqnos, parity.lengths):
+                if last <= delivered:
+                    data = self._storage[identifier].get(first)
+                    if data is None:
+                        return
+                    datagrams.append(data)
+                elif first in holdback_queue:
+                    datagrams.append(holdback_queue[first].raw_data)
+                elif missing is None:
+                    missing = length
+                else:
+                    # several datagrams are missing, they are requested by NACKs
+                    self.metrics.increment("fec_unrecoverable")
+                    return
 
-                    nack_response = PiggybackMessage.initFromJSON(self._storage[identifier][seqno])
-                    self._send_unicast(nack_response, addr)
+        if missing is None:
+            return
+
+        recovered = Envelope.initFromBytes(recover(parity.parity, datagrams, missing), envelope.sender)
+        if self._verify(recovered):
+            self.metrics.increment("fec_recovered")
+            self._receive_verified(recovered, sock)
+
+    def _receive_batch(self, envelope: Envelope):
+        envelope = envelope.detach()
+        batch = BatchMessage.initFromEnvelope(envelope)
+        batch.decode()
 
-    def _receive_pb_message(self, data, addr):
-        pb_message = PiggybackMessage.initFromJSON(data)
+        for payload in batch.messages:
+            self._receive_pb_message(Envelope.initFromBatch(envelope, payload))
+
+    def _receive_pb_message(self, envelope: Envelope):
+        pb_message = PiggybackMessage.initFromEnvelope(envelope)
         pb_message.decode()
+        self._add_to_verified_cache(envelope.raw_data, pb_message.identifier, pb_message.seqno)
 
         if pb_message.identifier == self._identifier:
             return
@@ -278,21 +873,25 @@ class ReliableMulticast:
         check_responses = False
 
         if pb_message.identifier not in self._storage:
-            self._storage[pb_message.identifier] = []
+            self._storage[pb_message.identifier] = self.create_store(pb_message.identifier)
             self._R_g[pb_message.identifier] = -1
             self._holdback_queue[pb_message.identifier] = {}
             self._requested_messages[pb_message.identifier] = [0, -1]
 
+        if pb_message.seqno > self._R_g[pb_message.identifier]:
+            # the message is delivered or kept in the holdback queue
+            envelope = envelope.detach()
+
         if pb_message.seqno == self._R_g[pb_message.identifier] + 1:
             # message can be delivered instantly
-            self._deliver(data, pb_message.identifier, pb_message.seqno)
-            self._check_holdback_queue()
+            self._deliver(envelope, pb_message.identifier, pb_message.seqno)
+            self._check_holdback_queue(pb_message.identifier)
             check_responses = True
 
         elif pb_message.seqno > self._R_g[pb_message.identifier] + 1:
             # there are missing messages => store message in holdback queue
             with self._holdback_queue_lock:
-                self._holdback_queue[pb_message.identifier][pb_message.seqno] = data
+                self._hold_back(pb_message.identifier, pb_message.seqno, envelope)
 
                 if (
                     self._requested_messages[pb_message.identifier][0]
@@ -302,29 +901,22 @@ class ReliableMulticast:
                     self._requested_messages[pb_message.identifier][1] = self._R_g[pb_message.identifier]
 
                 # send nacks
-                missing_messages = list(
-                    set(
-                        range(
-                            self._requested_messages[pb_message.identifier][1] + 1,
-                            pb_message.seqno,
-                        )
-                    )
-                    - set(self._holdback_queue[pb_message.identifier].keys())
-                )
-
+                missing_messages = self._missing_messages(pb_message.identifier, pb_message.seqno - 1)
                 if len(missing_messages) != 0:
                     nack_messages[pb_message.identifier] = missing_messages
 
-        self._handle_acks(pb_message.acks, addr, nack_messages)
+        self._record_peer_acks(pb_message.identifier, pb_message.acks)
+        self._handle_acks(pb_message.acks, envelope.sender, nack_messages, pb_message.identifier)
 
         if check_responses:
             if not self._response_channel.is_empty():
-                response, config = self._response_channel.consume()
-                response_msg = Message.initFromJSON(response)
+                response_msg, config = self._response_channel.consume()
                 self.send(response_msg, config)
 
-    def _handle_acks(self, acks, addr, nack_messages):
-        # send nacks if detecting missing messages
+    def _handle_acks(self, acks, addr, nack_messages, responder: str = None):
+        # acks may be a delta: since ack vectors only grow, the full vector of every sender is covered by _max_R_g,
+        # which merges all received entries. Unchanged entries were already handled with an earlier vector
+        # send nacks if detecting missing messages. responder: server which sent the acks (or the message)
         for ack in acks:
             if ack in self._group_view.servers:
                 if ack not in self._max_R_g or (acks[ack] > self._max_R_g[ack]):
@@ -332,7 +924,7 @@ class ReliableMulticast:
 
                 if ack != self._identifier:
                     if ack not in self._storage:
-                        self._storage[ack] = []
+                        self._storage[ack] = self.create_store(ack)
                         self._R_g[ack] = -1
                         self._holdback_queue[ack] = {}
                         self._requested_messages[ack] = [0, -1]
@@ -343,69 +935,79 @@ class ReliableMulticast:
                     ):
                         self._requested_messages[ack][1] = self._R_g[ack]
 
-                    missing_messages = list(
-                        set(range(self._requested_messages[ack][1] + 1, acks[ack] + 1))
-                        - set(self._holdback_queue[ack].keys())
-                    )
-
+                    missing_messages = self._missing_messages(ack, acks[ack])
                     if len(missing_messages) != 0:
                         nack_messages[ack] = missing_messages
 
         if len(nack_messages) > 0:
-            nack_count = sum([len(nack_messages[identifier]) for identifier in nack_messages])
-            if nack_count > 100:
-                for identifier in nack_messages:
-                    l = len(nack_messages[identifier])
-                    nack_messages[identifier] = nack_messages[identifier][: int(100 * l / nack_count)]
-
-            for identifier in nack_messages:
-                l = len(nack_messages[identifier])
-                if l > 0:
-                    self._requested_messages[identifier][0] = time.time_ns() / 10**9
-                    self._requested_messages[identifier][1] = max(
-                        self._requested_messages[identifier][1],
-                        nack_messages[identifier][-1],
-                    )
-            self._send_nack(nack_messages, addr)
-
-    def _deliver(self, data, identifier, seqno):
+            self._request_nacks(nack_messages)
+            if self._check_if_responder(responder):
+                self._schedule_nack(nack_messages, responder, None)
+            elif self._fec_delay > 0:
+                self._schedule_nack(nack_messages, None, addr)
+            else:
+                self._send_nack(nack_messages, addr)
+
+    def _missing_messages(self, identifier: str, seqno: int):
+        # ranges up to seqno which are neither held back nor requested within the last heartbeat interval
+        start = self._requested_messages[identifier][1] + 1
+        if identifier not in self._held_back:
+            return truncate([[start, seqno]], NACK_LIMIT) if start <= seqno else []
+        return self._held_back[identifier].missing(start, seqno)
+
+    def _request_nacks(self, nack_messages: dict[str, list[list[int]]]):
+        limit_nacks(nack_messages)
+        for identifier in nack_messages:
+            if len(nack_messages[identifier]) > 0:
+                if self._heartbeat_scheduler is not None:
+                    self._heartbeat_scheduler.gap_detected()
+                self._requested_messages[identifier][0] = time.time_ns() / 10**9
+                self._requested_messages[identifier][1] = max(
+                    self._requested_messages[identifier][1],
+                    nack_messages[identifier][-1][1],
+                )
+
+    def _deliver(self, envelope: Envelope, identifier, seqno):
         if self._channel is not None:
-            self._channel.produce(data)
-        self._update_storage(data, identifier, seqno)
+            self._channel.produce(envelope)
+        self._update_storage(envelope, identifier, seqno)
 
-    def _update_storage(self, data, identifier, seqno):
+    def _update_storage(self, envelope: Envelope, identifier, seqno):
         # update storage and acks
-        self._storage[identifier].append(data)
+        self._storage[identifier].append(envelope.raw_data)
         self._R_g[identifier] = seqno
         if identifier != self._identifier:
+            self._log_message(identifier, seqno, envelope.raw_data)
+            if self._heartbeat_scheduler is not None:
+                self._heartbeat_scheduler.message_delivered()
             self._requested_messages[identifier][0] = time.time_ns() / 10**9
             self._requested_messages[identifier][1] = max(seqno, self._requested_messages[identifier][1])
 
-    def _check_holdback_queue(self):
-        change = True
-        while change:
-            change = False
-            for identifier in self._holdback_queue:
-                next_seqno = self._R_g[identifier] + 1
-                while next_seqno in self._holdback_queue[identifier]:
-                    self._deliver(
-                        self._holdback_queue[identifier][next_seqno],
-                        identifier,
-                        next_seqno,
-                    )
-                    next_seqno += 1
-                    change = True
-
-        # remove stale elements of the holdback queue
-        with self._holdback_queue_lock:
-            for identifier in self._holdback_queue:
-                stale_messages = [
-                    stale_seqno
-                    for stale_seqno in self._holdback_queue[identifier]
-                    if stale_seqno <= self._R_g[identifier]
-                ]
-                for stale_message in stale_messages:
-                    del self._holdback_queue[identifier][stale_message]
+    def _hold_back(self, identifier: str, seqno: int, envelope: Envelope):
+        # requires _holdback_queue_lock. Delivered messages are dropped, hence the queue never contains stale entries
+        if seqno <= self._R_g[identifier]:
+            return
+        self._holdback_queue[identifier][seqno] = envelope
+        self._held_back.setdefault(identifier, IntervalSet()).add(seqno)
+        if seqno == self._R_g[identifier] + 1:
+            self._deliverable.add(identifier)
+
+    def _check_holdback_queue(self, identifier: str = None):
+        # only senders whose next message is held back are visited, i.e. the cost does not depend on the number of
+        # senders. identifier: sender whose sequence number was just delivered
+        if identifier is not None and self._R_g[identifier] + 1 in self._holdback_queue[identifier]:
+            self._deliverable.add(identifier)
+
+        while len(self._deliverable) > 0:
+            identifier = self._deliverable.pop()
+            holdback_queue = self._holdback_queue[identifier]
+            next_seqno = self._R_g[identifier] + 1
+            while next_seqno in holdback_queue:
+                with self._holdback_queue_lock:
+                    envelope = holdback_queue.pop(next_seqno)
+                    self._held_back[identifier].discard_up_to(next_seqno)
+                self._deliver(envelope, identifier, next_seqno)
+                next_seqno += 1
 
     def halt_sending(self):
         self._suspend_multicast = True
@@ -4,11 +4,14 @@ import math
 from src.core.consensus.max_phase_king import MaxPhaseKing
 from src.core.utils.configuration import Configuration
 from src.core.utils.channel import Channel
+from src.core.utils.timer_wheel import call_later
 from src.protocol.multicast.to_message import TotalOrderMessage
 from src.protocol.multicast.to_proposal import TotalOrderProposal
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 from src.core.multicast.co_reliable_multicast import CausalOrderedReliableMulticast
 from src.core.group_view.group_view import GroupView
+from src.core.engine.engine import TransportEngine
 from src.protocol.consensus.suspect import GroupViewSuspect
 from src.protocol.multicast.halt import HaltMessage
 from src.protocol.multicast.commence import CommenceMessage
@@ -16,6 +19,9 @@ from src.protocol.group_view.join import JoinMsg, JoinRequest
 
 
 class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
+    # joining servers wait for the join processing while delivering messages
+    _blocking_delivery = True
+
     def __init__(
         self,
         multicast_addr: str,
@@ -25,12 +31,15 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
         group_view: GroupView,
         configuration: Configuration,
         verbose: bool = False,
+        engine: TransportEngine = None,
     ):
-        super().__init__(multicast_addr, multicast_port, identifier, channel, group_view, configuration)
+        super().__init__(
+            multicast_addr, multicast_port, identifier, channel, group_view, configuration, engine=engine
+        )
 
         self._P_g = -1
         self._A_g = -1
-        self._to_holdback_dict: dict[str, list[str, list[str], float]] = {}
+        self._to_holdback_dict: dict[str, list[Envelope, list[str], float]] = {}
         self._to_holdback_dict_lock = threading.Lock()
         self._to_holdback_queue: list[list[tuple[int, str], str, int]] = []
         self._produce_channel = Channel()
@@ -40,77 +49,139 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
         self._suspended_dict: dict[tuple[str, str], list[str]] = {}
         self._halting_servers: dict[str, str] = {}
         self._halting_semaphore = threading.Semaphore(0)
-        self._join_response_buffer: list[str] = []
+        self._join_response_buffer: list[TotalOrderProposal] = []
         self._join_semaphores = {}
+        self._join_cuts: dict[str, tuple[dict[str, int], bool, int]] = {}
+
+        # due deadlines of proposals ("TO", msg_identifier), phase king executions ("PK", topic) and of halting for a
+        # joining server ("HALT" and "JOIN", (wait_until, halt)), where halt counts the calls of halt_multicast
+        self._deadlines = Channel()
+        self._watched: set[tuple[str, str]] = set()
+        self._watched_lock = threading.Lock()
+        self._halts = 0
 
         self._max_phase_king = MaxPhaseKing(
-            self._response_channel, self._to_holdback_queue, self._group_view, self._configuration, verbose
+            self._response_channel,
+            self._to_holdback_queue,
+            self._group_view,
+            self._configuration,
+            verbose,
+            watch=lambda topic, delay: self._watch_deadline("PK", topic, delay),
         )
 
-        crash_fault_detection_thread = threading.Thread(target=self._check_holdback_timestamps)
+        # sending may block while the delivery thread waits for a join, hence expired deadlines are handled by a
+        # thread instead of the timer wheel
+        crash_fault_detection_thread = threading.Thread(target=self._check_deadlines)
         crash_fault_detection_thread.start()
 
-    def _check_holdback_timestamps(self):
-        timeout = self._configuration.get_timeout()
+    def _watch_deadline(self, kind: str, key: str, delay: float):
+        # a single deadline is scheduled per proposal or phase king execution, it is rescheduled while pending
+        with self._watched_lock:
+            if (kind, key) in self._watched:
+                return
+            self._watched.add((kind, key))
+        call_later(delay, self._deadlines.produce, (kind, key))
+
+    def _check_deadlines(self):
         while True:
-            time.sleep(5 * self._configuration.get_heartbeat_interval())
-            with self._to_holdback_dict_lock:
-                ts = time.time_ns() / 10**9
-                for key in self._to_holdback_dict:
-                    entry = self._to_holdback_dict[key]
-                    if entry is not None and ts - entry[2] > timeout:
-                        for server_id in self._group_view.servers:
-                            if (
-                                server_id not in entry[1]
-                                and not self._group_view.check_if_server_is_inactive(server_id)
-                                and not server_id in self._halting_servers
-                            ):
-                                suspect_msg = GroupViewSuspect.initFromData(server_id, "TO-Proposal: " + key)
-                                suspect_msg.encode()
-                                self.__debug("TO-Multicast: Suspect for timeout on proposal")
-                                self.send(suspect_msg)
-            self._max_phase_king.check_timeouts(self._halting_servers, self.send)
-
-    def _co_deliver(self, data, identifier, seqno):
-        self._to_consume(data, identifier, seqno)
-
-    def _to_deliver(self, data):
-        self.__debug("TO-Multicast: Deliver", data)
+            kind, key = self._deadlines.consume()
+            with self._watched_lock:
+                self._watched.discard((kind, key))
+
+            delay = None
+            if kind == "TO":
+                delay = self._check_proposal_timeout(key)
+            elif kind == "PK":
+                delay = self._max_phase_king.check_timeout(key, self._halting_servers, self.send)
+            elif kind == "HALT" and key[1] == self._halts and not self.timer.cancelled:
+                self.__existing_server_timeout_handler(key[0])
+            elif kind == "JOIN" and key[1] == self._halts and not self.timer1.cancelled:
+                self.__new_server_timeout_handler(key[0])
+
+            if delay is not None:
+                self._watch_deadline(kind, key, delay)
+
+    def _check_proposal_timeout(self, key: str):
+        # returns the delay until the proposal has to be checked again, None if it is delivered
+        timeout = self._configuration.get_timeout()
+        with self._to_holdback_dict_lock:
+            entry = self._to_holdback_dict.get(key)
+            if entry is None:
+                return None
 
-        if self._group_view.identifier in self._group_view.joining_servers:
-            msg = Message.initFromJSON(data)
-            msg.decode()
+            ts = time.time_ns() / 10**9
+            if ts - entry[2] <= timeout:
+                return entry[2] + timeout - ts
+
+            for server_id in self._group_view.servers:
+                if (
+                    server_id not in entry[1]
+                    and not self._group_view.check_if_server_is_inactive(server_id)
+                    and not server_id in self._halting_servers
+                ):
+                    suspect_msg = GroupViewSuspect.initFromData(server_id, "TO-Proposal: " + key)
+                    suspect_msg.encode()
+                    self.__debug("TO-Multicast: Suspect for timeout on proposal")
+                    self.send(suspect_msg)
+        return 5 * self._configuration.get_heartbeat_interval()
+
+    def get_join_cut(self, identifier: str):
+        """Watermark, whether all consumed messages were delivered and the agreed seqno at the delivery of a join"""
+        return self._join_cuts.pop(identifier, None)
 
-            if msg.header == "View: Join Message":
-                msg = JoinMsg.initFromJSON(data)
-                msg.decode()
-                join_request = JoinRequest.initFromJSON(msg.request)
-                join_request.decode()
+    def set_agreed_seqno(self, seqno: int):
+        self._P_g = max(self._P_g, seqno)
+        self._A_g = max(self._A_g, seqno)
+
+    def get_checkpoint(self) -> dict:
+        return {"P_g": self._P_g, "A_g": self._A_g}
+
+    def restore(self, messages: list[tuple[str, int, bytes]], checkpoint: dict):
+        super().restore(messages, checkpoint)
+        self._P_g = checkpoint.get("P_g", -1)
+        self._A_g = checkpoint.get("A_g", -1)
+
+    def _co_deliver(self, envelope: Envelope, identifier, seqno):
+        self._to_consume(envelope, identifier, seqno)
+
+    def _to_deliver(self, envelope: Envelope):
+        self.__debug("TO-Multicast: Deliver", envelope.header, envelope.content)
+
+        if envelope.header == "View: Join Message":
+            msg = JoinMsg.initFromEnvelope(envelope)
+            msg.decode()
+            join_request = JoinRequest.initFromBytes(msg.request)
+            join_request.decode()
+            if self._group_view.identifier in self._group_view.joining_servers:
                 self._join_semaphores[join_request.identifier] = threading.Semaphore(0)
+            else:
+                # the joining server may continue after the messages consumed so far, if all of them are delivered
+                self._join_cuts[join_request.identifier] = (
+                    dict(self._CO_R_g),
+                    len(self._to_holdback_queue) == 0,
+                    self._A_g,
+                )
         
-        self._channel.produce(data)
-
-    def _to_consume(self, data, identifier, seqno):
-        message = Message.initFromJSON(data)
-        message.decode()
+        self._channel.produce(envelope)
 
+    def _to_consume(self, envelope: Envelope, identifier, seqno):
         with self._to_lock:
-            if message.header == "TO: Seqno Proposal":
-                self._handle_to_seqno_proposal(data, identifier)
-            elif message.header == "View: Suspect":
-                self._handle_suspect_message(data)
-            elif message.header == "Halt Message":
-                self._handle_halt_message(data)
-            elif message.header == "Commence Message":
-                self._handle_commence_message(data)
-            elif message.header == "Phase King: Message":
-                if self._max_phase_king.process_pk_message(data):
+            if envelope.header == "TO: Seqno Proposal":
+                self._handle_to_seqno_proposal(envelope, identifier)
+            elif envelope.header == "View: Suspect":
+                self._handle_suspect_message(envelope)
+            elif envelope.header == "Halt Message":
+                self._handle_halt_message(envelope)
+            elif envelope.header == "Commence Message":
+                self._handle_commence_message(envelope)
+            elif envelope.header == "Phase King: Message":
+                if self._max_phase_king.process_pk_message(envelope):
                     self._check_to_holdback_queue()
             else:
-                self._handle_to_message(data)
+                self._handle_to_message(envelope)
 
-    def _handle_to_seqno_proposal(self, data, identifier):
-        message = TotalOrderProposal.initFromJSON(data)
+    def _handle_to_seqno_proposal(self, envelope: Envelope, identifier):
+        message = TotalOrderProposal.initFromEnvelope(envelope)
         message.decode()
 
         entry = None
@@ -164,8 +235,8 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
             else:
                 break
 
-    def _handle_suspect_message(self, data):
-        suspect_msg = GroupViewSuspect.initFromJSON(data)
+    def _handle_suspect_message(self, envelope: Envelope):
+        suspect_msg = GroupViewSuspect.initFromEnvelope(envelope)
         suspect_msg.decode()
 
         if self._group_view.identifier in self._group_view.joining_servers and suspect_msg.identifier in self._join_semaphores:
@@ -214,8 +285,8 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
                 # peer pressure...
                 response_suspect_msg = GroupViewSuspect.initFromData(suspect_msg.identifier, suspect_msg.topic)
                 response_suspect_msg.encode()
-                self._response_channel.produce((response_suspect_msg.json_data, True))
-                print("Peer Pressure", response_suspect_msg.json_data, self._suspended_dict)
+                self._response_channel.produce((response_suspect_msg, True))
+                print("Peer Pressure", suspect_msg.identifier, suspect_msg.topic, self._suspended_dict)
 
             if len(self._suspended_dict[(suspect_msg.identifier, suspect_msg.topic)]) >= N - f:
                 if not self._group_view.check_if_server_is_suspended(suspect_msg.identifier):
@@ -231,8 +302,8 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
         if self._group_view.identifier in self._group_view.joining_servers and suspect_msg.identifier in self._join_semaphores:
             self._join_semaphores[suspect_msg.identifier].release()
 
-    def _handle_halt_message(self, data):
-        halt_msg = HaltMessage.initFromJSON(data)
+    def _handle_halt_message(self, envelope: Envelope):
+        halt_msg = HaltMessage.initFromEnvelope(envelope)
         halt_msg.decode()
 
         sender_id, _ = halt_msg.get_signature()
@@ -271,13 +342,10 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
                                 self._to_holdback_dict[key][2] = ts
                     self._halting_servers = {}
                     self._response_channel.set_trash_flag(False)
-                    self._response_channel.produce((commence_msg.json_data, True))
-                    for proposal_json in self._join_response_buffer:
-                        proposal_msg = TotalOrderProposal.initFromJSON(proposal_json)
-                        proposal_msg.decode()
-
+                    self._response_channel.produce((commence_msg, True))
+                    for proposal_msg in self._join_response_buffer:
                         if proposal_msg.msg_identifier in self._to_holdback_dict:
-                            self._response_channel.produce((proposal_json, False))
+                            self._response_channel.produce((proposal_msg, False))
                     self._join_response_buffer = []
             elif (
                 self._group_view.identifier in self._halting_servers
@@ -316,8 +384,8 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
             self._halting_semaphore.release()
             self._check_to_holdback_queue()
 
-    def _handle_commence_message(self, data):
-        commence_msg = CommenceMessage.initFromJSON(data)
+    def _handle_commence_message(self, envelope: Envelope):
+        commence_msg = CommenceMessage.initFromEnvelope(envelope)
         commence_msg.decode()
 
         sender_id, _ = commence_msg.get_signature()
@@ -341,8 +409,8 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
             self._halting_servers = {}
             self._halting_semaphore.release()
 
-    def _handle_to_message(self, data):
-        message = TotalOrderMessage.initFromJSON(data)
+    def _handle_to_message(self, envelope: Envelope):
+        message = TotalOrderMessage.initFromEnvelope(envelope)
         message.decode()
 
         sender_id, _ = message.get_signature()
@@ -350,12 +418,13 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
             suspect_msg = GroupViewSuspect.initFromData(sender_id, self._halting_servers[sender_id])
             suspect_msg.encode()
             self.__debug("TO-Multicast: Suspect for sending after halting: ", sender_id)
-            self._response_channel.produce((suspect_msg.json_data, True))
+            self._response_channel.produce((suspect_msg, True))
         elif message.msg_identifier not in self._to_holdback_dict:
             self._P_g = max(self._A_g, self._P_g) + 1
             with self._to_holdback_dict_lock:
                 timestamp = time.time_ns() / 10**9
-                self._to_holdback_dict[message.msg_identifier] = [data, [], timestamp]
+                self._to_holdback_dict[message.msg_identifier] = [envelope, [], timestamp]
+            self._watch_deadline("TO", message.msg_identifier, self._configuration.get_timeout())
             self._to_holdback_queue.append([0, message.msg_identifier, 0, False])
             self._to_holdback_queue.sort(key=lambda entry: (entry[0], entry[1]))
 
@@ -363,9 +432,9 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
             response_msg.encode()
 
             if self._group_view.identifier in self._group_view.joining_servers:
-                self._join_response_buffer.append(response_msg.json_data)
+                self._join_response_buffer.append(response_msg)
             else:
-                self._response_channel.produce((response_msg.json_data, False))
+                self._response_channel.produce((response_msg, False))
 
     def __existing_server_timeout_handler(self, wait_until):
         for server_id in self._group_view.servers:
@@ -398,16 +467,14 @@ class TotalOrderedReliableMulticast(CausalOrderedReliableMulticast):
 
             self.send(halt_msg, config)
 
-            self.timer = threading.Timer(
-                self._configuration.get_timeout(), self.__existing_server_timeout_handler, args=(wait_until,)
-            )
-            self.timer.start()
-            self.timer1 = threading.Timer(
-                self._configuration.get_discovery_total_timeout(),
-                self.__new_server_timeout_handler,
-                args=(wait_until,),
+            # the timers may be cancelled after they expired, or replaced by the timers of a later halt, which is checked
+            # before sending the suspects
+            self._halts += 1
+            key = (wait_until, self._halts)
+            self.timer = call_later(self._configuration.get_timeout(), self._deadlines.produce, ("HALT", key))
+            self.timer1 = call_later(
+                self._configuration.get_discovery_total_timeout(), self._deadlines.produce, ("JOIN", key)
             )
-            self.timer1.start()
 
             self._halting_semaphore.acquire()
 
@@ -0,0 +1,44 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.core.utils.metrics import Metrics
+
+
+class VerifiedMessageCache:
+    """
+    Bounded LRU cache of recently received messages, whose signature has already been verified. Entries map a
+    digest of the received datagram to the (sender identifier, seqno) of the message, such that retransmitted
+    copies are recognized before they are parsed or verified again.
+    """
+
+    def __init__(self, capacity: int, metrics: Metrics):
+        self._capacity = capacity
+        self._metrics = metrics
+        self._entries: OrderedDict[bytes, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def lookup(self, data: bytes):
+        key = self.digest(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            self._metrics.increment("cache_hit")
+        else:
+            self._metrics.increment("cache_miss")
+        return entry
+
+    def add(self, data: bytes, identifier: str, seqno: int):
+        key = self.digest(data)
+        with self._lock:
+            self._entries[key] = (identifier, seqno)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
@@ -1,5 +1,8 @@
 from nacl.signing import SigningKey, VerifyKey
-from nacl.exceptions import BadSignatureError
+from nacl._sodium import ffi, lib
+
+from src.protocol.codec import SIGNATURE_SIZE
+
 
 class Signatures:
     def __init__(self, sk: SigningKey, identifier : str):
@@ -9,16 +12,26 @@ class Signatures:
         else:
             self.sk = SigningKey.generate()
 
-    def sign(self, data: bytes):
-        return self.sk.sign(data)
+        # libsodium is called directly, as nacl.signing copies data and signature into a SignedMessage
+        self._secret_key = self.sk._signing_key
+
+    def sign(self, data: bytes) -> bytes:
+        """Returns the signature followed by data"""
+        signed_data = ffi.new("unsigned char[]", len(data) + SIGNATURE_SIZE)
+        signed_len = ffi.new("unsigned long long *")
+        lib.crypto_sign(signed_data, signed_len, data, len(data), self._secret_key)
+
+        return ffi.buffer(signed_data, signed_len[0])[:]
 
-    def check_validity(self, data: bytes, signature: bytes, verify_key: VerifyKey) -> bool:
-        try:
-            verify_key.verify(data, signature)
-        except BadSignatureError as err:
-            print(err)
-            raise err
+    def check_validity(self, signed_data, verify_key: VerifyKey) -> bool:
+        # signed_data (signature followed by the data) is usually a memoryview of the received datagram
+        if signed_data is None or len(signed_data) < SIGNATURE_SIZE:
             return False
 
-        return True
+        data = ffi.new("unsigned char[]", len(signed_data))
+        data_len = ffi.new("unsigned long long *")
+        result = lib.crypto_sign_open(
+            data, data_len, ffi.from_buffer(signed_data), len(signed_data), bytes(verify_key)
+        )
 
+        return result == 0
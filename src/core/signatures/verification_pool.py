@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from src.core.utils.metrics import Metrics
+from src.protocol.envelope import Envelope
+
+
+class VerificationPool:
+    """
+    Verifies the signatures of received envelopes on a bounded pool of worker threads, such that the listener can
+    keep reading its sockets. Valid envelopes are handed back to a single delivery thread in arrival order per
+    sender; invalid envelopes are dropped. Without workers, the delivery thread verifies the envelopes itself, which
+    only moves their processing off the submitting thread.
+    """
+
+    def __init__(self, workers: int, queue_size: int, verify, deliver, metrics: Metrics, drop=None):
+        self._workers = workers
+        self._verify = verify  # verify(envelope) -> bool, called by the workers
+        self._deliver = deliver  # deliver(envelope, *args), called by the delivery thread
+        self._drop = drop  # drop(envelope, *args), called for invalid envelopes
+        self._metrics = metrics
+
+        # the listener blocks if the workers fall behind, instead of buffering an unbounded number of datagrams
+        self._tasks = queue.Queue(queue_size)
+        self._ready = queue.Queue()
+
+        # tasks (envelope, args, valid) in arrival order per sender; valid is None until verified
+        self._pending: dict[str, deque[list]] = {}
+        self._pending_lock = threading.Lock()
+
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+
+        for _ in range(self._workers):
+            worker_thread = threading.Thread(target=self._worker)
+            worker_thread.start()
+
+        delivery_thread = threading.Thread(target=self._delivery)
+        delivery_thread.start()
+
+    def submit(self, envelope: Envelope, *args):
+        self.submit_batch([(envelope, *args)])
+
+    def submit_batch(self, batch: list[tuple]):
+        """Submits the (envelope, *args) tuples of a batch of received datagrams at once"""
+        if self._workers == 0:
+            for envelope, *args in batch:
+                self._ready.put((envelope, tuple(args), None))
+            return
+
+        tasks = []
+        with self._pending_lock:
+            for envelope, *args in batch:
+                sender, _ = envelope.get_signature()
+                if sender is None:
+                    sender = envelope.sender
+
+                task = [envelope, tuple(args), None]
+                if sender not in self._pending:
+                    self._pending[sender] = deque()
+                self._pending[sender].append(task)
+                tasks.append((sender, task))
+
+        for task in tasks:
+            self._tasks.put(task)
+        self._metrics.set_gauge("verify_queue_depth", self._tasks.qsize())
+
+    def _worker(self):
+        while True:
+            sender, task = self._tasks.get()
+
+            start = time.perf_counter()
+            try:
+                valid = self._verify(task[0])
+            except Exception:
+                valid = False
+            self._metrics.observe("verify_latency", time.perf_counter() - start)
+
+            with self._pending_lock:
+                task[2] = valid
+
+                # release all verified envelopes at the head of the sender's queue
+                pending = self._pending[sender]
+                while len(pending) > 0 and pending[0][2] is not None:
+                    envelope, args, valid = pending.popleft()
+                    if valid:
+                        self._ready.put((envelope, args, True))
+                    else:
+                        self._metrics.increment("verify_invalid")
+                        if self._drop is not None:
+                            self._drop(envelope, *args)
+
+                if len(pending) == 0:
+                    del self._pending[sender]
+
+    def _delivery(self):
+        while True:
+            envelope, args, valid = self._ready.get()
+            if valid is None:
+                try:
+                    valid = self._verify(envelope)
+                except Exception:
+                    valid = False
+
+            if valid:
+                self._deliver(envelope, *args)
+            else:
+                self._metrics.increment("verify_invalid")
+                if self._drop is not None:
+                    self._drop(envelope, *args)
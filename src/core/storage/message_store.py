@@ -0,0 +1,144 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# min. number of evicted messages before the list of a MemoryMessageStore is compacted
+COMPACTION_MIN = 1024
+
+
+class MessageStore(ABC):
+    """
+    Messages of one sender, indexed by their sequence number, which are kept for retransmissions (NACKs) and
+    queries of clients. Messages are appended in the order of their sequence numbers. A prefix of stable messages,
+    i.e. messages which were delivered by all servers, can be evicted; evicted messages can not be retransmitted.
+
+    Messages of the same batch share their raw data, which is stored once. Returned messages may be views of the
+    storage (bytes-like), which must not be kept.
+
+    Backends: MemoryMessageStore (default), SegmentMessageStore (see segment_store.py)
+    """
+
+    @abstractmethod
+    def __len__(self):
+        """Sequence number of the next message, including evicted messages"""
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def first_seqno(self):
+        """Sequence number of the first message which is not evicted"""
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def nbytes(self):
+        """Size of the stored messages"""
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def memory_bytes(self):
+        """Size of the messages held in memory"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def start_at(self, seqno: int):
+        """Continues an empty store with seqno, the preceding messages are considered evicted"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def append(self, data: bytes):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, seqno: int):
+        """Returns None if the message is evicted or not received yet"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace(self, seqno: int, data: bytes):
+        raise NotImplementedError
+
+    @abstractmethod
+    def evict(self, stable_seqno: int, policy: "RetentionPolicy"):
+        """Evicts messages up to stable_seqno which are not retained by the policy, returns the number of messages"""
+        raise NotImplementedError
+
+
+class MemoryMessageStore(MessageStore):
+    """
+    Keeps the messages in a list, such that messages are retrieved in O(1). Evicted messages are skipped by an offset
+    into the list and removed once they make up half of the list (amortized O(1) per message)
+    """
+
+    def __init__(self):
+        self._messages: list[bytes] = []
+        self._timestamps: list[float] = []
+        self._head = 0  # index of the first kept message
+        self._first = 0  # sequence number of the first kept message
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._first + len(self._messages) - self._head
+
+    @property
+    def first_seqno(self):
+        return self._first
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    @property
+    def memory_bytes(self):
+        return self._bytes
+
+    def start_at(self, seqno: int):
+        with self._lock:
+            self._first = seqno
+
+    def append(self, data: bytes):
+        with self._lock:
+            if len(self._messages) == self._head or self._messages[-1] is not data:
+                self._bytes += len(data)
+            self._messages.append(data)
+            self._timestamps.append(time.monotonic())
+
+    def get(self, seqno: int):
+        with self._lock:
+            index = seqno - self._first + self._head
+            if seqno < self._first or index >= len(self._messages):
+                return None
+            return self._messages[index]
+
+    def replace(self, seqno: int, data: bytes):
+        with self._lock:
+            index = seqno - self._first + self._head
+            if seqno >= self._first and index < len(self._messages):
+                self._bytes += len(data) - len(self._messages[index])
+                self._messages[index] = data
+
+    def evict(self, stable_seqno: int, policy: "RetentionPolicy"):
+        evicted = 0
+        now = time.monotonic()
+        with self._lock:
+            messages = self._messages
+            while self._first <= stable_seqno and self._head < len(messages):
+                if policy.retains(len(messages) - self._head, self._bytes, now - self._timestamps[self._head]):
+                    break
+
+                data = messages[self._head]
+                messages[self._head] = None
+                self._head += 1
+                if self._head == len(messages) or messages[self._head] is not data:
+                    self._bytes -= len(data)
+                self._first += 1
+                evicted += 1
+
+            if self._head >= COMPACTION_MIN and 2 * self._head >= len(messages):
+                del messages[: self._head]
+                del self._timestamps[: self._head]
+                self._head = 0
+        return evicted
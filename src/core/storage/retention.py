@@ -0,0 +1,27 @@
+class RetentionPolicy:
+    """
+    Limits of the stored messages of a sender. Stable messages are evicted, oldest first, while one of the limits is
+    exceeded. A limit of None is unbounded; without any limit, all messages are retained.
+    """
+
+    def __init__(self, max_count: int = None, max_bytes: int = None, max_age: float = None):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @property
+    def bounded(self):
+        return self.max_count is not None or self.max_bytes is not None or self.max_age is not None
+
+    def retains(self, count: int, nbytes: int, oldest_age: float):
+        """Whether the oldest of count messages (nbytes in total) is retained"""
+        return (
+            (self.max_count is None or count <= self.max_count)
+            and (self.max_bytes is None or nbytes <= self.max_bytes)
+            and (self.max_age is None or oldest_age <= self.max_age)
+        )
+
+    @classmethod
+    def initFromConfiguration(cls, configuration, port: int):
+        retention = configuration.get_retention(port)
+        return cls(retention.get("max_count"), retention.get("max_bytes"), retention.get("max_age"))
@@ -0,0 +1,185 @@
+import bisect
+from array import array
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+from src.core.storage.message_store import MessageStore
+
+
+class _Segment:
+    """
+    Append-only data file of a segment, mapped into memory, and its index of the offsets and lengths of the messages
+    (one per sequence number, starting with first_seqno). The data file is allocated with its full size on creation.
+    The index is only kept in memory, since the directory of a store is cleared on start.
+    """
+
+    def __init__(self, directory: str, first_seqno: int, size: int):
+        self.first_seqno = first_seqno
+        self.data_path = os.path.join(directory, "{:012d}.log".format(first_seqno))
+
+        fd = os.open(self.data_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+        try:
+            os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.view = memoryview(self.map)
+        self.size = size
+        self.end = 0  # end of the written data
+
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.last_appended = time.monotonic()  # time of the newest message
+
+    @property
+    def last_seqno(self):
+        return self.first_seqno + len(self.offsets) - 1
+
+    @property
+    def count(self):
+        return len(self.offsets)
+
+    def write(self, data):
+        offset = self.end
+        self.view[offset : offset + len(data)] = data
+        self.end += len(data)
+        self.add_record(offset, len(data))
+
+    def add_record(self, offset: int, length: int):
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.last_appended = time.monotonic()
+
+    def read(self, seqno: int):
+        offset = self.offsets[seqno - self.first_seqno]
+        return self.view[offset : offset + self.lengths[seqno - self.first_seqno]]
+
+    def remove(self):
+        # the mapping stays valid for views which are still in use, it is unmapped once they are released
+        os.remove(self.data_path)
+
+
+class SegmentMessageStore(MessageStore):
+    """
+    Disk-backed store of the messages of a sender. Messages are appended to segment files of segment_size bytes,
+    which are read through mmap, i.e. stored messages are returned as views of the file instead of copies. The last
+    tail_size messages are additionally kept in memory, since NACKs mostly request recent messages.
+
+    Stable messages are evicted per segment: a segment is deleted once all of its messages are stable and the
+    retention policy is exceeded by its newest message.
+    """
+
+    def __init__(self, directory: str, segment_size: int, tail_size: int):
+        self._directory = directory
+        self._segment_size = segment_size
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+        self._segments: list[_Segment] = []
+        self._first_seqnos: list[int] = []
+        self._next = 0
+        self._bytes = 0
+
+        self._tail: deque[bytes] = deque(maxlen=tail_size)
+        self._last_appended = None
+        self._tail_bytes = 0
+        self._replaced: dict[int, bytes] = {}  # replaced messages are kept in memory
+        self._last_read = (None, None)  # ((segment, offset), view), such that a batch is returned as one view
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._next
+
+    @property
+    def first_seqno(self):
+        with self._lock:
+            return self._segments[0].first_seqno if len(self._segments) > 0 else self._next
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    @property
+    def memory_bytes(self):
+        return self._tail_bytes + sum(len(data) for data in list(self._replaced.values()))
+
+    def _new_segment(self, min_size: int):
+        segment = _Segment(self._directory, self._next, max(self._segment_size, min_size))
+        self._segments.append(segment)
+        self._first_seqnos.append(segment.first_seqno)
+        return segment
+
+    def start_at(self, seqno: int):
+        with self._lock:
+            self._next = seqno
+
+    def append(self, data: bytes):
+        with self._lock:
+            segment = self._segments[-1] if len(self._segments) > 0 else None
+            if data is self._last_appended and segment is not None and segment.count > 0:
+                # message of the same batch as the previous message
+                segment.add_record(segment.offsets[-1], segment.lengths[-1])
+            else:
+                if segment is None or segment.end + len(data) > segment.size:
+                    segment = self._new_segment(len(data))
+                segment.write(data)
+                self._bytes += len(data)
+
+            if self._tail.maxlen > 0:
+                if len(self._tail) == self._tail.maxlen:
+                    oldest = self._tail.popleft()
+                    if len(self._tail) == 0 or self._tail[0] is not oldest:
+                        self._tail_bytes -= len(oldest)
+                if data is not self._last_appended:
+                    self._tail_bytes += len(data)
+                self._tail.append(data)
+            self._last_appended = data
+            self._next += 1
+
+    def get(self, seqno: int):
+        with self._lock:
+            if seqno in self._replaced:
+                return self._replaced[seqno]
+            if seqno >= self._next or len(self._segments) == 0 or seqno < self._segments[0].first_seqno:
+                return None
+            if seqno >= self._next - len(self._tail):
+                return self._tail[seqno - self._next + len(self._tail)]
+
+            segment = self._segments[bisect.bisect_right(self._first_seqnos, seqno) - 1]
+            record = (segment, segment.offsets[seqno - segment.first_seqno])
+            if self._last_read[0] != record:
+                self._last_read = (record, segment.read(seqno))
+            return self._last_read[1]
+
+    def replace(self, seqno: int, data: bytes):
+        with self._lock:
+            if len(self._segments) > 0 and self._segments[0].first_seqno <= seqno < self._next:
+                self._replaced[seqno] = data
+
+    def evict(self, stable_seqno: int, policy: "RetentionPolicy"):
+        evicted = 0
+        now = time.monotonic()
+        with self._lock:
+            # the active segment is never evicted
+            while len(self._segments) > 1 and self._segments[0].last_seqno <= stable_seqno:
+                segment = self._segments[0]
+                count = self._next - segment.first_seqno
+                if policy.retains(count, self._bytes, now - segment.last_appended):
+                    break
+
+                segment.remove()
+                self._segments.pop(0)
+                self._first_seqnos.pop(0)
+                self._bytes -= segment.end
+                evicted += segment.count
+                for seqno in [seqno for seqno in self._replaced if seqno <= segment.last_seqno]:
+                    del self._replaced[seqno]
+                if self._last_read[0] is not None and self._last_read[0][0] is segment:
+                    self._last_read = (None, None)
+        return evicted
@@ -0,0 +1,40 @@
+import os
+from urllib.parse import quote
+
+from src.core.storage.message_store import MessageStore, MemoryMessageStore
+from src.core.storage.segment_store import SegmentMessageStore
+
+
+def directory_name(identifier: str) -> str:
+    # escapes all characters except letters, digits and "_-~", such that distinct identifiers never share a directory
+    return quote(identifier, safe="").replace(".", "%2E")
+
+
+class Storage:
+    """Creates the message stores of the senders of a multicast group with the configured backend"""
+
+    MEMORY = "memory"
+    SEGMENTS = "segments"
+
+    def __init__(self, backend: str = MEMORY, directory: str = None, segment_size: int = 0, tail_size: int = 0):
+        self._backend = backend
+        self._directory = directory
+        self._segment_size = segment_size
+        self._tail_size = tail_size
+
+    def create(self, identifier: str) -> MessageStore:
+        if self._backend == Storage.SEGMENTS:
+            directory = os.path.join(self._directory, directory_name(identifier))
+            return SegmentMessageStore(directory, self._segment_size, self._tail_size)
+        return MemoryMessageStore()
+
+    @classmethod
+    def initFromConfiguration(cls, configuration, identifier: str, port: int):
+        # each process stores the messages of each group in its own directory
+        backend = configuration.get_storage_backend()
+        directory = os.path.join(
+            configuration.get_storage_path(),
+            directory_name(identifier),
+            directory_name(configuration.get_multicast_group(port) or str(port)),
+        )
+        return cls(backend, directory, configuration.get_segment_size(), configuration.get_storage_tail_size())
@@ -0,0 +1,192 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Records of the log:
+#     length of the body (4 bytes) | crc32 of the body, seeded with the kind (4 bytes) | kind (1 byte) | body
+# MESSAGE: port (2 bytes) | seqno (8 bytes) | length of the sender (2 bytes) | sender | raw data
+#          (empty raw data: the message shares the raw data of the previous message, i.e. its batch)
+# VIEW:    group view as JSON
+# REPLACE: as MESSAGE, new raw data of a message which was logged before
+MESSAGE = 1
+VIEW = 2
+REPLACE = 3
+
+_header = struct.Struct("<IIB")
+_message = struct.Struct("<HQH")
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class WriteAheadLog:
+    """
+    Durable log of the delivered messages and view changes of a server, which is split into files of about
+    segment_size bytes. Records are written when they occur, such that they survive a crash of the process, and
+    are synced to disk every sync_interval seconds. A checkpoint stores the state which is not contained in the log
+    (e.g. ordering counters) together with the position of the log; files whose messages are all evicted are
+    removed with the next checkpoint.
+    """
+
+    def __init__(self, directory: str, segment_size: int, sync_interval: float):
+        self._directory = directory
+        self._segment_size = segment_size
+        self._sync_interval = sync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_number = -1
+        self._file_size = 0
+        self._last_sync = time.monotonic()
+        self._last_data = None
+
+        # max sequence number of each (port, sender) per file, to decide which files are obsolete
+        self._max_seqnos: dict[int, dict[tuple[int, str], int]] = {}
+
+    def _path(self, number: int):
+        return os.path.join(self._directory, "{:012d}.wal".format(number))
+
+    def _files(self):
+        return sorted(int(name[:-4]) for name in os.listdir(self._directory) if name.endswith(".wal"))
+
+    def _open_next_file(self):
+        # requires _lock
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._file_number += 1
+        self._file = open(self._path(self._file_number), "ab", buffering=0)
+        self._file_size = 0
+        self._max_seqnos[self._file_number] = {}
+        self._last_data = None
+
+    def _write(self, kind: int, body: bytes):
+        # requires _lock
+        if self._file is None or self._file_size >= self._segment_size:
+            self._open_next_file()
+
+        record = _header.pack(len(body), zlib.crc32(body, kind), kind) + body
+        self._file.write(record)
+        self._file_size += len(record)
+
+        if time.monotonic() - self._last_sync >= self._sync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+
+    def append_message(self, port: int, sender: str, seqno: int, data: bytes, replace: bool = False):
+        sender_bytes = sender.encode("utf-8")
+        with self._lock:
+            shared = data is self._last_data and self._file is not None and self._file_size < self._segment_size
+            body = _message.pack(port, seqno, len(sender_bytes)) + sender_bytes + (b"" if shared else bytes(data))
+            self._write(REPLACE if replace else MESSAGE, body)
+            self._last_data = data
+            max_seqnos = self._max_seqnos[self._file_number]
+            max_seqnos[(port, sender)] = max(seqno, max_seqnos.get((port, sender), -1))
+
+    def append_view(self, view: dict):
+        with self._lock:
+            self._write(VIEW, json.dumps(view).encode("utf-8"))
+
+    def checkpoint(self, get_state):
+        """
+        Stores the state returned by get_state, a tuple of the state and the first (not evicted) sequence number of
+        each (port, sender), and removes obsolete files. The position of the log is taken before the state, such that
+        view records which are not covered by the state are replayed.
+        """
+        with self._lock:
+            if self._file is None:
+                self._open_next_file()
+            log = [self._file_number, self._file_size]
+
+        state, first_seqnos = get_state()
+        path = os.path.join(self._directory, CHECKPOINT_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(dict(state, log=log), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        with self._lock:
+            # a file is obsolete once all of its messages are evicted; view records are covered by the checkpoint
+            for number in list(self._max_seqnos.keys()):
+                if number < log[0] and all(
+                    seqno < first_seqnos.get(key, 0) for key, seqno in self._max_seqnos[number].items()
+                ):
+                    os.remove(self._path(number))
+                    del self._max_seqnos[number]
+
+    def recover(self):
+        """
+        Reads the checkpoint (None if there is none) and the records of the log, and continues the log with a new
+        file. Returns the checkpoint, the messages (port, sender, seqno, data) in log order, with the data of replaced
+        messages substituted, and the view records written after the checkpoint. A torn record at the end of a file is
+        discarded.
+        """
+        checkpoint = None
+        path = os.path.join(self._directory, CHECKPOINT_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                checkpoint = json.load(f)
+
+        messages, views = [], []
+        for number in self._files():
+            self._max_seqnos[number] = {}
+            for offset, kind, body in self._read_file(number):
+                if kind == MESSAGE or kind == REPLACE:
+                    port, seqno, sender_length = _message.unpack_from(body)
+                    sender = body[_message.size : _message.size + sender_length].decode("utf-8")
+                    data = body[_message.size + sender_length :]
+                    if len(data) == 0 and len(messages) > 0:
+                        data = messages[-1][3]
+                    if kind == REPLACE:
+                        self._replace(messages, (port, sender, seqno, data))
+                    else:
+                        messages.append((port, sender, seqno, data))
+                    max_seqnos = self._max_seqnos[number]
+                    max_seqnos[(port, sender)] = max(seqno, max_seqnos.get((port, sender), -1))
+                elif kind == VIEW and (checkpoint is None or [number, offset] >= checkpoint["log"]):
+                    views.append(json.loads(body))
+            self._file_number = number
+
+        with self._lock:
+            self._open_next_file()
+        return checkpoint, messages, views
+
+    @staticmethod
+    def _replace(messages: list, message: tuple):
+        # replacements follow shortly after the replaced message
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i][:3] == message[:3]:
+                messages[i] = message
+                return
+        messages.append(message)
+
+    def _read_file(self, number: int):
+        with open(self._path(number), "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + _header.size <= len(data):
+            length, crc, kind = _header.unpack_from(data, offset)
+            body = data[offset + _header.size : offset + _header.size + length]
+            if len(body) < length or zlib.crc32(body, kind) != crc:
+                break
+            yield offset, kind, body
+            offset += _header.size + length
+
+        if offset < len(data):
+            # the process crashed while writing the record
+            with open(self._path(number), "r+b") as f:
+                f.truncate(offset)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
@@ -1,11 +1,13 @@
 import socket
 import threading
-import time
 import random 
 import string
 
 from src.core.utils.configuration import Configuration
 from src.core.unicast.tcp_sender import TCPUnicastSender
+from src.core.fragmentation.fragmentation import Fragmenter, Reassembler
+from src.core.engine.engine import TransportEngine
+from src.core.utils.timer_wheel import call_later
 from src.protocol.base import Message
 
 
@@ -13,80 +15,98 @@ class UnicastSender:
     def __init__(self, configuration: Configuration, sending_socket=None):
         self._configuration = configuration
         self._storage = {}
-        self._storage_semaphore = threading.Semaphore(0)
+
+        self._mtu = self._configuration.get_mtu()
+        self._fragmenter = Fragmenter(self._mtu)
+        self._reassembler = Reassembler.initFromConfiguration(self._configuration)
 
         if sending_socket is None:
             self.upd_sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         else:
             self.upd_sender = sending_socket
 
-    def _ack_sender(self):
-        while True:
-            with self._storage_semaphore:
-                ts = time.time_ns() / 10 ** 9
-                remove_list = []
-                nonce_list = list(self._storage.keys()).copy()
-                for nonce in nonce_list:
-                    if ts - self._storage[nonce][2] > 5 * self._configuration.get_heartbeat_interval():
-                        remove_list.append(nonce)
-                    self.upd_sender.sendto(self._storage[nonce][0].encode(), self._storage[nonce][1])
-
-                for nonce in remove_list:
-                    del self._storage[nonce]
+    def _retransmit(self, nonce, raw_data, addr, retries):
+        # resent every heartbeat interval until it is acknowledged, at most 5 times
+        if self._storage.get(nonce) is not raw_data:
+            return
 
-            time.sleep(self._configuration.get_heartbeat_interval())
+        self._fragmenter.sendto(self.upd_sender, raw_data, addr)
+        if retries > 1:
+            call_later(self._configuration.get_heartbeat_interval(), self._retransmit, nonce, raw_data, addr, retries - 1)
+        else:
+            del self._storage[nonce]
 
     def _ack_listener(self):
         while True:
-            data, _ = self.upd_sender.recvfrom(1024)
+            data, addr = self.upd_sender.recvfrom(self._mtu)
+            self._receive_ack(data, addr)
+
+    def _receive_available_acks(self):
+        # called by the engine if the socket is readable
+        while True:
+            try:
+                data, addr = self.upd_sender.recvfrom(self._mtu, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+            self._receive_ack(data, addr)
+
+    def _receive_ack(self, data, addr):
+        data = self._reassembler.add(data, addr)
+        if data is None:
+            return
 
-            msg = Message.initFromJSON(data)
-            msg.decode()
+        msg = Message.initFromBytes(data)
+        msg.decode()
 
-            if msg.has_nonce:
-                if msg.get_nonce() in self._storage:
-                    self._storage_semaphore.acquire()
-                    del self._storage[msg.get_nonce()]
+        if msg.has_nonce:
+            self._storage.pop(msg.get_nonce(), None)
 
-    def start(self):
-        ack_sender_thread = threading.Thread(target=self._ack_sender)
-        ack_sender_thread.start()
+    def start(self, engine: TransportEngine = None):
+        if engine is not None:
+            engine.add_reader(self.upd_sender, self._receive_available_acks)
+            return
 
         ack_listener_thread = threading.Thread(target=self._ack_listener)
         ack_listener_thread.start()
 
     def send_udp(self, msg: Message, addr: tuple[str, int], response_id: str):
         msg.encode()
-        self.upd_sender.sendto(msg.json_data.encode(), addr)
-        ts = time.time_ns() / 10 ** 9
-        self._storage[response_id] = [msg.json_data, addr, ts]
-        self._storage_semaphore.release()
+        self._storage[response_id] = msg.raw_data
+        self._fragmenter.sendto(self.upd_sender, msg.raw_data, addr)
+        call_later(self._configuration.get_heartbeat_interval(), self._retransmit, response_id, msg.raw_data, addr, 5)
 
     def send_udp_without_ack(self, msg: Message, addr: tuple[str, int]):
         msg.encode()
-        self.upd_sender.sendto(msg.json_data.encode(), addr)
+        self._fragmenter.sendto(self.upd_sender, msg.raw_data, addr)
+
+    def send_udp_raw(self, raw_data: bytes, addr: tuple[str, int]):
+        self._fragmenter.sendto(self.upd_sender, raw_data, addr)
 
     def send_udp_sync(self, msg: Message, addr: tuple[str, int]):
         nonce = "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(10))
         msg.set_nonce(nonce)
         msg.encode()
 
-        self.upd_sender.sendto(str(msg.json_data).encode(), addr)
+        self._fragmenter.sendto(self.upd_sender, msg.raw_data, addr)
         self.upd_sender.settimeout(self._configuration.get_heartbeat_interval())
 
         k = 5
         while k > 0:
             try:
-                data, _ = self.upd_sender.recvfrom(1024)
+                data, response_addr = self.upd_sender.recvfrom(self._mtu)
             except socket.timeout:
-                self.upd_sender.sendto(str(msg.json_data).encode(), addr)
+                self._fragmenter.sendto(self.upd_sender, msg.raw_data, addr)
                 k -= 1
             else:
-                msg = Message.initFromJSON(data)
-                msg.decode()
+                data = self._reassembler.add(data, response_addr)
+                if data is None:
+                    continue
+
+                response = Message.initFromBytes(data)
+                response.decode()
 
-                if msg.has_nonce:
-                    if msg.get_nonce() == nonce:
+                if response.has_nonce:
+                    if response.get_nonce() == nonce:
                         return True 
         return False
 
@@ -94,4 +114,4 @@ class UnicastSender:
     def send_tcp(self, msg: Message, addr: tuple[str, int]):
         msg.encode()
         tcp_sender = TCPUnicastSender(addr)
-        tcp_sender.send(msg.json_data.encode())
+        tcp_sender.send(msg.raw_data)
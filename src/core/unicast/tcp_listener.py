@@ -36,7 +36,7 @@ class TCPUnicastListener:
         msglen = struct.unpack(">I", raw_msglen)[0]
         # Read the message data
         message = self.recvall(conn, msglen)
-        return str(message.decode())
+        return bytes(message)
 
     def recvall(self, conn, n):
         # Helper function to recv n bytes or return None if EOF is hit
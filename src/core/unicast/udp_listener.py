@@ -2,13 +2,26 @@ import socket
 import threading
 
 from src.core.utils.channel import Channel
+from src.core.utils.configuration import Configuration
+from src.core.fragmentation.fragmentation import Reassembler
+from src.core.utils.buffer_pool import BufferPool
+from src.core.engine.engine import TransportEngine
 from src.protocol.base import Message
+from src.protocol.envelope import Envelope
 
 class UDPUnicastListener:
     def __init__(
-        self, channel: Channel, listener: socket.socket = None, listening_port: int = 0
+        self,
+        channel: Channel,
+        configuration: Configuration,
+        listener: socket.socket = None,
+        listening_port: int = 0,
+        engine: TransportEngine = None,
     ):
         self._request_channel = channel
+        self._engine = engine
+        self._reassembler = Reassembler.initFromConfiguration(configuration)
+        self._buffer_pool = BufferPool.initFromConfiguration(configuration)
         if not listener:
             self._listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self._listener.bind(("", listening_port))  # bind to available port
@@ -19,33 +32,48 @@ class UDPUnicastListener:
         return self._listener.getsockname()[1]
 
     def start(self):
-        listening_thread = threading.Thread(target=self._listen)
-        listening_thread.start()
+        if self._engine is not None:
+            self._engine.add_reader(self._listener, self._receive_available)
+        else:
+            listening_thread = threading.Thread(target=self._listen)
+            listening_thread.start()
 
     def _listen(self):
         while True:
-            data, addr = self._listener.recvfrom(1024)
-            data = data.decode()
-
-            # handle acks 
-            msg = Message.initFromJSON(data)
-            try:
-                msg.decode()
-            except Exception as err:
-                print("ERROR", data)
-                print("ERROR", err)
-            else:
-                msg.set_sender(addr)
-                msg.encode()
-
-                if "Ping" not in msg.header:
-                    # write data to channel to be consumed by db_server
-                    self._request_channel.produce(msg.json_data)
-
-
-                if msg.has_nonce and msg.header != "ACK":
-                    response = Message.initFromData("ACK", meta={"nonce": msg.get_nonce()})
-                    response.encode()
-                    self._listener.sendto(response.json_data.encode(), addr)
+            self._receive()
+
+    def _receive_available(self):
+        # called by the engine if the socket is readable
+        try:
+            while True:
+                self._receive(socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            pass
+
+    def _receive(self, flags: int = 0):
+        buffer, data, addr = self._buffer_pool.recvfrom(self._listener, flags)
+        data = self._reassembler.add(data, addr)
+        if data is None:
+            self._buffer_pool.release(buffer)
+            return
+
+        # handle acks 
+        try:
+            envelope = Envelope.initFromBytes(data, addr)
+        except Exception as err:
+            print("ERROR", bytes(data))
+            print("ERROR", err)
+        else:
+            if "Ping" not in envelope.header:
+                # write data to channel to be consumed by db_server
+                self._request_channel.produce(envelope.detach())
+
+
+            if "nonce" in envelope.meta and envelope.header != "ACK":
+                response = Message.initFromData("ACK", meta={"nonce": envelope.meta["nonce"]})
+                response.encode()
+                self._listener.sendto(response.raw_data, addr)
+
+        self._buffer_pool.release(buffer)
 
 
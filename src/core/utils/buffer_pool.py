@@ -0,0 +1,53 @@
+import socket
+from collections import deque
+
+from src.core.utils.metrics import Metrics
+
+
+class BufferPool:
+    """
+    Ring of preallocated receive buffers. Datagrams are read into a buffer with recvfrom_into and passed on as a
+    memoryview of the buffer, such that dropped datagrams (duplicates, heartbeats, invalid signatures, ...) are never
+    copied. Messages which are kept have to be detached from their buffer (see Envelope.detach) before the buffer is
+    released. If all buffers are in use, a new buffer is allocated, which is kept only while the pool is not full.
+    With count 0, the pool is disabled and datagrams are received as bytes by recvfrom (buffer None).
+
+    Buffers are kept as memoryviews, such that slicing a received datagram does not create another view. Buffers
+    are released by the listener and the delivery thread of the verification pool; deque operations are atomic.
+    """
+
+    def __init__(self, count: int, size: int, metrics: Metrics = None):
+        self._count = count
+        self._size = size
+        self._metrics = metrics if metrics is not None else Metrics()
+
+        self._buffers = deque(memoryview(bytearray(size)) for _ in range(count))
+
+    def acquire(self) -> memoryview:
+        try:
+            return self._buffers.popleft()
+        except IndexError:
+            self._metrics.increment("buffer_pool_misses")
+            return memoryview(bytearray(self._size))
+
+    def release(self, buffer: memoryview):
+        if buffer is not None and len(self._buffers) < self._count:
+            self._buffers.append(buffer)
+
+    def recvfrom(self, sock: socket.socket, flags: int = 0):
+        """Returns the buffer, a memoryview of the received datagram and the address of its sender"""
+        if self._count == 0:
+            data, addr = sock.recvfrom(self._size, flags)
+            return None, data, addr
+
+        buffer = self.acquire()
+        try:
+            n, addr = sock.recvfrom_into(buffer, 0, flags)
+        except OSError:
+            self.release(buffer)
+            raise
+        return buffer, buffer[:n], addr
+
+    @classmethod
+    def initFromConfiguration(cls, configuration, metrics: Metrics = None):
+        return cls(configuration.get_receive_buffer_count(), configuration.get_mtu(), metrics)
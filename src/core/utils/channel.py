@@ -1,41 +1,142 @@
 import threading
+from collections import deque
 
+# number of removed topics which are remembered, such that late messages do not create them again
+REMOVED_TOPICS = 1024
 
-class Channel:
+
+class _Topic:
     def __init__(self):
-        self._semaphores = {"": threading.Semaphore(0)}
-        self._locks = {"": threading.Lock()}
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+        self.produced = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+
+class Channel:
+    """
+    FIFO queues of messages, one per topic. Topics are created on first use and can be removed by their consumer.
+    Messages produced for a recently removed topic are dropped.
+
+    A channel is unbounded by default. With a capacity, produce either blocks until a message of the topic is consumed
+    (BLOCK) or drops the message (DROP) if the queue of the topic is full. Producers which must not block (e.g. the
+    loop thread of the transport engine) must not use a blocking channel with a capacity.
+    """
+
+    BLOCK = "block"
+    DROP = "drop"
+
+    def __init__(self, capacity: int = 0, policy: str = BLOCK):
+        self._capacity = capacity
+        self._policy = policy
         self._config_lock = threading.Lock()
-        self._topic_queues = {"": []}
+        self._topics: dict[str, _Topic] = {"": _Topic()}
+        self._removed: set[str] = set()
+        self._removed_order: deque[str] = deque()
         self._trash = False
 
+    def _get_topic(self, topic) -> _Topic:
+        try:
+            return self._topics[topic]
+        except KeyError:
+            with self._config_lock:
+                if topic not in self._topics:
+                    self._topics[topic] = _Topic()
+                return self._topics[topic]
+
     def create_topic(self, topic):
         with self._config_lock:
-            if topic not in self._topic_queues:
-                self._topic_queues[topic] = []
-                self._locks[topic] = threading.Lock()
-                self._semaphores[topic] = threading.Semaphore(0)
+            self._removed.discard(topic)
+        self._get_topic(topic)
+
+    def remove_topic(self, topic):
+        """Removes the topic and its pending messages. The topic must not be consumed concurrently"""
+        if topic != "":
+            with self._config_lock:
+                self._topics.pop(topic, None)
+                if topic not in self._removed:
+                    self._removed.add(topic)
+                    self._removed_order.append(topic)
+                    if len(self._removed_order) > REMOVED_TOPICS:
+                        self._removed.discard(self._removed_order.popleft())
 
     def produce(self, msg, topic="", trash=False):
-        if not self._trash:
-            if topic != "" and topic not in self._topic_queues:
-                self.create_topic(topic)
-            with self._locks[topic]:
-                self._topic_queues[topic].append((msg, trash))
-                self._semaphores[topic].release()
+        """Returns False if the message is dropped"""
+        if self._trash:
+            return False
+
+        t = self._topics.get(topic)
+        if t is None:
+            with self._config_lock:
+                if topic in self._removed:
+                    return False
+                t = self._topics.setdefault(topic, _Topic())
+        with t.lock:
+            if self._capacity > 0:
+                if self._policy == Channel.DROP and len(t.queue) >= self._capacity:
+                    t.dropped += 1
+                    return False
+                while len(t.queue) >= self._capacity:
+                    t.not_full.wait()
+
+            t.queue.append(msg)
+            t.produced += 1
+            if len(t.queue) > t.max_depth:
+                t.max_depth = len(t.queue)
+            t.not_empty.notify()
+        return True
 
     def consume(self, topic=""):
-        self._semaphores[topic].acquire()
-        with self._locks[topic]:
-            msg = self._topic_queues[topic].pop(0)[0]
+        t = self._get_topic(topic)
+        with t.lock:
+            while not t.queue:
+                t.not_empty.wait()
+            msg = t.queue.popleft()
+            t.consumed += 1
+            if self._capacity > 0:
+                t.not_full.notify()
         return msg
 
+    def consume_many(self, max_n: int, timeout: float = None, topic=""):
+        """
+        Waits until a message is available (at most timeout seconds) and returns up to max_n messages. Returns an
+        empty list on timeout.
+        """
+        t = self._get_topic(topic)
+        with t.lock:
+            if not t.queue and not t.not_empty.wait_for(lambda: t.queue, timeout):
+                return []
+            n = min(max_n, len(t.queue))
+            msgs = [t.queue.popleft() for _ in range(n)]
+            t.consumed += n
+            if self._capacity > 0:
+                t.not_full.notify(n)
+        return msgs
+
     def is_empty(self, topic=""):
-        with self._locks[topic]:
-            size = len(self._topic_queues[topic])
-        return size == 0
+        return len(self._get_topic(topic).queue) == 0
 
-    def set_trash_flag(self, flag : bool):
+    def set_trash_flag(self, flag: bool):
         self._trash = flag
 
+    def get_metrics(self):
+        """Depth and throughput of each topic"""
+        with self._config_lock:
+            topics = list(self._topics.items())
 
+        metrics = {}
+        for name, t in topics:
+            with t.lock:
+                metrics[name] = {
+                    "depth": len(t.queue),
+                    "depth_max": t.max_depth,
+                    "produced": t.produced,
+                    "consumed": t.consumed,
+                    "dropped": t.dropped,
+                }
+        return metrics
@@ -44,9 +44,149 @@ class Configuration:
     def get_heartbeat_interval(self):
         return self.data["heartbeat"]["interval"]
 
+    def get_heartbeat_adaptive(self):
+        return self.data["heartbeat"]["adaptive"]
+
+    def get_heartbeat_min_interval(self):
+        return self.data["heartbeat"]["min_interval"]
+
+    def get_heartbeat_max_interval(self):
+        return self.data["heartbeat"]["max_interval"]
+
+    def get_ack_vector_full_interval(self):
+        return self.data["ack_vectors"]["full_interval"]
+
+    def get_heartbeat_full_interval(self):
+        return self.data["ack_vectors"]["heartbeat_full_interval"]
+
+    def get_direct_dependencies(self, port):
+        return self.data["ack_vectors"]["direct_dependencies"].get(self.get_multicast_group(port), False)
+
     def get_timeout(self):
         return self.data["crash_fault_detection"]["timeout"]
 
+    def get_codec(self):
+        return self.data["codec"]["format"]
+
+    def get_multicast_group(self, port):
+        groups = {
+            self.get_client_read_multicast_port(): "client_read",
+            self.get_client_write_multicast_port(): "client_write",
+            self.get_announcement_multicast_port(): "announcement",
+            self.get_consensus_multicast_port(): "consensus",
+        }
+        return groups.get(port, "")
+
+    def get_verification_workers(self, port):
+        # 0 disables the verification stage, i.e. signatures are verified by the listener itself
+        return self.data["verification"]["workers"].get(self.get_multicast_group(port), 0)
+
+    def get_verification_queue_size(self):
+        return self.data["verification"]["queue_size"]
+
+    def get_verified_cache_size(self):
+        return self.data["verification"]["cache_size"]
+
+    def get_batching(self, port):
+        return self.data["batching"]["groups"].get(self.get_multicast_group(port), False)
+
+    def get_batch_window(self):
+        return self.data["batching"]["window"]
+
+    def get_batch_max_size(self):
+        return self.data["batching"]["max_size"]
+
+    def get_batch_max_messages(self):
+        return self.data["batching"]["max_messages"]
+
+    def get_fec(self, port):
+        return self.data["fec"]["groups"].get(self.get_multicast_group(port), False)
+
+    def get_fec_k(self):
+        return self.data["fec"]["k"]
+
+    def get_fec_window(self):
+        return self.data["fec"]["window"]
+
+    def get_flow_control(self, port):
+        return self.data["flow_control"]["groups"].get(self.get_multicast_group(port), False)
+
+    def get_flow_control_window(self):
+        return self.data["flow_control"]["window"]
+
+    def get_flow_control_max_rate(self):
+        return self.data["flow_control"]["max_rate"]
+
+    def get_flow_control_min_rate(self):
+        return self.data["flow_control"]["min_rate"]
+
+    def get_flow_control_burst(self):
+        return self.data["flow_control"]["burst"]
+
+    def get_mtu(self):
+        return self.data["fragmentation"]["mtu"]
+
+    def get_fragment_timeout(self):
+        return self.data["fragmentation"]["timeout"]
+
+    def get_max_message_size(self):
+        return self.data["fragmentation"]["max_message_size"]
+
+    def get_reassembly_buffer_size(self):
+        return self.data["fragmentation"]["buffer_size"]
+
+    def get_receive_buffer_count(self):
+        return self.data["receive_buffers"]["count"]
+
+    def get_receive_batch_limit(self):
+        return self.data["receive_buffers"]["batch_limit"]
+
+    def get_storage_backend(self):
+        return self.data["storage"]["backend"]
+
+    def get_storage_path(self):
+        return self.data["storage"]["path"]
+
+    def get_segment_size(self):
+        return self.data["storage"]["segment_size"]
+
+    def get_storage_tail_size(self):
+        return self.data["storage"]["tail_size"]
+
+    def get_recovery_enabled(self):
+        return self.data["recovery"]["enabled"]
+
+    def get_recovery_path(self):
+        return self.data["recovery"]["path"]
+
+    def get_recovery_segment_size(self):
+        return self.data["recovery"]["segment_size"]
+
+    def get_recovery_sync_interval(self):
+        return self.data["recovery"]["sync_interval"]
+
+    def get_checkpoint_interval(self):
+        return self.data["recovery"]["checkpoint_interval"]
+
+    def get_repair_multicast(self):
+        return self.data["repair"]["multicast"]
+
+    def get_nack_delay(self):
+        return self.data["repair"]["nack_delay"]
+
+    def get_repair_holdoff(self):
+        return self.data["repair"]["holdoff"]
+
+    def get_state_transfer_enabled(self):
+        return self.data["state_transfer"]["enabled"]
+
+    def get_state_transfer_timeout(self):
+        return self.data["state_transfer"]["timeout"]
+
+    def get_retention(self, port):
+        # limits of stored messages per sender, stable messages beyond them are evicted (see RetentionPolicy)
+        return self.data["storage"]["retention"].get(self.get_multicast_group(port), {})
+
     def get_client_polling(self):
         return self.data["client"]["polling_rate"]
 
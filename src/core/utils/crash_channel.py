@@ -11,14 +11,12 @@ class CrashChannel(Channel):
         self._prob = prob
 
     def consume(self, topic=""):
-        self._semaphores[topic].acquire()
-        with self._locks[topic]:
-            msg = self._topic_queues[topic].pop(0)
-        
-        if self._p.match(msg):
+        msg = super().consume(topic)
+
+        if msg is not None and hasattr(msg, "header") and self._p.match(msg.header):
             v = np.random.random_sample()
             if v <= self._prob:
-                print("exit on", msg)
+                print("exit on", msg.header)
                 sys.exit(1)
 
-        return msg
\ No newline at end of file
+        return msg
@@ -0,0 +1,48 @@
+import threading
+
+
+class Metrics:
+    """Thread-safe counters, gauges and latency measurements of a component"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, list[int, int]] = {}  # name -> [current value, max value]
+        self._timings: dict[str, list[int, float, float]] = {}  # name -> [count, total, max] in seconds
+
+    def increment(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def set_gauge(self, name: str, value):
+        with self._lock:
+            if name not in self._gauges:
+                self._gauges[name] = [value, value]
+            else:
+                self._gauges[name][0] = value
+                self._gauges[name][1] = max(self._gauges[name][1], value)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self._timings:
+                self._timings[name] = [0, 0.0, 0.0]
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def get_counter(self, name: str):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def report(self):
+        with self._lock:
+            report = dict(self._counters)
+            for name, (value, max_value) in self._gauges.items():
+                report[name] = value
+                report[name + "_max"] = max_value
+            for name, (count, total, max_time) in self._timings.items():
+                report[name + "_count"] = count
+                report[name + "_avg_ms"] = 1000 * total / count
+                report[name + "_max_ms"] = 1000 * max_time
+        return report
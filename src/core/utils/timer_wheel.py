@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+import traceback
+
+
+class TimerHandle:
+    """Handle of a scheduled callback, which can be cancelled from any thread"""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: int, callback, args):
+        self.deadline = deadline  # in ticks
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel, which runs the callbacks of all timers of a process on one thread. Level 0 has a slot
+    per tick, level l a slot per 256^l ticks; a timer is inserted into the lowest level which covers its deadline and
+    moves down a level whenever the wheel below completes a rotation. Scheduling and cancelling are O(1), and the
+    thread only wakes up for due slots and rotations.
+
+    Callbacks must not block, since they delay all other timers. Cancelled timers are dropped when they are due.
+    """
+
+    BITS = 8
+    SLOTS = 1 << BITS
+    MASK = SLOTS - 1
+    LEVELS = 4
+
+    def __init__(self, resolution: float = 0.001):
+        self._resolution = resolution
+        self._wheels = [[[] for _ in range(TimerWheel.SLOTS)] for _ in range(TimerWheel.LEVELS)]
+        self._overflow: list[TimerHandle] = []  # beyond the range of the top level
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._tick = self._now()  # last processed tick
+        self._pending = 0
+        self._thread: threading.Thread = None
+
+    def _now(self) -> int:
+        return int(time.monotonic() / self._resolution)
+
+    def call_later(self, delay: float, callback, *args) -> TimerHandle:
+        ticks = max(1, math.ceil(delay / self._resolution))
+        with self._lock:
+            if self._pending == 0:
+                # the wheel is empty, skip the ticks since the last timer
+                self._tick = self._now()
+            # the current tick has partially elapsed, hence timers are due at the start of the tick after their delay
+            handle = TimerHandle(max(self._now() + ticks + 1, self._tick + 1), callback, args)
+            self._insert(handle)
+            self._pending += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return handle
+
+    def _insert(self, handle: TimerHandle):
+        for level in range(TimerWheel.LEVELS):
+            shift = level * TimerWheel.BITS
+            if (handle.deadline >> shift) - (self._tick >> shift) < TimerWheel.SLOTS:
+                self._wheels[level][(handle.deadline >> shift) & TimerWheel.MASK].append(handle)
+                return
+        self._overflow.append(handle)
+
+    def _cascade(self):
+        # called after advancing to a new tick, moves the timers of the completed rotations down
+        for level in range(TimerWheel.LEVELS - 1, 0, -1):
+            shift = level * TimerWheel.BITS
+            if self._tick & ((1 << shift) - 1) == 0:
+                if level == TimerWheel.LEVELS - 1:
+                    handles, self._overflow = self._overflow, []
+                    for handle in handles:
+                        self._insert(handle)
+
+                slot = self._wheels[level][(self._tick >> shift) & TimerWheel.MASK]
+                self._wheels[level][(self._tick >> shift) & TimerWheel.MASK] = []
+                for handle in slot:
+                    self._insert(handle)
+
+    def _advance(self) -> list[TimerHandle]:
+        due = []
+        now = self._now()
+        while self._tick < now:
+            self._tick += 1
+            self._cascade()
+            slot = self._wheels[0][self._tick & TimerWheel.MASK]
+            if slot:
+                due.extend(slot)
+                self._wheels[0][self._tick & TimerWheel.MASK] = []
+        self._pending -= len(due)
+        return due
+
+    def _timeout(self):
+        # seconds until the next due slot of level 0 or the end of the current rotation
+        if self._pending == 0:
+            return None
+        tick = self._tick + 1
+        while tick & TimerWheel.MASK != 0 and not self._wheels[0][tick & TimerWheel.MASK]:
+            tick += 1
+        return max(0.0, tick * self._resolution - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                due = self._advance()
+                if not due:
+                    self._wakeup.wait(self._timeout())
+                    continue
+
+            for handle in due:
+                if not handle.cancelled:
+                    try:
+                        handle.callback(*handle.args)
+                    except Exception:
+                        traceback.print_exc()
+
+    def __len__(self):
+        return self._pending
+
+
+_timer_wheel = TimerWheel()
+
+
+def call_later(delay: float, callback, *args) -> TimerHandle:
+    """Schedules callback(*args) after delay seconds on the timer wheel of the process"""
+    return _timer_wheel.call_later(delay, callback, *args)
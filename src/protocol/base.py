@@ -1,7 +1,7 @@
-import json
-import base64
 from src.core.group_view.group_view import GroupView
 from src.core.signatures.signatures import Signatures
+from src.protocol.codec import get_codec, detect_codec, frame, unframe, SIGNATURE_SIZE
+from src.protocol.envelope import Envelope
 
 
 class Message:
@@ -9,66 +9,64 @@ class Message:
         self.header: str
         self.content: dict
         self.meta: dict = {}
-        self.json_data: str
-        
+        self.raw_data: bytes
+        self.signature: tuple[str, bytes] = (None, None)
+        self._payload: bytes = None
+        self._signed_payload: bytes = None  # signature followed by the payload
+        self._codec = get_codec()
+        self._envelope: Envelope = None
 
     def encode(self):
-        self.json_data = json.dumps(
-            {"header": self.header, "content": self.content, "meta": self.meta}
-        )
+        # received messages keep the wire format of their sender
+        self._payload = self._codec.encode(self.header, self.content, self.meta)
+        if self.signature[0] is not None:
+            self._signed_payload = self.signature[1] + self._payload
+            self.raw_data = frame(self.signature[0], self._signed_payload)
+        else:
+            self._signed_payload = None
+            self.raw_data = self._payload
 
     def sign(self, sk: Signatures):
         if not self.is_decoded:
             self.decode()
 
-        reduced_json_data = json.dumps(
-            {
-                "header": self.header,
-                "content": self.content,
-                "meta": {k: self.meta[k] for k in self.meta if k != "signature"},
-            }
-        )
-        signature = sk.sign(reduced_json_data.encode())
-        self.meta["signature"] = (
-            sk.identifier,
-            base64.b64encode(signature.signature).decode("ascii"),
-        )
-
+        # the signature covers the payload bytes as they are sent and is attached beside them
+        self.signature = (None, None)
         self.encode()
+        self._signed_payload = sk.sign(self._payload)
+        self.signature = (sk.identifier, self._signed_payload[:SIGNATURE_SIZE])
+        self.raw_data = frame(sk.identifier, self._signed_payload)
 
     def decode(self):
-        data = json.loads(self.json_data)
-        self.header = data["header"]
-        self.content = data["content"]
-        self.meta = data["meta"]
+        if self._envelope is not None:
+            # the envelope has already been decoded; meta is copied since it is modified by set_sender, ...
+            self._codec = self._envelope.codec
+            self._payload = self._envelope.payload
+            self._signed_payload = self._envelope.signed_payload
+            self.signature = self._envelope.signature
+            self.header = self._envelope.header
+            self.content = self._envelope.content
+            self.meta = dict(self._envelope.meta)
+        else:
+            self._payload, identifier, self._signed_payload = unframe(self.raw_data)
+            if identifier is not None:
+                self.signature = (identifier, bytes(self._signed_payload[:SIGNATURE_SIZE]))
+            self._codec = detect_codec(self._payload)
+            self.header, self.content, self.meta = self._codec.decode(self._payload)
 
     def verify_signature(self, sk: Signatures, pk_dict):
         if not self.is_decoded:
             self.decode()
 
-        if "signature" not in self.meta:
-            return False
-        identifier = self.meta["signature"][0]
-        
+        identifier = self.signature[0]
         if identifier not in pk_dict:
             return False
 
-        signature = base64.b64decode(self.meta["signature"][1])
-        data = json.dumps(
-            {
-                "header": self.header,
-                "content": self.content,
-                "meta": {k: self.meta[k] for k in self.meta if k not in ["signature", "sender"]},
-            }
-        ).encode()
-
-        valid = sk.check_validity(data, signature, pk_dict[identifier])
-
-        return valid
+        return sk.check_validity(self._signed_payload, pk_dict[identifier])
 
     def get_signature(self):
         if self.is_signed:
-            return self.meta["signature"]
+            return self.signature
         else:
             return None, None
 
@@ -79,6 +77,8 @@ class Message:
     def get_sender(self):
         if "sender" in self.meta:
             return tuple(self.meta["sender"])
+        elif self._envelope is not None and self._envelope.sender is not None:
+            return tuple(self._envelope.sender)
 
     def get_topic(self):
         if self.has_topic:
@@ -97,7 +97,7 @@ class Message:
 
     @property
     def is_encoded(self):
-        if hasattr(self, "json_data"):
+        if hasattr(self, "raw_data"):
             return True
         return False
 
@@ -112,7 +112,7 @@ class Message:
         if not self.is_decoded:
             self.decode()
 
-        return "signature" in self.meta
+        return self.signature[0] is not None
 
     @property
     def has_topic(self):
@@ -129,9 +129,16 @@ class Message:
         return "nonce" in self.meta
 
     @classmethod
-    def initFromJSON(cls, json_data):
+    def initFromBytes(cls, raw_data: bytes):
+        message = cls()
+        message.raw_data = raw_data
+        return message
+
+    @classmethod
+    def initFromEnvelope(cls, envelope: Envelope):
         message = cls()
-        message.json_data = json_data
+        message.raw_data = envelope.raw_data
+        message._envelope = envelope
         return message
 
     @classmethod
@@ -4,7 +4,7 @@ class MessageQuery(Message):
 
     def __init__(self):
         super().__init__()
-        self.nacks : dict[str, list[int]]
+        self.nacks : dict[str, list[list[int]]]  # ranges [start, end] of the requested seqnos
 
     def encode(self):
         self.content = {"nacks": self.nacks}
@@ -1,4 +1,3 @@
-import base64
 from nacl.signing import VerifyKey
 
 from src.protocol.base import Message
@@ -12,17 +11,16 @@ class InitMessage(Message):
         self.pk: VerifyKey
 
     def encode(self):
-        pk_string = base64.b64encode(self.pk.encode()).decode("ascii")
         self.content = {
             "identifier": self.identifier,
-            "pk": pk_string,
+            "pk": self.pk.encode(),
         }
         Message.encode(self)
 
     def decode(self):
         Message.decode(self)
         self.identifier = self.content["identifier"]
-        self.pk = VerifyKey(base64.b64decode(self.content["pk"]))
+        self.pk = VerifyKey(self.content["pk"])
 
     @classmethod
     def initFromData(cls, identifier: str, pk: VerifyKey):
@@ -0,0 +1,551 @@
+"""
+Wire formats of a Message. The first byte of an encoded message identifies its format, so that receivers
+can decode messages of both formats independent of their own configuration.
+
+JSON (debug mode):
+    {"header": ..., "content": ..., "meta": ...}    bytes values are written as {"__bytes__": <base64>}
+
+Binary (version 1):
+    0x01 | header | content | meta
+
+    header: varint code of HEADERS (1-based), or 0 followed by a length-prefixed utf-8 string
+    value:  one tag byte, followed by
+                NONE, FALSE, TRUE:  nothing
+                INT:                zigzag varint
+                FLOAT:              8 byte big-endian double
+                STR, BYTES:         varint length + data
+                LIST:               varint length + values
+                DICT:               varint length + (key, value) pairs
+                VECTOR:             varint length + STR of the NUL-separated keys + zigzag varint values
+                VECTOR32:           varint length + STR of the NUL-separated keys + 4 byte little-endian values,
+                                    used for dicts of integers (e.g. seqno/ack vectors), which are packed and
+                                    unpacked by struct in one call. VECTOR is used for values beyond 32 bit
+                INTS32:             varint length + 4 byte little-endian values, used for lists of integers
+    key:    varint code of KEYS (1-based), or 0 followed by a length-prefixed utf-8 string
+
+Signed messages (both formats):
+    0x02 | identifier | signature | payload
+
+    identifier: length-prefixed utf-8 string of the signing process
+    signature:  64 byte Ed25519 signature over the payload bytes
+    payload:    the encoded message as sent (JSON or binary)
+
+    The signature directly precedes the payload, so that "signature | payload" can be verified by libsodium
+    in place, without reproducing the signed data.
+
+The first byte 0x03 is reserved for fragments of datagrams larger than the MTU (see fragmentation.py).
+
+New headers and keys must only be appended to the tables below, since their position is part of the format.
+"""
+
+import functools
+import json
+import base64
+import struct
+
+FORMAT_JSON = ord("{")
+FORMAT_BINARY = 0x01
+FORMAT_SIGNED = 0x02
+
+SIGNATURE_SIZE = 64
+
+HEADERS = [
+    "HeartBeat",
+    "NACK",
+    "TO: Seqno Proposal",
+    "TO: Seqno Commit",
+    "View: Suspect",
+    "Halt Message",
+    "Commence Message",
+    "Phase King: Message",
+    "Election: Announcement",
+    "View: Join Request",
+    "View: Join Response",
+    "View: Join Message",
+    "View: Join Commence",
+    "Client: Join Message",
+    "Write: Initial",
+    "Write Response: Initial",
+    "Write: TextMessage",
+    "Query: Heartbeat",
+    "Query Response: HeartBeat",
+    "Query: Messages",
+    "Ping",
+    "ACK",
+    "Batch",
+    "View: Join Snapshot",
+    "Parity",
+]
+
+KEYS = [
+    "SeqVector",
+    "identifier",
+    "seqno",
+    "acks",
+    "signature",
+    "sender",
+    "topic",
+    "nonce",
+    "MsgIdentifier",
+    "id",
+    "nacks",
+    "msg_identifier",
+    "wait_until",
+    "response",
+    "request",
+    "pk",
+    "value",
+    "phase",
+    "round",
+    "text",
+    "old_manager",
+    "listening_port",
+    "ip_addr",
+    "port",
+    "messages",
+    "view",
+    "watermarks",
+    "complete",
+    "agreed_seqno",
+    "manager",
+    "servers",
+    "suspended_servers",
+    "joining_servers",
+    "pks",
+    "users",
+    "ip_addrs",
+    "ports",
+    "responder",
+    "seqnos",
+    "lengths",
+    "parity",
+]
+
+_HEADER_CODES = {header: i + 1 for i, header in enumerate(HEADERS)}
+_KEY_CODES = {key: i + 1 for i, key in enumerate(KEYS)}
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT, _VECTOR, _VECTOR32, _INTS32 = range(12)
+
+_INT_TYPES = {int}
+
+_double = struct.Struct(">d")
+
+
+class JSONCodec:
+    name = "json"
+
+    def encode(self, header: str, content: dict, meta: dict) -> bytes:
+        return json.dumps(
+            {"header": header, "content": content, "meta": meta}, default=self._default
+        ).encode()
+
+    def decode(self, raw) -> tuple[str, dict, dict]:
+        data = json.loads(bytes(raw), object_hook=self._object_hook)
+        return data["header"], data["content"], data["meta"]
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return {"__bytes__": base64.b64encode(obj).decode("ascii")}
+        raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+    @staticmethod
+    def _object_hook(obj):
+        if len(obj) == 1 and "__bytes__" in obj:
+            return base64.b64decode(obj["__bytes__"])
+        return obj
+
+
+class BinaryCodec:
+    name = "binary"
+
+    def encode(self, header: str, content: dict, meta: dict) -> bytes:
+        buf = bytearray((FORMAT_BINARY,))
+        code = _HEADER_CODES.get(header, 0)
+        _write_varint(buf, code)
+        if code == 0:
+            _write_str(buf, header)
+        _write_value(buf, content)
+        _write_value(buf, meta)
+        return bytes(buf)
+
+    def decode(self, raw) -> tuple[str, dict, dict]:
+        if raw[0] != FORMAT_BINARY:
+            raise ValueError("unsupported binary format version {}".format(raw[0]))
+
+        code, pos = _read_varint(raw, 1)
+        if code == 0:
+            header, pos = _read_str(raw, pos)
+        else:
+            header = HEADERS[code - 1]
+        content, pos = _read_value(raw, pos)
+        meta, pos = _read_value(raw, pos)
+        return header, content, meta
+
+
+def _write_varint(buf: bytearray, n: int):
+    while n > 0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _read_varint(raw, pos: int):
+    b = raw[pos]
+    if b < 0x80:
+        return b, pos + 1
+
+    n = b & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        b = raw[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _write_int(buf: bytearray, n: int):
+    # zigzag encoding keeps small negative numbers (e.g. the initial seqno -1) short
+    _write_varint(buf, n << 1 if n >= 0 else (-n << 1) - 1)
+
+
+def _read_int(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+
+
+def _write_str(buf: bytearray, s: str):
+    data = s.encode()
+    n = len(data)
+    if n < 0x80:
+        buf.append(n)
+    else:
+        _write_varint(buf, n)
+    buf += data
+
+
+def _read_str(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    return bytes(raw[pos : pos + n]).decode(), pos + n
+
+
+def _write_key(buf: bytearray, key):
+    key = str(key)  # same behaviour as JSON, which only supports string keys
+    code = _KEY_CODES.get(key, 0)
+    _write_varint(buf, code)
+    if code == 0:
+        _write_str(buf, key)
+
+
+def _read_key(raw, pos: int):
+    code, pos = _read_varint(raw, pos)
+    if code == 0:
+        return _read_str(raw, pos)
+    return KEYS[code - 1], pos
+
+
+def _write_none(buf: bytearray, value):
+    buf.append(_NONE)
+
+
+def _write_bool(buf: bytearray, value):
+    buf.append(_TRUE if value else _FALSE)
+
+
+def _write_int_value(buf: bytearray, value):
+    buf.append(_INT)
+    if 0 <= value < 0x40:
+        buf.append(value << 1)
+    else:
+        _write_int(buf, value)
+
+
+def _write_str_value(buf: bytearray, value):
+    buf.append(_STR)
+    _write_str(buf, value)
+
+
+def _write_bytes_value(buf: bytearray, value):
+    buf.append(_BYTES)
+    _write_varint(buf, len(value))
+    buf += value
+
+
+def _write_float_value(buf: bytearray, value):
+    buf.append(_FLOAT)
+    buf += _double.pack(value)
+
+
+def _write_list_value(buf: bytearray, value):
+    for item in value:
+        if type(item) is not int:
+            break
+    else:
+        if len(value) > 0:
+            try:
+                packed = _vector_struct(len(value)).pack(*value)
+            except struct.error:
+                pass
+            else:
+                buf.append(_INTS32)
+                _write_varint(buf, len(value))
+                buf += packed
+                return
+
+    buf.append(_LIST)
+    _write_varint(buf, len(value))
+    for item in value:
+        writer = _WRITERS.get(type(item))
+        if writer is None:
+            _write_other(buf, item)
+        else:
+            writer(buf, item)
+
+
+def _write_dict_value(buf: bytearray, value):
+    if len(value) > 0 and _write_vector(buf, value):
+        return
+
+    buf.append(_DICT)
+    _write_varint(buf, len(value))
+    for key, item in value.items():
+        code = _KEY_CODES.get(key, 0)
+        if code != 0:
+            _write_varint(buf, code)
+        else:
+            _write_key(buf, key)
+        writer = _WRITERS.get(type(item))
+        if writer is None:
+            _write_other(buf, item)
+        else:
+            writer(buf, item)
+
+
+def _write_vector(buf: bytearray, value: dict):
+    # dicts of integers (e.g. seqno/ack vectors) are packed by struct in one call instead of value by value
+    values = value.values()
+    if set(map(type, values)) != _INT_TYPES:
+        return False
+
+    try:
+        packed = _vector_struct(len(value)).pack(*values)
+    except struct.error:
+        # values beyond 32 bit
+        buf.append(_VECTOR)
+        _write_varint(buf, len(value))
+        _write_str(buf, "\0".join([str(key) for key in value]))
+        for v in values:
+            _write_int(buf, v)
+        return True
+
+    try:
+        keys = "\0".join(value)
+    except TypeError:
+        keys = "\0".join([str(key) for key in value])
+    buf.append(_VECTOR32)
+    _write_varint(buf, len(value))
+    _write_str(buf, keys)
+    buf += packed
+    return True
+
+
+@functools.lru_cache(maxsize=1024)
+def _vector_struct(n: int):
+    return struct.Struct("<{}i".format(n))
+
+
+def _write_other(buf: bytearray, value):
+    # subclasses of the supported types
+    for cls, writer in _WRITERS.items():
+        if isinstance(value, cls) and cls is not bool:
+            writer(buf, value)
+            return
+    raise TypeError("Object of type {} is not serializable".format(type(value).__name__))
+
+
+_WRITERS = {
+    type(None): _write_none,
+    bool: _write_bool,
+    int: _write_int_value,
+    str: _write_str_value,
+    dict: _write_dict_value,
+    list: _write_list_value,
+    tuple: _write_list_value,
+    bytes: _write_bytes_value,
+    bytearray: _write_bytes_value,
+    memoryview: _write_bytes_value,
+    float: _write_float_value,
+}
+
+
+def _write_value(buf: bytearray, value):
+    writer = _WRITERS.get(type(value))
+    if writer is None:
+        _write_other(buf, value)
+    else:
+        writer(buf, value)
+
+
+def _read_int_value(raw, pos: int):
+    n = raw[pos]
+    if n < 0x80:
+        return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos + 1
+    return _read_int(raw, pos)
+
+
+def _read_str_value(raw, pos: int):
+    n = raw[pos]
+    if n < 0x80:
+        pos += 1
+    else:
+        n, pos = _read_varint(raw, pos)
+    return str(raw[pos : pos + n], "utf-8"), pos + n
+
+
+def _read_vector(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    keys, pos = _read_str(raw, pos)
+    values = []
+    for _ in range(n):
+        # inlined zigzag varint decoding
+        v = raw[pos]
+        pos += 1
+        if v >= 0x80:
+            v &= 0x7F
+            shift = 7
+            while True:
+                b = raw[pos]
+                pos += 1
+                v |= (b & 0x7F) << shift
+                if b < 0x80:
+                    break
+                shift += 7
+        values.append((v >> 1) if not v & 1 else -((v + 1) >> 1))
+    return dict(zip(keys.split("\0"), values)), pos
+
+
+def _read_vector32(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    keys, pos = _read_str_value(raw, pos)
+    values = _vector_struct(n).unpack_from(raw, pos)
+    return dict(zip(keys.split("\0"), values)), pos + 4 * n
+
+
+def _read_ints32(raw, pos: int):
+    n = raw[pos]
+    if n < 0x80:
+        pos += 1
+    else:
+        n, pos = _read_varint(raw, pos)
+    return list(_vector_struct(n).unpack_from(raw, pos)), pos + 4 * n
+
+
+def _read_dict(raw, pos: int):
+    n = raw[pos]
+    if n < 0x80:
+        pos += 1
+    else:
+        n, pos = _read_varint(raw, pos)
+    d = {}
+    for _ in range(n):
+        code = raw[pos]
+        if 0 < code < 0x80:
+            key = KEYS[code - 1]
+            pos += 1
+        else:
+            key, pos = _read_key(raw, pos)
+        tag = raw[pos]
+        d[key], pos = _READERS[tag](raw, pos + 1)
+    return d, pos
+
+
+def _read_list(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    l = []
+    for _ in range(n):
+        tag = raw[pos]
+        item, pos = _READERS[tag](raw, pos + 1)
+        l.append(item)
+    return l, pos
+
+
+def _read_bytes(raw, pos: int):
+    n, pos = _read_varint(raw, pos)
+    return bytes(raw[pos : pos + n]), pos + n
+
+
+def _read_float(raw, pos: int):
+    return _double.unpack_from(raw, pos)[0], pos + 8
+
+
+_READERS = [
+    lambda raw, pos: (None, pos),
+    lambda raw, pos: (False, pos),
+    lambda raw, pos: (True, pos),
+    _read_int_value,
+    _read_float,
+    _read_str_value,
+    _read_bytes,
+    _read_list,
+    _read_dict,
+    _read_vector,
+    _read_vector32,
+    _read_ints32,
+]
+
+
+def _read_value(raw, pos: int):
+    tag = raw[pos]
+    if tag >= len(_READERS):
+        raise ValueError("unknown value tag {}".format(tag))
+    return _READERS[tag](raw, pos + 1)
+
+
+_codecs = {JSONCodec.name: JSONCodec(), BinaryCodec.name: BinaryCodec()}
+_codec = _codecs[JSONCodec.name]
+
+
+def set_codec(name: str):
+    """Select the wire format used to encode outgoing messages ("binary" or "json")"""
+    global _codec
+    if name not in _codecs:
+        raise ValueError("unknown codec {}".format(name))
+    _codec = _codecs[name]
+
+
+def get_codec():
+    return _codec
+
+
+def frame(identifier: str, signed_payload: bytes) -> bytes:
+    """Attach the identifier of the signing process to a signed payload (signature followed by the payload)"""
+    buf = bytearray((FORMAT_SIGNED,))
+    _write_str(buf, identifier)
+    buf += signed_payload
+    return bytes(buf)
+
+
+def unframe(raw):
+    """
+    Split an encoded message into its payload, the identifier of the signing process and the signed payload.
+    The payload and the signed payload are memoryviews of raw. For unsigned messages, raw is returned as payload.
+    """
+    if raw[0] != FORMAT_SIGNED:
+        return raw, None, None
+
+    if not isinstance(raw, memoryview):
+        raw = memoryview(raw)
+    identifier, pos = _read_str(raw, 1)
+    return raw[pos + SIGNATURE_SIZE :], identifier, raw[pos:]
+
+
+def detect_codec(raw):
+    """Return the codec of an encoded message"""
+    if raw[0] == FORMAT_BINARY:
+        return _codecs[BinaryCodec.name]
+    elif raw[0] == FORMAT_JSON:
+        return _codecs[JSONCodec.name]
+    raise ValueError("unknown wire format {}".format(raw[0]))
@@ -0,0 +1,94 @@
+from src.protocol.codec import detect_codec, unframe, SIGNATURE_SIZE
+
+
+class Envelope:
+    """
+    Immutable, decoded form of a received message. An envelope is created once at the socket and passed through
+    all layers (and channels) instead of the raw data, such that the message is not parsed again. Messages are
+    obtained via Message.initFromEnvelope, which does not copy the content. Hence, content and meta of an envelope
+    must not be modified.
+    """
+
+    __slots__ = ("raw_data", "payload", "signed_payload", "signature", "header", "content", "meta", "sender", "codec")
+
+    def __init__(
+        self, raw_data: bytes, payload, signed_payload, signature, header: str, content: dict, meta: dict, sender, codec
+    ):
+        object.__setattr__(self, "raw_data", raw_data)
+        object.__setattr__(self, "payload", payload)
+        object.__setattr__(self, "signed_payload", signed_payload)
+        object.__setattr__(self, "signature", signature)
+        object.__setattr__(self, "header", header)
+        object.__setattr__(self, "content", content)
+        object.__setattr__(self, "meta", meta)
+        object.__setattr__(self, "sender", sender)
+        object.__setattr__(self, "codec", codec)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Envelope is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, Envelope) and self.raw_data == other.raw_data
+
+    def __hash__(self):
+        return hash(self.raw_data)
+
+    def get_signature(self):
+        return self.signature
+
+    def get_topic(self):
+        if "topic" in self.meta:
+            return self.meta["topic"]
+        return ""
+
+    def detach(self):
+        """
+        Replaces the receive buffer of the datagram by a copy of it and returns the envelope. Envelopes which are kept
+        beyond receiving them (holdback queue, storage, channels) have to be detached, since the buffer is reused.
+        The value of the envelope does not change, hence this is the only exception to its immutability.
+        """
+        if isinstance(self.raw_data, bytes):
+            return self
+
+        raw_data = bytes(self.raw_data)
+        if self.signed_payload is not None:
+            # payload and signed payload are suffixes of the raw data
+            signed_payload = memoryview(raw_data)[-len(self.signed_payload) :]
+            object.__setattr__(self, "payload", signed_payload[SIGNATURE_SIZE:])
+            object.__setattr__(self, "signed_payload", signed_payload)
+        elif not isinstance(self.payload, bytes):
+            # unsigned message (messages of a batch carry their own payload)
+            object.__setattr__(self, "payload", raw_data)
+        object.__setattr__(self, "raw_data", raw_data)
+        return self
+
+    @classmethod
+    def initFromBytes(cls, raw_data: bytes, sender=None):
+        payload, identifier, signed_payload = unframe(raw_data)
+        signature = (identifier, bytes(signed_payload[:SIGNATURE_SIZE])) if identifier is not None else (None, None)
+        codec = detect_codec(payload)
+        header, content, meta = codec.decode(payload)
+        return cls(raw_data, payload, signed_payload, signature, header, content, meta, sender, codec)
+
+    @classmethod
+    def initFromBatch(cls, batch: "Envelope", payload: bytes):
+        # messages of a batch are signed by the signature of the batch. The raw data of the batch is kept, such
+        # that NACKs for any message of the batch are answered with the signed batch.
+        codec = detect_codec(payload)
+        header, content, meta = codec.decode(payload)
+        return cls(batch.raw_data, payload, None, batch.signature, header, content, meta, batch.sender, codec)
+
+    @classmethod
+    def initFromMessage(cls, message, sender=None):
+        # used for locally created messages, which are already encoded and decoded
+        return cls(
+            message.raw_data,
+            message._payload,
+            message._signed_payload,
+            message.signature,
+            message.header,
+            message.content,
+            message.meta,
+            sender,
+            message._codec,
+        )
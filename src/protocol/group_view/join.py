@@ -1,4 +1,6 @@
-import base64
+import hashlib
+import json
+
 from nacl.signing import VerifyKey
 
 from src.protocol.base import Message
@@ -14,10 +16,9 @@ class JoinRequest(Message):
         self.port: int
 
     def encode(self):
-        pk_string = base64.b64encode(self.pk.encode()).decode("ascii")
         self.content = {
             "identifier": self.identifier,
-            "pk": pk_string,
+            "pk": self.pk.encode(),
             "ip_addr": self.ip_addr,
             "port": self.port,
         }
@@ -26,7 +27,7 @@ class JoinRequest(Message):
     def decode(self):
         Message.decode(self)
         self.identifier = self.content["identifier"]
-        self.pk = VerifyKey(base64.b64decode(self.content["pk"]))
+        self.pk = VerifyKey(self.content["pk"])
         self.ip_addr = self.content["ip_addr"]
         self.port = self.content["port"]
 
@@ -96,3 +97,51 @@ class JoinCommence(JoinResponse):
         message.response = response
 
         return message
+
+
+class JoinSnapshot(Message):
+    def __init__(self):
+        super().__init__()
+
+        self.identifier: str  # joining server
+        self.view: dict
+        self.watermarks: dict[str, dict[str, int]]
+        self.complete: bool
+        self.agreed_seqno: int
+
+    def encode(self):
+        self.content = {
+            "identifier": self.identifier,
+            "view": self.view,
+            "watermarks": self.watermarks,
+            "complete": self.complete,
+            "agreed_seqno": self.agreed_seqno,
+        }
+        Message.encode(self)
+
+    def decode(self):
+        Message.decode(self)
+        self.identifier = self.content["identifier"]
+        self.view = self.content["view"]
+        self.watermarks = self.content["watermarks"]
+        self.complete = self.content["complete"]
+        self.agreed_seqno = self.content["agreed_seqno"]
+
+    def get_digest(self):
+        # digest of the state which has to be equal on all servers (the watermarks depend on their progress)
+        view = {key: self.view[key] for key in sorted(self.view)}
+        for key in ["pks", "users"]:
+            view[key] = {identifier: bytes(pk).hex() for identifier, pk in sorted(self.view[key].items())}
+        return hashlib.sha256(json.dumps(view, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def initFromData(cls, identifier: str, view: dict, watermarks: dict, complete: bool, agreed_seqno: int):
+        message = cls()
+        message.header = "View: Join Snapshot"
+        message.identifier = identifier
+        message.view = view
+        message.watermarks = watermarks
+        message.complete = complete
+        message.agreed_seqno = agreed_seqno
+
+        return message
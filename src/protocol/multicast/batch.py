@@ -0,0 +1,24 @@
+from src.protocol.base import Message
+
+class BatchMessage(Message):
+
+    def __init__(self):
+        super().__init__()
+        self.messages : list[bytes]  # encoded (unsigned) piggyback messages
+
+    def encode(self):
+        self.content = {"messages": self.messages}
+        Message.encode(self)
+
+    def decode(self):
+        Message.decode(self)
+        self.messages = self.content["messages"]
+
+    @classmethod
+    def initFromData(cls, messages):
+        message = cls()
+        message.header = "Batch"
+        message.meta = {}
+        message.messages = messages
+
+        return message
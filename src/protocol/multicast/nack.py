@@ -4,21 +4,26 @@ class NegativeAcknowledgement(Message):
 
     def __init__(self):
         super().__init__()
-        self.nacks : dict[str, list[int]]
+        self.nacks : dict[str, list[list[int]]]  # ranges [start, end] of the requested seqnos
+        self.responder : str = None  # server which responds to a multicast NACK
 
     def encode(self):
         self.content = {"nacks": self.nacks}
+        if self.responder is not None:
+            self.content["responder"] = self.responder
         Message.encode(self)
 
     def decode(self):
         Message.decode(self)
         self.nacks = self.content["nacks"]
+        self.responder = self.content.get("responder")
 
     @classmethod
-    def initFromData(cls, nacks):
+    def initFromData(cls, nacks, responder=None):
         message = cls()
         message.header = "NACK"
         message.meta = {}
         message.nacks = nacks.copy()
+        message.responder = responder
 
         return message
\ No newline at end of file
@@ -0,0 +1,30 @@
+from src.protocol.base import Message
+
+class ParityMessage(Message):
+
+    def __init__(self):
+        super().__init__()
+        self.seqnos : list[list[int]]  # seqno ranges [first, last] of the datagrams of the group
+        self.lengths : list[int]  # lengths of the datagrams
+        self.parity : bytes  # XOR of the datagrams, padded with zeros to the longest datagram
+
+    def encode(self):
+        self.content = {"seqnos": self.seqnos, "lengths": self.lengths, "parity": self.parity}
+        Message.encode(self)
+
+    def decode(self):
+        Message.decode(self)
+        self.seqnos = self.content["seqnos"]
+        self.lengths = self.content["lengths"]
+        self.parity = self.content["parity"]
+
+    @classmethod
+    def initFromData(cls, seqnos, lengths, parity):
+        message = cls()
+        message.header = "Parity"
+        message.meta = {}
+        message.seqnos = seqnos
+        message.lengths = lengths
+        message.parity = parity
+
+        return message
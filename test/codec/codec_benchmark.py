@@ -0,0 +1,97 @@
+import sys
+import timeit
+
+sys.path.append(sys.path[0] + "/../..")
+from nacl.signing import SigningKey
+from src.core.signatures.signatures import Signatures
+from src.protocol.codec import set_codec
+from src.protocol.base import Message
+from src.protocol.multicast.piggyback import PiggybackMessage
+from src.protocol.multicast.heartbeat import HeartBeat
+from src.protocol.multicast.nack import NegativeAcknowledgement
+from src.protocol.multicast.to_proposal import TotalOrderProposal
+from src.protocol.client.write.text_message import TextMessage
+from src.protocol.client.write.initial import InitMessage
+
+
+def ack_vector(n):
+    return {"{:010d}".format(i): 1000 + i for i in range(n)}
+
+
+def build_messages(signature):
+    messages = {}
+
+    text_msg = TextMessage.initFromData("Hello World, this is a short chat message")
+    text_msg.encode()
+    messages["TextMessage (4 acks)"] = PiggybackMessage.initFromMessage(text_msg, "server1", 1234, ack_vector(4))
+
+    messages["TextMessage (100 acks)"] = PiggybackMessage.initFromMessage(
+        text_msg, "server1", 1234, ack_vector(100)
+    )
+
+    proposal = TotalOrderProposal.initFromData(1234, "INIT#ABCDEFGHIJ")
+    proposal.encode()
+    messages["TO: Seqno Proposal"] = PiggybackMessage.initFromMessage(proposal, "server1", 1234, ack_vector(4))
+
+    init_msg = InitMessage.initFromData("ABCDEFGHIJ", SigningKey.generate().verify_key)
+    init_msg.encode()
+    messages["Write: Initial"] = PiggybackMessage.initFromMessage(init_msg, "ABCDEFGHIJ", 0, {})
+
+    messages["HeartBeat (4 acks)"] = HeartBeat.initFromData(ack_vector(4))
+    messages["HeartBeat (100 acks)"] = HeartBeat.initFromData(ack_vector(100))
+    messages["NACK (20 seqnos)"] = NegativeAcknowledgement.initFromData(
+        {"server1": [[1000, 1004], [1010, 1014], [1020, 1024], [1030, 1034]]}
+    )
+
+    for name in messages:
+        messages[name].encode()
+        messages[name].sign(signature)
+
+    return messages
+
+
+def benchmark(codec, number):
+    set_codec(codec)
+    signature = Signatures(SigningKey.generate(), "server1")
+    results = {}
+
+    for name, msg in build_messages(signature).items():
+        raw_data = msg.raw_data
+
+        def decode():
+            m = Message.initFromBytes(raw_data)
+            m.decode()
+
+        encode_time = timeit.timeit(msg.encode, number=number) / number
+        decode_time = timeit.timeit(decode, number=number) / number
+        results[name] = (len(raw_data), encode_time * 10**6, decode_time * 10**6)
+
+    return results
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    json_results = benchmark("json", number)
+    binary_results = benchmark("binary", number)
+
+    print(
+        "| {:<24} | {:>10} | {:>12} | {:>14} | {:>16} | {:>14} | {:>16} |".format(
+            "Message",
+            "JSON size",
+            "Binary size",
+            "JSON enc (us)",
+            "Binary enc (us)",
+            "JSON dec (us)",
+            "Binary dec (us)",
+        )
+    )
+    print("|" + "|".join(["-" * 26, "-" * 11 + ":", "-" * 13 + ":"] + ["-" * 15 + ":", "-" * 17 + ":"] * 2) + "|")
+    for name in json_results:
+        json_size, json_enc, json_dec = json_results[name]
+        binary_size, binary_enc, binary_dec = binary_results[name]
+        print(
+            "| {:<24} | {:>10} | {:>12} | {:>14.1f} | {:>16.1f} | {:>14.1f} | {:>16.1f} |".format(
+                name, json_size, binary_size, json_enc, binary_enc, json_dec, binary_dec
+            )
+        )
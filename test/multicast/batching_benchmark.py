@@ -0,0 +1,95 @@
+import os
+import sys
+import multiprocessing
+import time
+import threading
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.group_view.group_view import GroupView
+
+# Throughput of ReliableMulticast with and without batching: every initial server sends a burst of messages,
+# the time is measured until all messages of all servers are delivered.
+#
+# usage: python test/multicast/batching_benchmark.py [messages per server]
+
+
+def launch_process(i, n, batching, messages, results):
+    config = Configuration()
+    config.data["batching"]["groups"]["consensus"] = batching
+
+    files = os.listdir("config/" + config.data["initial"]["path"] + "/")
+    files.remove("global.json")
+    files.sort()
+    group_view = GroupView.initFromFile("config/" + config.data["initial"]["path"] + "/" + files[i])
+
+    channel = Channel()
+    reliable_multicast = ReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast.start()
+    time.sleep(1)
+
+    def sender():
+        for k in range(messages):
+            message = Message.initFromData("Test", content={"identifier": group_view.identifier, "value": k})
+            message.encode()
+            reliable_multicast.send(message)
+
+    start = time.time()
+    threading.Thread(target=sender).start()
+
+    for _ in range(n * messages):
+        channel.consume()
+
+    duration = time.time() - start
+    results.put((group_view.identifier, duration, reliable_multicast.get_metrics()))
+    time.sleep(2)  # answer outstanding nacks of slower servers
+    os._exit(0)
+
+
+def run(batching, messages):
+    config = Configuration()
+    n = len(os.listdir("config/" + config.data["initial"]["path"] + "/")) - 1
+
+    results = multiprocessing.Queue()
+    processes = []
+    for i in range(n):
+        p = multiprocessing.Process(target=launch_process, args=(i, n, batching, messages, results))
+        p.start()
+        processes.append(p)
+
+    durations = []
+    datagrams = 0
+    for _ in range(n):
+        _, duration, metrics = results.get()
+        durations.append(duration)
+        batched = metrics.get("batched_messages", 0)
+        datagrams += messages - batched + metrics.get("batches_sent", 0)
+
+    for p in processes:
+        p.join()
+
+    return n, max(durations), datagrams
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("| {:<9} | {:>8} | {:>10} | {:>14} | {:>9} |".format("Batching", "Servers", "Messages", "Messages/s", "Datagrams"))
+    print("|-----------|---------:|-----------:|---------------:|----------:|")
+    for batching in [False, True]:
+        n, duration, datagrams = run(batching, messages)
+        print(
+            "| {:<9} | {:>8} | {:>10} | {:>14.0f} | {:>9} |".format(
+                "on" if batching else "off", n, n * messages, n * messages / duration, datagrams
+            )
+        )
@@ -0,0 +1,109 @@
+import sys
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.components.client.client_co_reliable_multicast import ClientCausalOrderedReliableMulticast
+from src.protocol.envelope import Envelope
+from src.protocol.multicast.piggyback import PiggybackMessage
+from src.protocol.client.write.text_message import TextMessage
+
+# Causal metadata of the client write group in a room with many registered clients, of which only a few chat. Every
+# registered client sent its initial message, after which the active clients reply to each other in turns. Reports
+# the entries and size of the acks carried by the chat messages, and the time a receiver needs to deliver a chat
+# message, with ack vectors (deltas and every full_interval-th vector in full) and with direct dependencies.
+#
+# usage: python test/multicast/causal_metadata_benchmark.py [active clients] [messages]
+
+
+class CapturingMulticast(ClientCausalOrderedReliableMulticast):
+    def _send_datagram(self, data: bytes, first_seqno: int, last_seqno: int):
+        self.sent.append(data)
+
+    def _co_deliver(self, envelope: Envelope, identifier, seqno):
+        pass
+
+
+def create(identifier, direct_dependencies):
+    config = Configuration()
+    config.data["ack_vectors"]["direct_dependencies"]["client_write"] = direct_dependencies
+    multicast = CapturingMulticast(
+        config.get_multicast_addr(),
+        config.get_client_write_multicast_port(),
+        identifier,
+        None,
+        None,
+        config,
+        open=True,
+    )
+    multicast.sent = []
+    return multicast
+
+
+def initial_message(identifier):
+    text_msg = TextMessage.initFromData("initial")
+    text_msg.encode()
+    pb_message = PiggybackMessage.initFromMessage(text_msg, identifier, 0, {})
+    pb_message.encode()
+    return Envelope.initFromMessage(pb_message)
+
+
+def run(registered, active, messages, direct_dependencies):
+    clients = [create("client{}".format(k), direct_dependencies) for k in range(active)]
+    receiver = create("receiver", direct_dependencies)
+    for k in range(registered):
+        envelope = initial_message("passive{}".format(k))
+        for multicast in clients + [receiver]:
+            multicast._receive_pb_message_open(envelope)
+
+    entries = 0
+    size = 0
+    elapsed = 0
+    for k in range(messages):
+        sender = clients[k % active]
+        text_msg = TextMessage.initFromData("Hello World, this is a short chat message")
+        text_msg.encode()
+        sender.send(text_msg, sign=False)
+
+        data = sender.sent.pop()
+        pb_message = PiggybackMessage.initFromBytes(data)
+        pb_message.decode()
+        entries += len(pb_message.acks)
+        size += len(data)
+
+        for multicast in clients:
+            if multicast is not sender:
+                multicast._receive_pb_message_open(Envelope.initFromBytes(data))
+
+        envelope = Envelope.initFromBytes(data)
+        start = time.perf_counter()
+        receiver._receive_pb_message_open(envelope)
+        elapsed += time.perf_counter() - start
+
+    # all chat messages were delivered in causal order
+    assert all(receiver._CO_R_g["client{}".format(k)] == len(range(k, messages, active)) - 1 for k in range(active))
+    return entries / messages, size / messages, elapsed / messages
+
+
+if __name__ == "__main__":
+    active = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 640
+
+    print(
+        "| {:>10} | {:<19} | {:>12} | {:>12} | {:>15} |".format(
+            "Registered", "Metadata", "Acks/msg", "Bytes/msg", "Delivery (us)"
+        )
+    )
+    print("|-----------:|---------------------|-------------:|-------------:|----------------:|")
+    for registered in [100, 1000, 10000]:
+        for direct_dependencies in [False, True]:
+            entries, size, elapsed = run(registered, active, messages, direct_dependencies)
+            print(
+                "| {:>10} | {:<19} | {:>12.1f} | {:>12.0f} | {:>15.1f} |".format(
+                    registered,
+                    "direct dependencies" if direct_dependencies else "ack vector",
+                    entries,
+                    size,
+                    elapsed * 10**6,
+                )
+            )
@@ -0,0 +1,117 @@
+import sys
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.multicast.co_reliable_multicast import CausalOrderedReliableMulticast
+from src.protocol.envelope import Envelope
+from src.protocol.multicast.piggyback import PiggybackMessage
+from src.protocol.client.write.text_message import TextMessage
+
+# Cost of the causal holdback queue of CausalOrderedReliableMulticast under reordering. The senders reply to each
+# other in turns, i.e. every message depends on the previous message of the conversation. The messages of each
+# sender arrive in FIFO order, but sender by sender and starting with the last sender, hence all messages are held
+# back until the messages of the first sender arrived. The previous implementation scanned the whole holdback queue after every
+# delivery; the dependency index only checks the messages which wait for the delivered message.
+#
+# usage: python test/multicast/co_holdback_benchmark.py [senders]
+
+
+class PreviousCausalMulticast(CausalOrderedReliableMulticast):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._co_holdback_queue = []
+
+    def _co_consume(self, envelope: Envelope, identifier, seqno):
+        pb_message = PiggybackMessage.initFromEnvelope(envelope)
+        pb_message.decode()
+        seqno_dict = pb_message.acks.copy()
+        seqno_dict[identifier] = seqno - 1
+
+        with self._co_lock:
+            if self._check_if_ready_to_deliver(seqno_dict):
+                self._co_deliver(envelope, identifier, seqno)
+                self._CO_R_g[identifier] = seqno
+                self._check_co_holdback_queue()
+            else:
+                self._co_holdback_queue.append((seqno_dict, envelope, identifier, seqno))
+
+    def _check_if_ready_to_deliver(self, seqno_dict):
+        for identifier in seqno_dict:
+            if identifier not in self._CO_R_g:
+                self._CO_R_g[identifier] = -1
+            if seqno_dict[identifier] > self._CO_R_g[identifier]:
+                return False
+        return True
+
+    def _check_co_holdback_queue(self):
+        change = True
+        while change:
+            change = False
+            k = 0
+            while k < len(self._co_holdback_queue):
+                (seqno_dict, envelope, identifier, seqno) = self._co_holdback_queue[k]
+                if self._check_if_ready_to_deliver(seqno_dict):
+                    self._co_deliver(envelope, identifier, seqno)
+                    self._CO_R_g[identifier] = seqno
+                    self._co_holdback_queue.pop(k)
+                    change = True
+                else:
+                    k += 1
+
+
+def conversation(senders, rounds):
+    # message k of the conversation is sent by sender k % senders and depends on message k - 1
+    text_msg = TextMessage.initFromData("Hello World, this is a short chat message")
+    text_msg.encode()
+
+    acks = {}
+    messages = {identifier: [] for identifier in senders}
+    for k in range(rounds * len(senders)):
+        identifier = senders[k % len(senders)]
+        seqno = len(messages[identifier])
+        pb_message = PiggybackMessage.initFromMessage(text_msg, identifier, seqno, acks)
+        pb_message.encode()
+        messages[identifier].append(Envelope.initFromMessage(pb_message))
+        acks = dict(acks)
+        acks[identifier] = seqno
+    return messages
+
+
+def run(cls, messages):
+    config = Configuration()
+    multicast = cls(
+        config.get_multicast_addr(),
+        config.get_client_write_multicast_port(),
+        "benchmark",
+        None,
+        None,
+        config,
+        open=True,
+    )
+    delivered = []
+    multicast._co_deliver = lambda envelope, identifier, seqno: delivered.append((identifier, seqno))
+
+    start = time.perf_counter()
+    for identifier in reversed(messages):
+        for seqno, envelope in enumerate(messages[identifier]):
+            multicast._co_consume(envelope, identifier, seqno)
+    elapsed = time.perf_counter() - start
+
+    # every message is delivered after the message it replies to
+    total = sum(len(envelopes) for envelopes in messages.values())
+    senders = list(messages.keys())
+    assert delivered == [(senders[k % len(senders)], k // len(senders)) for k in range(total)]
+    return elapsed / total
+
+
+if __name__ == "__main__":
+    senders = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print("| {:>10} | {:>19} | {:>25} |".format("Messages", "Previous (us/msg)", "Dependency index (us/msg)"))
+    print("|-----------:|--------------------:|--------------------------:|")
+    for rounds in [10, 100, 300]:
+        messages = conversation(["client{}".format(k) for k in range(senders)], rounds)
+        previous = run(PreviousCausalMulticast, messages)
+        current = run(CausalOrderedReliableMulticast, messages)
+        print("| {:>10} | {:>19.1f} | {:>25.1f} |".format(rounds * senders, previous * 10**6, current * 10**6))
@@ -38,7 +38,7 @@ def launch_process(i):
     seqno_dict = {}
     for i in range(40000):
         data = channel.consume()
-        message = Message.initFromJSON(data)
+        message = Message.initFromEnvelope(data)
         message.decode()
 
         msg_identifier = message.content["identifier"]
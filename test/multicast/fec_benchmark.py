@@ -0,0 +1,107 @@
+import os
+import sys
+import multiprocessing
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from repair_benchmark import LossyReliableMulticast, create_group_views
+
+# Delivery latency of ReliableMulticast under injected loss (see repair_benchmark.py), without and with forward error
+# correction. One server sends a message every interval, which carries its send time; the other servers measure the
+# time until the message is delivered, i.e. including the time a lost message (and the messages behind it) waits
+# for its repair. Reports percentiles over all receivers, and the NACKs and parity datagrams sent.
+#
+# usage: python test/multicast/fec_benchmark.py [servers] [messages] [interval]
+
+
+def launch_process(group_view, fec, loss, messages, interval, results):
+    config = Configuration()
+    config.data["fec"]["groups"]["consensus"] = fec
+
+    LossyReliableMulticast.loss = loss
+    channel = Channel()
+    reliable_multicast = LossyReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast._seen = set()
+    reliable_multicast.start()
+    time.sleep(1)
+
+    sender = group_view.identifier == group_view.servers[0]
+    latencies = []
+    if sender:
+        for k in range(messages):
+            message = Message.initFromData("Test", content={"value": k, "ts": time.time()})
+            message.encode()
+            reliable_multicast.send(message)
+            time.sleep(interval)
+    else:
+        for _ in range(messages):
+            envelope = channel.consume()
+            latencies.append(time.time() - envelope.content["ts"])
+
+    time.sleep(1 if not sender else 3)
+    results.put((latencies, reliable_multicast.get_metrics()))
+    time.sleep(2)  # answer outstanding nacks of slower servers
+    os._exit(0)
+
+
+def run(n, fec, loss, messages, interval):
+    results = multiprocessing.Queue()
+    processes = []
+    for group_view in create_group_views(n):
+        p = multiprocessing.Process(target=launch_process, args=(group_view, fec, loss, messages, interval, results))
+        p.start()
+        processes.append(p)
+
+    reports = [results.get() for _ in range(n)]
+    for p in processes:
+        p.join()
+
+    latencies = sorted(latency for report, _ in reports for latency in report)
+    total = {}
+    for _, metrics in reports:
+        for name in ["nacks_sent", "parity_sent", "fec_recovered", "datagrams_dropped"]:
+            total[name] = total.get(name, 0) + metrics.get(name, 0)
+    return latencies, total
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+
+    print(
+        "| {:<4} | {:>5} | {:>8} | {:>8} | {:>9} | {:>8} | {:>6} | {:>6} | {:>9} |".format(
+            "FEC", "Loss", "p50 (ms)", "p99 (ms)", "p999 (ms)", "max (ms)", "NACKs", "Parity", "Recovered"
+        )
+    )
+    print("|------|------:|---------:|---------:|----------:|---------:|-------:|-------:|----------:|")
+    for loss in [0.01, 0.05]:
+        for fec in [False, True]:
+            latencies, total = run(n, fec, loss, messages, interval)
+            print(
+                "| {:<4} | {:>4}% | {:>8.1f} | {:>8.1f} | {:>9.1f} | {:>8.1f} | {:>6} | {:>6} | {:>9} |".format(
+                    "on" if fec else "off",
+                    int(loss * 100),
+                    percentile(latencies, 0.5),
+                    percentile(latencies, 0.99),
+                    percentile(latencies, 0.999),
+                    latencies[-1] * 1000,
+                    total["nacks_sent"],
+                    total["parity_sent"],
+                    total["fec_recovered"],
+                )
+            )
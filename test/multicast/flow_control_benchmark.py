@@ -0,0 +1,138 @@
+import os
+import sys
+import multiprocessing
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from repair_benchmark import create_group_views
+
+# Throughput of ReliableMulticast if the sender is faster than its receivers: one server sends messages as fast as
+# possible, the listener of one of the receivers is slowed down by a delay per received datagram. Without flow control, the socket
+# buffers of the receivers overflow and the lost messages are requested by NACKs; with flow control, the sender is
+# paced by the acks of the slowest receiver. Reports the time until all receivers delivered all messages, the
+# datagrams dropped by the kernel (receive queue drops of the sockets), the NACKs and repairs, and the flow control
+# metrics of the sender.
+#
+# usage: python test/multicast/flow_control_benchmark.py [servers] [messages] [delay per datagram]
+
+
+class SlowReliableMulticast(ReliableMulticast):
+    delay = 0.0
+
+    def _drain(self, sock):
+        datagrams = super()._drain(sock)
+        time.sleep(self.delay * len(datagrams))
+        return datagrams
+
+
+def socket_drops(sock):
+    # drops of the socket, see /proc/net/udp (last column)
+    inode = str(os.fstat(sock.fileno()).st_ino)
+    with open("/proc/net/udp") as f:
+        for line in f.readlines()[1:]:
+            fields = line.split()
+            if fields[9] == inode:
+                return int(fields[-1])
+    return 0
+
+
+def launch_process(group_view, flow_control, window, messages, delay, results, finished):
+    config = Configuration()
+    config.data["flow_control"]["groups"]["consensus"] = flow_control
+    config.data["flow_control"]["window"] = window
+    # the reported results were measured with the verification stage of the consensus group
+    config.data["verification"]["workers"]["consensus"] = 2
+
+    sender = group_view.identifier == group_view.servers[0]
+    slow = group_view.identifier == group_view.servers[-1]
+    SlowReliableMulticast.delay = delay if slow else 0.0
+
+    channel = Channel()
+    reliable_multicast = SlowReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast.start()
+    time.sleep(1)
+
+    start = time.time()
+    if sender:
+        for k in range(messages):
+            message = Message.initFromData("Test", content={"value": k, "text": "x" * 400})
+            message.encode()
+            reliable_multicast.send(message)
+    else:
+        for _ in range(messages):
+            channel.consume()
+    duration = time.time() - start
+
+    if sender:
+        # answer the nacks of the receivers until they delivered all messages
+        finished.wait()
+    drops = socket_drops(reliable_multicast._multicast_listener) + socket_drops(reliable_multicast._udp_sock)
+    results.put((sender, duration, drops, reliable_multicast.get_metrics()))
+    results.close()
+    results.join_thread()
+    finished.wait()
+    os._exit(0)
+
+
+def run(n, flow_control, window, messages, delay):
+    results = multiprocessing.Queue()
+    finished = multiprocessing.Event()
+    processes = []
+    for group_view in create_group_views(n):
+        p = multiprocessing.Process(
+            target=launch_process, args=(group_view, flow_control, window, messages, delay, results, finished)
+        )
+        p.start()
+        processes.append(p)
+
+    reports = [results.get() for _ in range(n - 1)]
+    finished.set()
+    reports.append(results.get())
+    for p in processes:
+        p.join()
+
+    total = {"kernel_drops": sum(drops for _, _, drops, _ in reports)}
+    for _, _, _, metrics in reports:
+        for name in ["nacks_sent", "repairs_multicast", "repairs_unicast"]:
+            total[name] = total.get(name, 0) + metrics.get(name, 0)
+    sender_metrics = [metrics for sender, _, _, metrics in reports if sender][0]
+    duration = max(duration for sender, duration, _, _ in reports if not sender)
+    return total, sender_metrics, duration
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.003
+
+    print(
+        "| {:<12} | {:>12} | {:>12} | {:>6} | {:>7} | {:>10} | {:>6} | {:>14} |".format(
+            "Flow control", "Delivery (s)", "Kernel drops", "NACKs", "Repairs", "Max window", "Stalls", "Pacing delays"
+        )
+    )
+    print("|--------------|-------------:|-------------:|-------:|--------:|-----------:|-------:|---------------:|")
+    for flow_control, window in [(False, 0), (True, 512), (True, 256), (True, 128)]:
+        total, sender_metrics, duration = run(n, flow_control, window, messages, delay)
+        print(
+            "| {:<12} | {:>12.2f} | {:>12} | {:>6} | {:>7} | {:>10} | {:>6} | {:>14} |".format(
+                "window {}".format(window) if flow_control else "off",
+                duration,
+                total["kernel_drops"],
+                total["nacks_sent"],
+                total["repairs_multicast"] + total["repairs_unicast"],
+                sender_metrics.get("send_window_max", "-"),
+                sender_metrics.get("flow_control_stalls", 0),
+                sender_metrics.get("pacing_delays", 0),
+            )
+        )
@@ -0,0 +1,71 @@
+import sys
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.multicast.gaps import IntervalSet, limit_nacks
+from src.protocol.multicast.nack import NegativeAcknowledgement
+
+# Missing messages of a sender after a partition: the messages after the partition are held back, while the
+# messages sent during the partition and the latest messages (announced by heartbeats) are missing. Compares the
+# previous computation (set(range(...)) - set(holdback_queue.keys())), which was done for every received datagram,
+# with the interval set of held back messages, and the size of the resulting NACKs.
+#
+# usage: python test/multicast/gaps_benchmark.py [messages sent during the partition]
+
+
+def previous(holdback_queue, requested, acked):
+    missing_messages = list(set(range(requested + 1, acked + 1)) - set(holdback_queue.keys()))
+    nack_count = len(missing_messages)
+    if nack_count > 100:
+        missing_messages = missing_messages[:100]
+    return missing_messages
+
+
+def intervals(held_back, requested, acked):
+    nack_messages = {"client": held_back.missing(requested + 1, acked)}
+    limit_nacks(nack_messages)
+    return nack_messages["client"]
+
+
+def measure(f, *args):
+    repetitions = 20
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        result = f(*args)
+    return (time.perf_counter() - start) / repetitions, result
+
+
+def nack_size(nacks):
+    nack = NegativeAcknowledgement.initFromData({"client": nacks})
+    nack.encode()
+    return len(nack.raw_data)
+
+
+if __name__ == "__main__":
+    partition = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("| {:>10} | {:>14} | {:>14} | {:>18} | {:>18} |".format(
+        "Missing", "Previous (ms)", "Intervals (us)", "Previous NACK (B)", "Ranges NACK (B)"
+    ))
+    print("|-----------:|---------------:|---------------:|-------------------:|-------------------:|")
+    for missing in [partition // 100, partition // 10, partition]:
+        # messages [0, missing) were sent during the partition, followed by 2 * missing held back messages with
+        # every 100th message lost
+        holdback_queue = {}
+        held_back = IntervalSet()
+        for seqno in range(missing, 3 * missing):
+            if seqno % 100 != 0:
+                holdback_queue[seqno] = None
+                held_back.add(seqno)
+
+        t_previous, previous_nacks = measure(previous, holdback_queue, -1, 3 * missing)
+        t_intervals, interval_nacks = measure(intervals, held_back, -1, 3 * missing)
+        print(
+            "| {:>10} | {:>14.2f} | {:>14.1f} | {:>18} | {:>18} |".format(
+                missing,
+                t_previous * 10**3,
+                t_intervals * 10**6,
+                nack_size(sorted(previous_nacks)),
+                nack_size(interval_nacks),
+            )
+        )
@@ -0,0 +1,98 @@
+import os
+import sys
+import multiprocessing
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from repair_benchmark import create_group_views
+
+# Heartbeat traffic of a group of servers, with fixed and with adaptive heartbeats: the servers are idle, or each
+# server sends a message every interval. Reports the heartbeats sent and suppressed, the datagrams received and the
+# CPU time of all servers (including sending and processing their messages) over the duration of the run.
+#
+# usage: python test/multicast/heartbeat_benchmark.py [servers] [duration] [interval]
+
+
+def launch_process(group_view, adaptive, busy, duration, interval, results):
+    config = Configuration()
+    config.data["heartbeat"]["adaptive"] = adaptive
+
+    channel = Channel()
+    channel.set_trash_flag(True)
+    reliable_multicast = ReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast.start()
+    time.sleep(1)
+
+    start, cpu_start = time.time(), time.process_time()
+    metrics_start = reliable_multicast.get_metrics()
+    while time.time() - start < duration:
+        if busy:
+            message = Message.initFromData("Test", content={"value": 0})
+            message.encode()
+            reliable_multicast.send(message)
+        time.sleep(interval)
+    cpu = time.process_time() - cpu_start
+
+    metrics = reliable_multicast.get_metrics()
+    for name in metrics_start:
+        if isinstance(metrics[name], int):
+            metrics[name] -= metrics_start[name]
+    results.put((cpu, metrics))
+    time.sleep(2)
+    os._exit(0)
+
+
+def run(n, adaptive, busy, duration, interval):
+    results = multiprocessing.Queue()
+    processes = []
+    for group_view in create_group_views(n):
+        p = multiprocessing.Process(target=launch_process, args=(group_view, adaptive, busy, duration, interval, results))
+        p.start()
+        processes.append(p)
+
+    reports = [results.get() for _ in range(n)]
+    for p in processes:
+        p.join()
+
+    total = {"cpu": sum(cpu for cpu, _ in reports)}
+    for _, metrics in reports:
+        for name in ["heartbeats_sent", "heartbeats_suppressed", "datagrams_received"]:
+            total[name] = total.get(name, 0) + metrics.get(name, 0)
+    return total
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+
+    print(
+        "| {:<8} | {:<10} | {:>10} | {:>10} | {:>19} | {:>12} |".format(
+            "Traffic", "Heartbeats", "Sent", "Suppressed", "Datagrams received", "CPU time (s)"
+        )
+    )
+    print("|----------|------------|-----------:|-----------:|--------------------:|-------------:|")
+    for busy in [False, True]:
+        for adaptive in [False, True]:
+            total = run(n, adaptive, busy, duration, interval)
+            print(
+                "| {:<8} | {:<10} | {:>10} | {:>10} | {:>19} | {:>12.2f} |".format(
+                    "messages" if busy else "idle",
+                    "adaptive" if adaptive else "fixed",
+                    total["heartbeats_sent"],
+                    total["heartbeats_suppressed"],
+                    total["datagrams_received"],
+                    total["cpu"],
+                )
+            )
@@ -0,0 +1,106 @@
+import sys
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.protocol.envelope import Envelope
+from src.protocol.multicast.piggyback import PiggybackMessage
+from src.protocol.client.write.text_message import TextMessage
+
+# Cost of the holdback queue of ReliableMulticast with many senders (e.g. clients of the write group). Every sender
+# has a held back message which is waiting for a lost message. Then, a stream of messages of a few active senders
+# is received, where every other message arrives out of order. The previous implementation visited every sender
+# of the holdback queue after each delivery.
+#
+# usage: python test/multicast/holdback_benchmark.py [messages]
+
+
+class PreviousHoldbackMulticast(ReliableMulticast):
+    def _check_holdback_queue(self, identifier: str = None):
+        change = True
+        while change:
+            change = False
+            for identifier in self._holdback_queue:
+                next_seqno = self._R_g[identifier] + 1
+                while next_seqno in self._holdback_queue[identifier]:
+                    self._deliver(self._holdback_queue[identifier][next_seqno], identifier, next_seqno)
+                    next_seqno += 1
+                    change = True
+
+        with self._holdback_queue_lock:
+            for identifier in self._holdback_queue:
+                stale_messages = [seqno for seqno in self._holdback_queue[identifier] if seqno <= self._R_g[identifier]]
+                for stale_message in stale_messages:
+                    del self._holdback_queue[identifier][stale_message]
+
+
+def build_envelope(identifier, seqno):
+    text_msg = TextMessage.initFromData("Hello World, this is a short chat message")
+    text_msg.encode()
+    pb_message = PiggybackMessage.initFromMessage(text_msg, identifier, seqno, {})
+    pb_message.encode()
+    return Envelope.initFromMessage(pb_message)
+
+
+def receive(multicast, identifier, seqno, envelope):
+    # delivery part of ReliableMulticast._receive_pb_message
+    if identifier not in multicast._R_g:
+        multicast._storage[identifier] = multicast.create_store(identifier)
+        multicast._R_g[identifier] = -1
+        multicast._holdback_queue[identifier] = {}
+        multicast._requested_messages[identifier] = [0, -1]
+
+    if seqno == multicast._R_g[identifier] + 1:
+        multicast._deliver(envelope, identifier, seqno)
+        multicast._check_holdback_queue(identifier)
+    elif seqno > multicast._R_g[identifier] + 1:
+        with multicast._holdback_queue_lock:
+            if isinstance(multicast, PreviousHoldbackMulticast):
+                multicast._holdback_queue[identifier][seqno] = envelope
+            else:
+                multicast._hold_back(identifier, seqno, envelope)
+
+
+def run(cls, senders, messages):
+    config = Configuration()
+    multicast = cls(
+        config.get_multicast_addr(),
+        config.get_client_write_multicast_port(),
+        "benchmark",
+        None,
+        None,
+        config,
+        open=True,
+    )
+    envelope = build_envelope("client", 0)
+
+    # idle senders whose message 0 was lost
+    for k in range(senders):
+        receive(multicast, "idle{}".format(k), 1, envelope)
+
+    active = ["active{}".format(k) for k in range(4)]
+    order = []
+    for seqno in range(0, messages // len(active), 2):
+        for identifier in active:
+            order.append((identifier, seqno + 1))
+            order.append((identifier, seqno))
+
+    start = time.perf_counter()
+    for identifier, seqno in order:
+        receive(multicast, identifier, seqno, envelope)
+    elapsed = time.perf_counter() - start
+
+    assert all(multicast._R_g[identifier] == messages // len(active) - 1 for identifier in active)
+    return elapsed / len(order)
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+
+    print("| {:>16} | {:>19} | {:>19} |".format("Waiting senders", "Previous (us/msg)", "Dirty set (us/msg)"))
+    print("|-----------------:|--------------------:|--------------------:|")
+    for senders in [10, 1000, 10000]:
+        previous = run(PreviousHoldbackMulticast, senders, messages)
+        current = run(ReliableMulticast, senders, messages)
+        print("| {:>16} | {:>19.1f} | {:>19.1f} |".format(senders, previous * 10**6, current * 10**6))
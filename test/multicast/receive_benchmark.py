@@ -0,0 +1,135 @@
+import gc
+import socket
+import sys
+import time
+import tracemalloc
+
+sys.path.append(sys.path[0] + "/../..")
+from nacl.signing import SigningKey
+from src.core.signatures.signatures import Signatures
+from src.core.utils.configuration import Configuration
+from src.core.utils.metrics import Metrics
+from src.core.utils.buffer_pool import BufferPool
+from src.core.fragmentation.fragmentation import Reassembler
+from src.core.multicast.verified_cache import VerifiedMessageCache
+from src.protocol.codec import set_codec
+from src.protocol.envelope import Envelope
+from src.protocol.multicast.piggyback import PiggybackMessage
+from src.protocol.multicast.heartbeat import HeartBeat
+from src.protocol.client.write.text_message import TextMessage
+
+# Allocations of the receive path of ReliableMulticast._listen (recv, reassembly, duplicate check, parsing):
+# recvfrom allocates a new bytes object per datagram, while recvfrom_into reads into a buffer of the pool and only
+# messages which are kept are copied (Envelope.detach).
+#
+# The datagrams are signed piggyback messages, each received twice (retransmission), and heartbeats. Retransmitted
+# copies and heartbeats are dropped after the duplicate check or after parsing.
+#
+# usage: python test/multicast/receive_benchmark.py [number of messages]
+
+CHUNK = 50
+
+
+def build_datagrams(n):
+    signature = Signatures(SigningKey.generate(), "server1")
+    datagrams = []
+    for seqno in range(n):
+        text_msg = TextMessage.initFromData("Hello World, this is a short chat message")
+        text_msg.encode()
+        pb_message = PiggybackMessage.initFromMessage(text_msg, "server1", seqno, {"server1": seqno - 1})
+        pb_message.sign(signature)
+        datagrams.append(pb_message.raw_data)
+        datagrams.append(pb_message.raw_data)
+
+        if seqno % 10 == 0:
+            heartbeat = HeartBeat.initFromData({"server1": seqno})
+            heartbeat.encode()
+            datagrams.append(heartbeat.raw_data)
+    return datagrams
+
+
+def receive(sock, cache, reassembler, pool, mtu, kept):
+    """Returns True if the received message is kept"""
+    if pool is None:
+        data, addr = sock.recvfrom(mtu)
+        buffer = None
+    else:
+        buffer, data, addr = pool.recvfrom(sock)
+
+    keep = False
+    data = reassembler.add(data, addr)
+    if cache.lookup(data) is None:
+        envelope = Envelope.initFromBytes(data, addr)
+        if envelope.header != "HeartBeat":
+            pb_message = PiggybackMessage.initFromEnvelope(envelope)
+            pb_message.decode()
+            cache.add(data, pb_message.identifier, pb_message.seqno)
+            kept.append(envelope.detach())
+            keep = True
+
+    if buffer is not None:
+        pool.release(buffer)
+    return keep
+
+
+def run(datagrams, use_pool, trace):
+    config = Configuration()
+    mtu = config.get_mtu()
+    metrics = Metrics()
+    cache = VerifiedMessageCache(config.get_verified_cache_size(), metrics)
+    reassembler = Reassembler.initFromConfiguration(config, metrics)
+    pool = BufferPool(64, mtu, metrics) if use_pool else None
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = receiver.getsockname()
+
+    kept = []
+    allocated = {True: [], False: []}
+    duration = 0
+    gc.disable()
+    for i in range(0, len(datagrams), CHUNK):
+        for data in datagrams[i : i + CHUNK]:
+            sender.sendto(data, addr)
+
+        for _ in datagrams[i : i + CHUNK]:
+            if trace:
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                keep = receive(receiver, cache, reassembler, pool, mtu, kept)
+                allocated[keep].append(tracemalloc.get_traced_memory()[1] - current)
+            else:
+                start = time.perf_counter()
+                receive(receiver, cache, reassembler, pool, mtu, kept)
+                duration += time.perf_counter() - start
+    gc.enable()
+
+    receiver.close()
+    sender.close()
+    return allocated, duration / len(datagrams)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    set_codec("binary")
+    datagrams = build_datagrams(n)
+
+    # allocated bytes are measured as the peak of traced memory while receiving a datagram
+    print(
+        "| {:<22} | {:>18} | {:>15} | {:>14} |".format("Receive", "Bytes/kept message", "Bytes/dropped", "us/datagram")
+    )
+    print("|------------------------|-------------------:|----------------:|---------------:|")
+    for name, use_pool in [("recvfrom", False), ("recvfrom_into + pool", True)]:
+        _, duration = run(datagrams, use_pool, False)
+        tracemalloc.start()
+        allocated, _ = run(datagrams, use_pool, True)
+        tracemalloc.stop()
+        print(
+            "| {:<22} | {:>18.0f} | {:>15.0f} | {:>14.1f} |".format(
+                name,
+                sum(allocated[True]) / len(allocated[True]),
+                sum(allocated[False]) / len(allocated[False]),
+                10**6 * duration,
+            )
+        )
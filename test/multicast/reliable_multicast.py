@@ -15,7 +15,7 @@ def consume(channel, group_view):
     seqno_dict = {}
     for i in range(40000):
         data = channel.consume()
-        message = Message.initFromJSON(data)
+        message = Message.initFromEnvelope(data)
         message.decode()
 
         t = time.time_ns() / 10 ** 6
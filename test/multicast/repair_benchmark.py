@@ -0,0 +1,143 @@
+import os
+import random
+import sys
+import multiprocessing
+import time
+import zlib
+
+sys.path.append(sys.path[0] + "/../..")
+from nacl.signing import SigningKey
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.group_view.group_view import GroupView
+
+# Repair traffic of ReliableMulticast under injected loss: one server sends a stream of messages to a group of
+# servers. A datagram is lost for all receivers with probability loss (e.g. dropped by the switch), and for a single
+# receiver with probability loss / 4. Reports the NACKs and repair datagrams of all servers and the time until the
+# last receiver delivered all messages, with unicast repairs (every receiver NACKs the sender, which answers each
+# NACK) and with multicast repairs (randomized and suppressed NACKs, repairs are multicast).
+#
+# usage: python test/multicast/repair_benchmark.py [servers] [messages]
+
+
+class LossyReliableMulticast(ReliableMulticast):
+    loss = 0.0
+
+    def _drain(self, sock):
+        kept = []
+        for buffer, data, addr in super()._drain(sock):
+            # shared losses apply to the first copy of a datagram only, such that repairs may arrive
+            key = zlib.crc32(data)
+            shared = key not in self._seen and key % 10000 < self.loss * 10000
+            self._seen.add(key)
+            if shared or random.random() < self.loss / 4:
+                self._buffer_pool.release(buffer)
+                self.metrics.increment("datagrams_dropped")
+            else:
+                kept.append((buffer, data, addr))
+        return kept
+
+
+def create_group_views(n):
+    keys = [SigningKey.generate() for _ in range(n)]
+    identifiers = ["server{}".format(i + 1) for i in range(n)]
+
+    group_views = []
+    for i in range(n):
+        group_view = GroupView()
+        group_view.identifier = identifiers[i]
+        group_view.sk = keys[i]
+        group_view.servers = list(identifiers)
+        group_view.manager = identifiers[-1]
+        for identifier, key in zip(identifiers, keys):
+            group_view.pks[identifier] = key.verify_key
+            group_view.users[identifier] = key.verify_key
+            group_view.ip_addrs[identifier] = "127.0.0.1"
+            group_view.ports[identifier] = 0
+        group_views.append(group_view)
+    return group_views
+
+
+def launch_process(group_view, multicast_repair, loss, messages, results):
+    config = Configuration()
+    config.data["repair"]["multicast"] = multicast_repair
+
+    LossyReliableMulticast.loss = loss
+    channel = Channel()
+    reliable_multicast = LossyReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast._seen = set()
+    reliable_multicast.start()
+    time.sleep(1)
+
+    sender = group_view.identifier == group_view.servers[0]
+    start = time.time()
+    if sender:
+        for k in range(messages):
+            message = Message.initFromData("Test", content={"value": k})
+            message.encode()
+            reliable_multicast.send(message)
+            time.sleep(0.001)
+    else:
+        for _ in range(messages):
+            channel.consume()
+    duration = time.time() - start
+
+    time.sleep(1 if not sender else 3)
+    results.put((sender, duration, reliable_multicast.get_metrics()))
+    time.sleep(2)  # answer outstanding nacks of slower servers
+    os._exit(0)
+
+
+def run(n, multicast_repair, loss, messages):
+    results = multiprocessing.Queue()
+    processes = []
+    for group_view in create_group_views(n):
+        p = multiprocessing.Process(target=launch_process, args=(group_view, multicast_repair, loss, messages, results))
+        p.start()
+        processes.append(p)
+
+    reports = [results.get() for _ in range(n)]
+    for p in processes:
+        p.join()
+
+    total = {}
+    for _, _, metrics in reports:
+        for name in ["nacks_sent", "nacks_suppressed", "repairs_multicast", "repairs_unicast", "datagrams_dropped"]:
+            total[name] = total.get(name, 0) + metrics.get(name, 0)
+    duration = max(duration for sender, duration, _ in reports if not sender)
+    return total, duration
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print(
+        "| {:<9} | {:>5} | {:>8} | {:>11} | {:>10} | {:>16} | {:>13} |".format(
+            "Repair", "Loss", "Servers", "Dropped", "NACKs", "Repair datagrams", "Delivery (s)"
+        )
+    )
+    print("|-----------|------:|---------:|------------:|-----------:|-----------------:|--------------:|")
+    for loss in [0.01, 0.05]:
+        for multicast_repair in [False, True]:
+            total, duration = run(n, multicast_repair, loss, messages)
+            print(
+                "| {:<9} | {:>4}% | {:>8} | {:>11} | {:>10} | {:>16} | {:>13.2f} |".format(
+                    "multicast" if multicast_repair else "unicast",
+                    int(loss * 100),
+                    n,
+                    total["datagrams_dropped"],
+                    total["nacks_sent"],
+                    total["repairs_multicast"] + total["repairs_unicast"],
+                    duration,
+                )
+            )
@@ -0,0 +1,104 @@
+import os
+import sys
+import multiprocessing
+import time
+import threading
+import tracemalloc
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.configuration import Configuration
+from src.core.utils.channel import Channel
+from src.protocol.base import Message
+from src.core.multicast.reliable_multicast import ReliableMulticast
+from src.core.group_view.group_view import GroupView
+
+# Memory used by the retransmission storage of a long-running server: every initial server sends a stream of chat
+# sized messages, the stored messages and the memory allocated by the multicast are reported after all messages
+# are delivered and stable (a few heartbeat intervals later).
+#
+# usage: python test/multicast/storage_benchmark.py [messages per server]
+
+
+def launch_process(i, n, retention, messages, results):
+    config = Configuration()
+    config.data["storage"]["retention"]["consensus"] = retention
+
+    files = os.listdir("config/" + config.data["initial"]["path"] + "/")
+    files.remove("global.json")
+    files.sort()
+    group_view = GroupView.initFromFile("config/" + config.data["initial"]["path"] + "/" + files[i])
+
+    tracemalloc.start()
+    channel = Channel()
+    reliable_multicast = ReliableMulticast(
+        config.get_multicast_addr(),
+        config.get_consensus_multicast_port(),
+        group_view.identifier,
+        channel,
+        group_view,
+        config,
+    )
+    reliable_multicast.start()
+    time.sleep(1)
+
+    def sender():
+        for k in range(messages):
+            message = Message.initFromData("Test", content={"text": "message {} of a long running chat".format(k)})
+            message.encode()
+            reliable_multicast.send(message)
+            if k % 100 == 0:
+                time.sleep(0.01)
+
+    threading.Thread(target=sender).start()
+
+    for _ in range(n * messages):
+        channel.consume()
+
+    time.sleep(4 * config.get_heartbeat_interval())
+    metrics = reliable_multicast.get_metrics()
+    results.put(
+        (
+            sum(len(store) - store.first_seqno for store in reliable_multicast._storage.values()),
+            sum(store.nbytes for store in reliable_multicast._storage.values()),
+            tracemalloc.get_traced_memory()[0],
+            metrics.get("messages_evicted", 0),
+        )
+    )
+    time.sleep(2)  # answer outstanding nacks of slower servers
+    os._exit(0)
+
+
+def run(retention, messages):
+    config = Configuration()
+    n = len(os.listdir("config/" + config.data["initial"]["path"] + "/")) - 1
+
+    results = multiprocessing.Queue()
+    processes = []
+    for i in range(n):
+        p = multiprocessing.Process(target=launch_process, args=(i, n, retention, messages, results))
+        p.start()
+        processes.append(p)
+
+    reports = [results.get() for _ in range(n)]
+    for p in processes:
+        p.join()
+
+    return n, [max(values) for values in zip(*reports)]
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print(
+        "| {:<18} | {:>8} | {:>15} | {:>12} | {:>16} | {:>9} |".format(
+            "Retention", "Servers", "Stored messages", "Stored bytes", "Allocated bytes", "Evicted"
+        )
+    )
+    print("|--------------------|---------:|----------------:|-------------:|-----------------:|----------:|")
+    for name, retention in [("unbounded", {}), ("max_count 100", {"max_count": 100}), ("max_age 0", {"max_age": 0})]:
+        n, (stored, nbytes, allocated, evicted) = run(retention, messages)
+        print(
+            "| {:<18} | {:>8} | {:>15} | {:>12} | {:>16} | {:>9} |".format(
+                name, n, stored, nbytes, allocated, evicted
+            )
+        )
@@ -17,7 +17,7 @@ def consume(channel, group_view):
     seqno_dict = {}
     for i in range(400):
         data = channel.consume()
-        message = Message.initFromJSON(data)
+        message = Message.initFromEnvelope(data)
         message.decode()
 
         print(i, data)
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.storage.wal import WriteAheadLog
+from src.core.storage.message_store import MemoryMessageStore
+
+# Cost of the write-ahead log of a server: a history of chat messages of several senders is logged as during
+# delivery, then the log is recovered and the stores are rebuilt as by a restarted server.
+#
+# usage: python test/recovery/wal_benchmark.py [messages] [message size]
+
+
+def run(messages, size, senders=10):
+    with tempfile.TemporaryDirectory() as directory:
+        wal = WriteAheadLog(directory, 16 * 1024 * 1024, 0.1)
+        data = [os.urandom(size) for _ in range(senders)]
+
+        start = time.perf_counter()
+        for k in range(messages):
+            wal.append_message(30495, "sender{}".format(k % senders), k // senders, data[k % senders])
+        wal.checkpoint(lambda: ({"groups": {}}, {}))
+        written = time.perf_counter() - start
+        wal.close()
+        log_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        start = time.perf_counter()
+        wal = WriteAheadLog(directory, 16 * 1024 * 1024, 0.1)
+        _, recovered, _ = wal.recover()
+        stores = {}
+        for port, sender, seqno, message in recovered:
+            stores.setdefault(sender, MemoryMessageStore()).append(message)
+        recovered_in = time.perf_counter() - start
+        wal.close()
+
+        assert sum(len(store) for store in stores.values()) == messages
+        return messages / written, log_bytes, recovered_in
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    print("| {:>9} | {:>12} | {:>12} | {:>13} |".format("Messages", "Logged msg/s", "Log bytes", "Recovery (s)"))
+    print("|----------:|-------------:|-------------:|--------------:|")
+    for n in [messages // 10, messages]:
+        rate, log_bytes, recovered_in = run(n, size)
+        print("| {:>9} | {:>12.0f} | {:>12} | {:>13.2f} |".format(n, rate, log_bytes, recovered_in))
@@ -20,4 +20,4 @@ class MulticastSender:
         return self.sender.getsockname()[1]
 
     def send(self, message: Message):
-        self.sender.sendto(str(message.json_data).encode(), self.multicast_group)
+        self.sender.sendto(message.raw_data, self.multicast_group)
@@ -59,7 +59,7 @@ def launch_process(i):
         #     ack = QueryAck.initFromData(nonce)
         #     ack.encode()
 
-        #     listener.sendto(ack.json_data.encode(), addr)
+        #     listener.sendto(ack.raw_data, addr)
 
 
 
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.storage.message_store import MemoryMessageStore
+from src.core.storage.segment_store import SegmentMessageStore
+
+# Memory of the message history of a sender and the cost of serving NACKs from it, for the memory and the segment
+# backend. Messages are appended in batches of 4 which share their raw data, as stored by the reliable multicast.
+# NACKs request runs of 32 messages at random positions of the history.
+#
+# usage: python test/storage/segment_benchmark.py [messages] [message size]
+
+
+def fill(store, messages, size):
+    for k in range(0, messages, 4):
+        data = os.urandom(size)
+        for _ in range(4):
+            store.append(data)
+
+
+def serve_nacks(store, messages, rounds=2000):
+    sent = 0
+    start = time.perf_counter()
+    for k in range(rounds):
+        first = (k * 7919) % (messages - 32)
+        last_sent = None
+        for seqno in range(first, first + 32):
+            data = store.get(seqno)
+            if data is not last_sent:
+                sent += len(data)
+                last_sent = data
+    return (time.perf_counter() - start) / rounds * 10**6, sent // rounds
+
+
+def run(name, create, messages, size):
+    tracemalloc.start()
+    store = create()
+    fill(store, messages, size)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    us, sent = serve_nacks(store, messages)
+    print(
+        "| {:<10} | {:>12} | {:>12} | {:>16} | {:>10.1f} | {:>12} |".format(
+            name, store.nbytes, store.memory_bytes, allocated, us, sent
+        )
+    )
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+
+    print(
+        "| {:<10} | {:>12} | {:>12} | {:>16} | {:>10} | {:>12} |".format(
+            "Backend", "Stored bytes", "Memory bytes", "Allocated bytes", "us / NACK", "Bytes / NACK"
+        )
+    )
+    print("|------------|-------------:|-------------:|-----------------:|-----------:|-------------:|")
+    with tempfile.TemporaryDirectory() as directory:
+        run("memory", MemoryMessageStore, messages, size)
+        run("segments", lambda: SegmentMessageStore(directory + "/sender", 4 * 1024 * 1024, 256), messages, size)
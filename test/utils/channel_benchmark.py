@@ -0,0 +1,78 @@
+import sys
+import threading
+import time
+
+sys.path.append(sys.path[0] + "/../..")
+from src.core.utils.channel import Channel
+
+# Throughput of Channel compared to the previous implementation (list with pop(0), semaphore and lock per message):
+# - backlog: n messages are produced before they are consumed, as while a multicast is halted or replayed
+# - pipeline: one producer and one consumer thread
+#
+# usage: python test/utils/channel_benchmark.py [number of messages]
+
+
+class ListChannel:
+    def __init__(self):
+        self._semaphore = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._queue = []
+
+    def produce(self, msg):
+        with self._lock:
+            self._queue.append((msg, False))
+            self._semaphore.release()
+
+    def consume(self):
+        self._semaphore.acquire()
+        with self._lock:
+            msg = self._queue.pop(0)[0]
+        return msg
+
+
+def backlog(channel, n, consume):
+    start = time.perf_counter()
+    for i in range(n):
+        channel.produce(i)
+    consume(channel, n)
+    return time.perf_counter() - start
+
+
+def pipeline(channel, n, consume):
+    def producer():
+        for i in range(n):
+            channel.produce(i)
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=producer)
+    thread.start()
+    consume(channel, n)
+    thread.join()
+    return time.perf_counter() - start
+
+
+def consume_each(channel, n):
+    for _ in range(n):
+        channel.consume()
+
+
+def consume_batches(channel, n):
+    while n > 0:
+        n -= len(channel.consume_many(32))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("| {:<30} | {:>15} | {:>15} |".format("Channel", "backlog msg/s", "pipeline msg/s"))
+    print("|--------------------------------|----------------:|----------------:|")
+    for name, cls, consume in [
+        ("list, consume", ListChannel, consume_each),
+        ("deque, consume", Channel, consume_each),
+        ("deque, consume_many(32)", Channel, consume_batches),
+    ]:
+        print(
+            "| {:<30} | {:>15.0f} | {:>15.0f} |".format(
+                name, n / backlog(cls(), n, consume), n / pipeline(cls(), n, consume)
+            )
+        )